@@ -1,31 +1,115 @@
 # read version from installed package
 from importlib.metadata import version
+from typing import TYPE_CHECKING, Any
 
 __version__ = version("pteredactyl")
 
-import warnings
-
-import torch
-
-from pteredactyl.defaults import (  # noqa: F401
-    DEFAULT_ENTITIES,
-    DEFAULT_NER_MODEL,
-    DEFAULT_REGEX_ENTITIES,
-    DEFAULT_SPACY_MODEL,
-    show_defaults,
-)
-from pteredactyl.redactor import (  # noqa: F401
-    analyse,
-    anonymise,
-    anonymise_df,
-    create_analyser,
-)
-from pteredactyl.regex_entities import build_pteredactyl_recogniser  # noqa: F401
-
-if not torch.cuda.is_available():
-    warnings.warn(
-        """
-CUDA is not installed, so pteredactyl will use CPU rather than GPU.
-    -> You can install CUDA 12.1 by running: pip3 install torch torchvision torchaudio --index-url https://download.pytorch.org/whl/cu121 --upgrade
-    -> Alternatively to select a compatible version visit: https://pytorch.org/get-started/locally/ and generate a pip3 installation command"""
+# The public API is loaded lazily, on first attribute access, so that `import pteredactyl`
+# does not import torch, pandas, presidio, spaCy or transformers until they are needed
+_LAZY_ATTRIBUTES = {
+    "DEFAULT_ENTITIES": "pteredactyl.defaults",
+    "DEFAULT_NER_MODEL": "pteredactyl.defaults",
+    "DEFAULT_REGEX_ENTITIES": "pteredactyl.defaults",
+    "DEFAULT_SPACY_MODEL": "pteredactyl.defaults",
+    "show_defaults": "pteredactyl.defaults",
+    "AnalyserCache": "pteredactyl.redactor",
+    "analyse": "pteredactyl.redactor",
+    "analyse_batch": "pteredactyl.redactor",
+    "anonymise": "pteredactyl.redactor",
+    "anonymise_batch": "pteredactyl.redactor",
+    "anonymise_df": "pteredactyl.redactor",
+    "create_analyser": "pteredactyl.redactor",
+    "ResultCache": "pteredactyl.result_cache",
+    "MicroBatcher": "pteredactyl.asynchronous",
+    "analyse_async": "pteredactyl.asynchronous",
+    "anonymise_async": "pteredactyl.asynchronous",
+    "PseudonymStore": "pteredactyl.pseudonyms",
+    "build_pteredactyl_recogniser": "pteredactyl.regex_entities",
+    "are_nhs_numbers": "pteredactyl.regex_check_functions",
+    "is_nhs_number": "pteredactyl.regex_check_functions",
+    "anonymise_file": "pteredactyl.streaming",
+    "CorpusGenerator": "pteredactyl.corpus",
+    "write_corpus": "pteredactyl.corpus",
+    "RedactionService": "pteredactyl.server",
+    "load_surrogate_pool": "pteredactyl.surrogates",
+    "write_surrogate_pool": "pteredactyl.surrogates",
+}
+
+# Submodules that were importable as attributes of the package when it imported them eagerly
+_SUBMODULES = {
+    "asynchronous",
+    "corpus",
+    "defaults",
+    "exceptions",
+    "mappings",
+    "parallel",
+    "pseudonyms",
+    "recognisers",
+    "redactor",
+    "regex_check_functions",
+    "regex_entities",
+    "renderer",
+    "result_cache",
+    "server",
+    "streaming",
+    "support",
+    "surrogates",
+}
+
+__all__ = ["__version__", *_LAZY_ATTRIBUTES]
+
+if TYPE_CHECKING:
+    from pteredactyl.asynchronous import (  # noqa: F401
+        MicroBatcher,
+        analyse_async,
+        anonymise_async,
+    )
+    from pteredactyl.corpus import CorpusGenerator, write_corpus  # noqa: F401
+    from pteredactyl.defaults import (  # noqa: F401
+        DEFAULT_ENTITIES,
+        DEFAULT_NER_MODEL,
+        DEFAULT_REGEX_ENTITIES,
+        DEFAULT_SPACY_MODEL,
+        show_defaults,
+    )
+    from pteredactyl.pseudonyms import PseudonymStore  # noqa: F401
+    from pteredactyl.redactor import (  # noqa: F401
+        AnalyserCache,
+        analyse,
+        analyse_batch,
+        anonymise,
+        anonymise_batch,
+        anonymise_df,
+        create_analyser,
+    )
+    from pteredactyl.regex_check_functions import (  # noqa: F401
+        are_nhs_numbers,
+        is_nhs_number,
+    )
+    from pteredactyl.regex_entities import build_pteredactyl_recogniser  # noqa: F401
+    from pteredactyl.result_cache import ResultCache  # noqa: F401
+    from pteredactyl.server import RedactionService  # noqa: F401
+    from pteredactyl.streaming import anonymise_file  # noqa: F401
+    from pteredactyl.surrogates import (  # noqa: F401
+        load_surrogate_pool,
+        write_surrogate_pool,
     )
+
+
+def __getattr__(name: str) -> Any:
+    import importlib
+
+    if name in _SUBMODULES:
+        return importlib.import_module(f"pteredactyl.{name}")
+
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module 'pteredactyl' has no attribute '{name}'")
+
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    # Cache on the module, so later lookups do not go through __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) | _SUBMODULES)
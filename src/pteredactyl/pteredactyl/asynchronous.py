@@ -0,0 +1,525 @@
+import asyncio
+import queue
+import threading
+import time
+from collections.abc import Sequence
+from concurrent.futures import Future
+
+from presidio_analyzer import AnalyzerEngine
+from presidio_analyzer.recognizer_result import RecognizerResult
+from presidio_anonymizer.entities import OperatorConfig
+
+from pteredactyl.defaults import (
+    DEFAULT_ENTITIES,
+    DEFAULT_NER_MODEL,
+    DEFAULT_REGEX_ENTITIES,
+    DEFAULT_SPACY_MODEL,
+)
+from pteredactyl.recognisers.pteredactyl_recogniser import PteredactylRecogniser
+from pteredactyl.redactor import (
+    _anonymise_results,
+    _check_analyser,
+    _prepare_entities,
+    analyse_batch,
+)
+from pteredactyl.result_cache import ResultCache
+
+# Batchers shared by analyse_async and anonymise_async, keyed by analyser (or model) and batching options
+_batchers: dict[tuple, "MicroBatcher"] = {}
+_batchers_lock = threading.Lock()
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent async requests into micro-batches, which are analysed together on a dedicated inference
+    thread with analyse_batch, so the transformer model sees one forward pass per batch and the event loop is never
+    blocked. Each caller awaits its own result.
+
+    A batch is closed when it holds max_batch_size requests, or max_wait_ms after its first request arrived, whichever
+    is first. While a batch is being analysed, new requests queue up for the next one, so under load batches fill
+    without waiting. Requests with different entities or analysis options can share a batch: they are analysed in one
+    analyse_batch call per distinct set of options. Anonymised texts are rendered on the inference thread too.
+
+    The batcher's thread is the only user of its analyser, which should not be used elsewhere at the same time.
+    Requests can come from any number of threads and event loops.
+
+    Args:
+        analyser (AnalyzerEngine, optional): The analyser to use. If not provided, one is created on the inference
+            thread when the first batch arrives.
+        model_path (str): The path to the NER model. Used only if analyser not provided.
+        spacy_model (str, optional): The spaCy model to use, or None to only tokenize. Used only if analyser not provided.
+        language (str): The language of the texts. Defaults to "en".
+        max_batch_size (int): Maximum number of requests analysed together. Defaults to 32.
+        max_wait_ms (float): Maximum time, in milliseconds, that a request waits for others to join its batch.
+            Defaults to 5.
+
+    Example:
+        >>> batcher = MicroBatcher(analyser, max_batch_size=64, max_wait_ms=10)
+        >>> await asyncio.gather(*(batcher.anonymise(text) for text in texts))
+        ['My name is <PERSON>', 'My NHS number is <NHS_NUMBER>', ...]
+    """
+
+    def __init__(
+        self,
+        analyser: AnalyzerEngine | None = None,
+        model_path: str = DEFAULT_NER_MODEL,
+        spacy_model: str | None = DEFAULT_SPACY_MODEL,
+        language: str = "en",
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must not be negative")
+
+        self.analyser = analyser
+        self.model_path = model_path
+        self.spacy_model = spacy_model
+        self.language = language
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+        # The regex entities the analyser's regex recognisers were last built with
+        self._regex_key: tuple | None = None
+        self.requests = 0
+        self.batches = 0
+
+    @property
+    def stats(self) -> dict:
+        """The number of requests and batches analysed so far, and the mean batch size."""
+        requests, batches = self.requests, self.batches
+        return {
+            "requests": requests,
+            "batches": batches,
+            "mean_batch_size": requests / batches if batches else 0.0,
+        }
+
+    def close(self) -> None:
+        """Finishes the requests already submitted, then stops the inference thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            if thread is not None:
+                self._queue.put(None)
+        if thread is not None:
+            thread.join()
+
+    async def analyse(
+        self,
+        text: str,
+        entities: str | list[str] = DEFAULT_ENTITIES,
+        regex_entities: Sequence[str | PteredactylRecogniser] = DEFAULT_REGEX_ENTITIES,
+        mask_individual_words: bool = False,
+        text_separator: str = " ",
+        result_cache: ResultCache | None = None,
+        **kwargs,
+    ) -> list[RecognizerResult]:
+        """
+        Analyses text in the next micro-batch. See pteredactyl.redactor.analyse for the arguments.
+
+        Returns:
+            list[RecognizerResult]: The analysis results.
+        """
+        return await asyncio.wrap_future(
+            self._submit(
+                text,
+                entities=entities,
+                regex_entities=regex_entities,
+                mask_individual_words=mask_individual_words,
+                text_separator=text_separator,
+                result_cache=result_cache,
+                render=None,
+                kwargs=kwargs,
+            )
+        )
+
+    async def anonymise(
+        self,
+        text: str,
+        entities: str | list[str] = DEFAULT_ENTITIES,
+        regex_entities: Sequence[str | PteredactylRecogniser] = DEFAULT_REGEX_ENTITIES,
+        highlight: bool = False,
+        replacement_lists: dict | None = None,
+        operators: dict[str, OperatorConfig] | None = None,
+        mask_individual_words: bool = False,
+        text_separator: str = " ",
+        result_cache: ResultCache | None = None,
+        **kwargs,
+    ) -> str:
+        """
+        Anonymises text in the next micro-batch. See pteredactyl.redactor.anonymise for the arguments.
+
+        Returns:
+            str: The anonymised text.
+        """
+        return await asyncio.wrap_future(
+            self._submit(
+                text,
+                entities=entities,
+                regex_entities=regex_entities,
+                mask_individual_words=mask_individual_words,
+                text_separator=text_separator,
+                result_cache=result_cache,
+                render=(highlight, replacement_lists, operators),
+                kwargs=kwargs,
+            )
+        )
+
+    def _submit(
+        self,
+        text: str,
+        entities: str | list[str],
+        regex_entities: Sequence[str | PteredactylRecogniser],
+        mask_individual_words: bool,
+        text_separator: str,
+        result_cache: ResultCache | None,
+        render: tuple | None,
+        kwargs: dict,
+    ) -> Future:
+        """Queues a request for the inference thread, starting the thread if needed, and returns its future."""
+        entities, regex_entities, _, _ = _prepare_entities(
+            entities=entities, regex_entities=regex_entities
+        )
+        # Requests with equal options are analysed together
+        options_key = (
+            tuple(entities),
+            _regex_entities_key(regex_entities),
+            mask_individual_words,
+            text_separator,
+            id(result_cache),
+            tuple(sorted((name, repr(value)) for name, value in kwargs.items())),
+        )
+        options = {
+            "entities": entities,
+            "regex_entities": regex_entities,
+            "mask_individual_words": mask_individual_words,
+            "text_separator": text_separator,
+            "result_cache": result_cache,
+            **kwargs,
+        }
+
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The MicroBatcher has been closed")
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="pteredactyl-inference", daemon=True
+                )
+                self._thread.start()
+            self._queue.put((text, future, options_key, options, render))
+
+        return future
+
+    def _run(self) -> None:
+        """The inference thread: collects requests into batches and analyses them until closed."""
+        while True:
+            request = self._queue.get()
+            if request is None:
+                return
+
+            batch = [request]
+            closing = False
+            deadline = time.monotonic() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    request = (
+                        self._queue.get(timeout=timeout)
+                        if timeout > 0
+                        else self._queue.get_nowait()
+                    )
+                except queue.Empty:
+                    break
+                if request is None:
+                    closing = True
+                    break
+                batch.append(request)
+
+            self._run_batch(batch)
+            if closing:
+                return
+
+    def _run_batch(self, batch: list[tuple]) -> None:
+        """Analyses a batch in one analyse_batch call per set of options, and sets each request's result."""
+        # Requests cancelled while waiting are dropped
+        batch = [
+            request for request in batch if request[1].set_running_or_notify_cancel()
+        ]
+        if not batch:
+            return
+        self.requests += len(batch)
+        self.batches += 1
+
+        groups: dict[tuple, list[tuple]] = {}
+        for request in batch:
+            groups.setdefault(request[2], []).append(request)
+
+        for (_, regex_key, *_), requests in groups.items():
+            options = requests[0][3]
+            try:
+                if self.analyser is None:
+                    self.analyser = _check_analyser(
+                        analyser=None,
+                        model_path=self.model_path,
+                        spacy_model=self.spacy_model,
+                        language=self.language,
+                        regex_entities=options["regex_entities"],
+                        rebuild_regex_recognisers=False,
+                    )
+                    self._regex_key = regex_key
+
+                batch_results = analyse_batch(
+                    [request[0] for request in requests],
+                    analyser=self.analyser,
+                    language=self.language,
+                    rebuild_regex_recognisers=regex_key != self._regex_key,
+                    batch_size=len(requests),
+                    **options,
+                )
+                self._regex_key = regex_key
+            except Exception as error:
+                for request in requests:
+                    request[1].set_exception(error)
+                continue
+
+            # Anonymised texts with the same rendering options are rendered together
+            render_groups: dict[tuple, list[tuple]] = {}
+            for request, results in zip(requests, batch_results):
+                render = request[4]
+                if render is None:
+                    request[1].set_result(results)
+                else:
+                    highlight, replacement_lists, operators = render
+                    render_groups.setdefault(
+                        (highlight, id(replacement_lists), id(operators)), []
+                    ).append((request, results))
+
+            for render_group in render_groups.values():
+                highlight, replacement_lists, operators = render_group[0][0][4]
+                try:
+                    anonymised_texts = _anonymise_results(
+                        texts=[request[0] for request, _ in render_group],
+                        batch_results=[results for _, results in render_group],
+                        entities=options["entities"],
+                        highlight=highlight,
+                        replacement_lists=replacement_lists,
+                        mask_individual_words=options["mask_individual_words"],
+                        operators=operators,
+                    )
+                except Exception as error:
+                    for request, _ in render_group:
+                        request[1].set_exception(error)
+                    continue
+
+                for (request, _), anonymised_text in zip(
+                    render_group, anonymised_texts
+                ):
+                    request[1].set_result(anonymised_text)
+
+
+def _regex_entities_key(regex_entities: Sequence[PteredactylRecogniser]) -> tuple:
+    # Regex recognisers are rebuilt for each request, so they are compared by what they match
+    return tuple(
+        (
+            recogniser.entity_type,
+            recogniser.regex.pattern,
+            recogniser.check_function,
+            getattr(recogniser, "batch_check_function", None),
+        )
+        for recogniser in regex_entities
+    )
+
+
+def get_batcher(
+    analyser: AnalyzerEngine | None = None,
+    model_path: str = DEFAULT_NER_MODEL,
+    spacy_model: str | None = DEFAULT_SPACY_MODEL,
+    language: str = "en",
+    max_batch_size: int = 32,
+    max_wait_ms: float = 5.0,
+) -> MicroBatcher:
+    """
+    Returns the shared MicroBatcher for an analyser (or, if no analyser is given, a model) and batching options,
+    creating it on first use. Used by analyse_async and anonymise_async.
+
+    Args:
+        analyser (AnalyzerEngine, optional): The analyser to use.
+        model_path (str): The path to the NER model. Used only if analyser not provided.
+        spacy_model (str, optional): The spaCy model to use. Used only if analyser not provided.
+        language (str): The language of the texts. Defaults to "en".
+        max_batch_size (int): Maximum number of requests analysed together. Defaults to 32.
+        max_wait_ms (float): Maximum time, in milliseconds, that a request waits for others. Defaults to 5.
+
+    Returns:
+        MicroBatcher: The shared batcher.
+    """
+    # A batcher holds its analyser, so the analyser's id is not reused while the batcher exists
+    key = (
+        id(analyser) if analyser is not None else (model_path, spacy_model),
+        language,
+        max_batch_size,
+        max_wait_ms,
+    )
+    with _batchers_lock:
+        batcher = _batchers.get(key)
+        if batcher is None:
+            batcher = _batchers[key] = MicroBatcher(
+                analyser=analyser,
+                model_path=model_path,
+                spacy_model=spacy_model,
+                language=language,
+                max_batch_size=max_batch_size,
+                max_wait_ms=max_wait_ms,
+            )
+    return batcher
+
+
+def close_batchers() -> None:
+    """Closes the shared batchers, finishing the requests already submitted and releasing their analysers."""
+    with _batchers_lock:
+        batchers = list(_batchers.values())
+        _batchers.clear()
+    for batcher in batchers:
+        batcher.close()
+
+
+async def analyse_async(
+    text: str,
+    analyser: AnalyzerEngine | None = None,
+    entities: str | list[str] = DEFAULT_ENTITIES,
+    regex_entities: Sequence[str | PteredactylRecogniser] = DEFAULT_REGEX_ENTITIES,
+    model_path: str = DEFAULT_NER_MODEL,
+    spacy_model: str | None = DEFAULT_SPACY_MODEL,
+    language: str = "en",
+    mask_individual_words: bool = False,
+    text_separator: str = " ",
+    result_cache: ResultCache | None = None,
+    max_batch_size: int = 32,
+    max_wait_ms: float = 5.0,
+    **kwargs,
+) -> list[RecognizerResult]:
+    """
+    Analyses text without blocking the event loop. Concurrent calls with the same analyser are coalesced into
+    micro-batches, analysed on the analyser's inference thread (see MicroBatcher).
+
+    Args:
+        text (str): The text to be analysed.
+        analyser (AnalyzerEngine, optional): An instance of AnalyzerEngine. If not provided, one is created for model_path
+            on the inference thread and reused by later calls.
+        entities (list, optional): A list of entity types to analyse. If not provided, a default list will be used.
+        regex_entities (list, optional): A list of regex entities or PteredactylRecognisers to analyse. If not provided, a default list will be used.
+        model_path (str): The path to the model used for analysis. Used only if analyser not provided.
+        spacy_model (str, optional): The spaCy model to use. Used only if analyser not provided.
+        language (str): The language of the text to be analysed. Defaults to "en".
+        mask_individual_words (bool): If True, prevents joining of next-door entities together. Defaults to False.
+        text_separator (str): Text separator. Default is whitespace.
+        result_cache (ResultCache, optional): If provided, results are looked up in and stored in this cache.
+        max_batch_size (int): Maximum number of calls analysed together. Defaults to 32.
+        max_wait_ms (float): Maximum time, in milliseconds, that a call waits for others to join its batch. Defaults to 5.
+        **kwargs: Additional keyword arguments for the analyzer.
+
+    Returns:
+        list[RecognizerResult]: The analysis results.
+
+    Example:
+        >>> analyser = create_analyser()
+        >>> await asyncio.gather(*(analyse_async(text, analyser=analyser) for text in texts))
+    """
+    batcher = get_batcher(
+        analyser=analyser,
+        model_path=model_path,
+        spacy_model=spacy_model,
+        language=language,
+        max_batch_size=max_batch_size,
+        max_wait_ms=max_wait_ms,
+    )
+    return await batcher.analyse(
+        text,
+        entities=entities,
+        regex_entities=regex_entities,
+        mask_individual_words=mask_individual_words,
+        text_separator=text_separator,
+        result_cache=result_cache,
+        **kwargs,
+    )
+
+
+async def anonymise_async(
+    text: str,
+    analyser: AnalyzerEngine | None = None,
+    entities: str | list[str] = DEFAULT_ENTITIES,
+    regex_entities: Sequence[str | PteredactylRecogniser] = DEFAULT_REGEX_ENTITIES,
+    highlight: bool = False,
+    replacement_lists: dict | None = None,
+    operators: dict[str, OperatorConfig] | None = None,
+    model_path: str = DEFAULT_NER_MODEL,
+    spacy_model: str | None = DEFAULT_SPACY_MODEL,
+    language: str = "en",
+    mask_individual_words: bool = False,
+    text_separator: str = " ",
+    result_cache: ResultCache | None = None,
+    max_batch_size: int = 32,
+    max_wait_ms: float = 5.0,
+    **kwargs,
+) -> str:
+    """
+    Anonymises text without blocking the event loop. Concurrent calls with the same analyser are coalesced into
+    micro-batches, analysed and rendered on the analyser's inference thread (see MicroBatcher).
+
+    Args:
+        text (str): The text to be anonymised.
+        analyser (AnalyzerEngine, optional): An instance of AnalyzerEngine. If not provided, one is created for model_path
+            on the inference thread and reused by later calls.
+        entities (list, optional): A list of entity types to anonymise. If not provided, a default list will be used.
+        regex_entities (list, optional): A list of regex entities or PteredactylRecognisers to analyse. If not provided, a default list will be used.
+        highlight (bool): If True, highlights the anonymised parts in the text.
+        replacement_lists: (dict, optional): A dictionary with entity types as keys and lists of replacement values for
+            hide-in-plain-sight redaction.
+        operators (dict, optional): A dictionary with entity types (or "DEFAULT") as keys and OperatorConfigs as values
+            (see pteredactyl.renderer.render).
+        model_path (str): The path to the model used for analysis. Used only if analyser not provided.
+        spacy_model (str, optional): The spaCy model to use. Used only if analyser not provided.
+        language (str): The language of the text to be analysed. Defaults to "en".
+        mask_individual_words (bool): If True, prevents joining of next-door entities together. Defaults to False.
+        text_separator (str): Text separator. Default is whitespace.
+        result_cache (ResultCache, optional): If provided, analysis results are looked up in and stored in this cache.
+        max_batch_size (int): Maximum number of calls analysed together. Defaults to 32.
+        max_wait_ms (float): Maximum time, in milliseconds, that a call waits for others to join its batch. Defaults to 5.
+        **kwargs: Additional keyword arguments for the analyzer.
+
+    Returns:
+        str: The anonymised text.
+
+    Example:
+        >>> analyser = create_analyser()
+        >>> await anonymise_async("My name is John Doe", analyser=analyser)
+        'My name is <PERSON>'
+    """
+    batcher = get_batcher(
+        analyser=analyser,
+        model_path=model_path,
+        spacy_model=spacy_model,
+        language=language,
+        max_batch_size=max_batch_size,
+        max_wait_ms=max_wait_ms,
+    )
+    return await batcher.anonymise(
+        text,
+        entities=entities,
+        regex_entities=regex_entities,
+        highlight=highlight,
+        replacement_lists=replacement_lists,
+        operators=operators,
+        mask_individual_words=mask_individual_words,
+        text_separator=text_separator,
+        result_cache=result_cache,
+        **kwargs,
+    )
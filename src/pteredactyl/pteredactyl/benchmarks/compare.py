@@ -0,0 +1,136 @@
+import argparse
+import json
+import sys
+from collections.abc import Sequence
+from pathlib import Path
+
+from pteredactyl.benchmarks.suite import BASELINE_PATH
+
+# A benchmark more than this much slower than its baseline is a regression
+DEFAULT_THRESHOLD = 0.25
+
+
+def compare_results(
+    results: dict,
+    baseline: dict,
+    threshold: float = DEFAULT_THRESHOLD,
+    normalise: bool = True,
+) -> list[dict]:
+    """
+    Compares benchmark results with a baseline, by the fastest time per call of each benchmark in both.
+
+    Args:
+        results (dict): The results, from run_benchmarks.
+        baseline (dict): The baseline results.
+        threshold (float): The relative slowdown above which a benchmark is a regression (and speed-up above which
+            it is an improvement). Defaults to 0.25, i.e. 25%.
+        normalise (bool): If True, divides each time by the run's calibration time first, so that results from a
+            faster or slower machine than the baseline's can be compared. Defaults to True.
+
+    Returns:
+        list[dict]: For each benchmark in either, its "name", "baseline" and "result" times (None if missing),
+            "ratio" of result to baseline, and "status": "regression", "improvement", "unchanged", "new" or "missing".
+    """
+    result_scale = results["calibration"] if normalise else 1.0
+    baseline_scale = baseline["calibration"] if normalise else 1.0
+
+    comparisons = []
+    names = dict.fromkeys([*baseline["benchmarks"], *results["benchmarks"]])
+    for name in names:
+        baseline_time = baseline["benchmarks"].get(name, {}).get("min")
+        result_time = results["benchmarks"].get(name, {}).get("min")
+        if baseline_time is None or result_time is None:
+            ratio = None
+            status = "new" if baseline_time is None else "missing"
+        else:
+            ratio = (result_time / result_scale) / (baseline_time / baseline_scale)
+            if ratio > 1 + threshold:
+                status = "regression"
+            elif ratio < 1 / (1 + threshold):
+                status = "improvement"
+            else:
+                status = "unchanged"
+        comparisons.append(
+            {
+                "name": name,
+                "baseline": baseline_time,
+                "result": result_time,
+                "ratio": ratio,
+                "status": status,
+            }
+        )
+
+    return comparisons
+
+
+def format_comparisons(comparisons: list[dict]) -> str:
+    """Formats comparisons as a table, one benchmark per line."""
+
+    def milliseconds(seconds: float | None) -> str:
+        return "-" if seconds is None else f"{seconds * 1000:.3f}"
+
+    lines = [f"{'benchmark':<50} {'baseline ms':>12} {'result ms':>12} {'ratio':>7}"]
+    for comparison in comparisons:
+        ratio = comparison["ratio"]
+        lines.append(
+            f"{comparison['name']:<50} {milliseconds(comparison['baseline']):>12} "
+            f"{milliseconds(comparison['result']):>12} {'-' if ratio is None else f'{ratio:.2f}':>7}"
+            f"  {comparison['status']}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """
+    Compares results with the baseline, exiting with 1 if any benchmark regressed:
+    python -m pteredactyl.benchmarks.compare results.json
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m pteredactyl.benchmarks.compare",
+        description="Compare benchmark results with a baseline and flag regressions.",
+    )
+    parser.add_argument("results", type=Path, help="Results from the suite.")
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=BASELINE_PATH,
+        help="Baseline results. Defaults to the committed baseline.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Relative slowdown that counts as a regression.",
+    )
+    parser.add_argument(
+        "--no-normalise",
+        action="store_true",
+        help="Compare raw times, rather than times relative to each run's calibration.",
+    )
+    args = parser.parse_args(argv)
+
+    results = json.loads(args.results.read_text())
+    baseline = json.loads(args.baseline.read_text())
+    if results["machine"] != baseline["machine"]:
+        print(
+            "Note: the results and baseline were measured on different machines or library versions",
+            file=sys.stderr,
+        )
+
+    comparisons = compare_results(
+        results,
+        baseline,
+        threshold=args.threshold,
+        normalise=not args.no_normalise,
+    )
+    print(format_comparisons(comparisons))
+
+    regressions = [c["name"] for c in comparisons if c["status"] == "regression"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+import argparse
+import json
+import platform
+import re
+import tempfile
+import timeit
+from collections.abc import Callable, Sequence
+from pathlib import Path
+
+from presidio_analyzer.recognizer_result import RecognizerResult
+
+from pteredactyl.benchmarks.tiny_model import create_tiny_model, register_tiny_model
+
+RESULTS_VERSION = 1
+
+# The baseline that results are compared with by default, committed with the benchmarks
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+NOTE_TEMPLATE = (
+    "Patient {index}: Jane Smith, NHS number 943 476 5919, was seen at Southampton General Hospital on "
+    "12/03/2024 by Dr John Brown. Postcode SO16 6YD, telephone 07700 900123. She reports intermittent "
+    "abdominal pain over six weeks, with no weight loss. Plan: review in clinic with bloods, and refer to "
+    "gastroenterology if symptoms persist. Her previous NHS number 123 456 7890 was recorded in error."
+)
+
+# Benchmarks of anonymise_df, by rows and text columns
+DATAFRAME_SIZES = ((10, 1), (10, 4), (50, 1), (50, 4))
+
+# Benchmarks slower than this per call are repeated at most SLOW_REPEAT times
+SLOW_SECONDS = 1.0
+SLOW_REPEAT = 3
+
+# A benchmark's setup prepares its inputs, outside the timing, and returns the function to time
+Setup = Callable[[], Callable[[], object]]
+
+
+def _note(index: int) -> str:
+    return NOTE_TEMPLATE.format(index=index)
+
+
+def _calibration() -> Callable[[], object]:
+    # Pure Python work, timed with every run, so results from different machines can be compared
+    return lambda: sum(i * i for i in range(100_000))
+
+
+def _pteredactyl_recogniser(entity_type: str) -> Setup:
+    def setup() -> Callable[[], object]:
+        from pteredactyl.regex_entities import fetch_pteredactyl_recogniser
+
+        recogniser = fetch_pteredactyl_recogniser(entity_type)
+        text = " ".join(_note(i) for i in range(20))
+        return lambda: recogniser.analyze(text, [entity_type], None)
+
+    return setup
+
+
+def _combined_recogniser() -> Callable[[], object]:
+    from pteredactyl.defaults import DEFAULT_REGEX_ENTITIES
+    from pteredactyl.recognisers.pteredactyl_recogniser import (
+        CombinedPteredactylRecogniser,
+    )
+    from pteredactyl.regex_entities import build_regex_entity_recogniser_list
+
+    recogniser = CombinedPteredactylRecogniser(
+        build_regex_entity_recogniser_list(DEFAULT_REGEX_ENTITIES)
+    )
+    text = " ".join(_note(i) for i in range(20))
+    return lambda: recogniser.analyze(text, recogniser.supported_entities, None)
+
+
+def _is_nhs_number() -> Callable[[], object]:
+    from pteredactyl.regex_check_functions import is_nhs_number
+
+    # Valid and invalid numbers, with and without spaces
+    candidates = [f"{943_476_5919 + i:010d}" for i in range(500)] + [
+        f"{i:03d} {i + 100:03d} {i + 1000:04d}" for i in range(500)
+    ]
+    return lambda: [is_nhs_number(candidate) for candidate in candidates]
+
+
+def _split_results_into_individual_words() -> Callable[[], object]:
+    from pteredactyl.support import split_results_into_individual_words
+
+    text = " ".join(_note(i) for i in range(50))
+    results = [
+        RecognizerResult("PERSON", match.start(), match.end(), 0.9)
+        for match in re.finditer(r"Jane Smith|Dr John Brown", text)
+    ] + [
+        RecognizerResult("HOSPITAL", match.start(), match.end(), 0.9)
+        for match in re.finditer("Southampton General Hospital", text)
+    ]
+    return lambda: split_results_into_individual_words(text, results)
+
+
+def _split_text_to_word_chunks() -> Callable[[], object]:
+    from pteredactyl.recognisers.transformers_recogniser import TransformersRecogniser
+
+    return lambda: TransformersRecogniser.split_text_to_word_chunks(100_000, 128, 32)
+
+
+def _anonymise_render() -> Callable[[], object]:
+    from pteredactyl.redactor import _anonymise_results
+
+    text = _note(0)
+    results = [
+        RecognizerResult(entity_type, match.start(), match.end(), 0.9)
+        for entity_type, pattern in (
+            ("PERSON", r"Jane|Smith|Dr John Brown"),
+            ("NHS_NUMBER", r"\d{3} \d{3} \d{4}"),
+            ("HOSPITAL", "Southampton General Hospital"),
+            ("LOCATION", "Southampton"),
+            ("DATE_TIME", r"\d\d/\d\d/\d{4}"),
+            ("POSTCODE", "SO16 6YD"),
+            ("PHONE_NUMBER", "07700 900123"),
+        )
+        for match in re.finditer(pattern, text)
+    ]
+    return lambda: _anonymise_results(
+        texts=[text],
+        batch_results=[results],
+        entities=[],
+        highlight=False,
+        replacement_lists=None,
+        mask_individual_words=False,
+    )
+
+
+def _anonymise_df(n_rows: int, n_columns: int, model_path: Callable[[], str]) -> Setup:
+    def setup() -> Callable[[], object]:
+        import pandas as pd
+
+        from pteredactyl.redactor import anonymise_df, create_analyser
+
+        analyser = create_analyser(model_path=model_path())
+        # Every cell is different, so no analysis is saved by anonymise_df's deduplication
+        df = pd.DataFrame(
+            {
+                f"note_{column}": [
+                    _note(row * n_columns + column) for row in range(n_rows)
+                ]
+                for column in range(n_columns)
+            }
+        )
+        return lambda: anonymise_df(
+            df,
+            column=list(df.columns),
+            analyser=analyser,
+            rebuild_regex_recognisers=False,
+        )
+
+    return setup
+
+
+def build_benchmarks(model_dir: str | Path) -> dict[str, Setup]:
+    """
+    Returns the benchmarks, by name. Model-dependent benchmarks use a tiny local model, saved to model_dir when first
+    needed, so the suite runs offline.
+
+    Args:
+        model_dir (str | Path): Directory to save the tiny model to.
+
+    Returns:
+        dict[str, Setup]: The setup function of each benchmark.
+    """
+    model_path = None
+
+    def tiny_model_path() -> str:
+        nonlocal model_path
+        if model_path is None:
+            model_path = create_tiny_model(model_dir)
+            register_tiny_model(model_path)
+        return model_path
+
+    benchmarks: dict[str, Setup] = {
+        "pteredactyl_recogniser.analyze[NHS_NUMBER]": _pteredactyl_recogniser(
+            "NHS_NUMBER"
+        ),
+        "pteredactyl_recogniser.analyze[POSTCODE]": _pteredactyl_recogniser("POSTCODE"),
+        "combined_pteredactyl_recogniser.analyze": _combined_recogniser,
+        "is_nhs_number[x1000]": _is_nhs_number,
+        "split_results_into_individual_words": _split_results_into_individual_words,
+        "split_text_to_word_chunks": _split_text_to_word_chunks,
+        "anonymise.render": _anonymise_render,
+    }
+    for n_rows, n_columns in DATAFRAME_SIZES:
+        benchmarks[f"anonymise_df[rows={n_rows},columns={n_columns}]"] = _anonymise_df(
+            n_rows, n_columns, tiny_model_path
+        )
+
+    return benchmarks
+
+
+def time_function(function: Callable[[], object], repeat: int = 5) -> dict:
+    """
+    Times a function as timeit does: each repeat calls it enough times to take at least 0.2 seconds. Functions that
+    take over a second per call are repeated at most three times.
+
+    Args:
+        function (Callable): The function to time.
+        repeat (int): The number of repeats. Defaults to 5.
+
+    Returns:
+        dict: The fastest ("min") and median time per call in seconds, and the number of calls per repeat.
+    """
+    timer = timeit.Timer(function)
+    loops, total = timer.autorange()
+    if total / loops > SLOW_SECONDS:
+        repeat = min(repeat, SLOW_REPEAT)
+    times = sorted(total / loops for total in timer.repeat(repeat=repeat, number=loops))
+    return {"min": times[0], "median": times[len(times) // 2], "loops": loops}
+
+
+def machine_info() -> dict:
+    """Describes the machine and library versions, which results should only be compared within."""
+    import torch
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+    }
+
+
+def run_benchmarks(
+    names: Sequence[str] | None = None,
+    repeat: int = 5,
+    model_dir: str | Path | None = None,
+    verbose: bool = False,
+) -> dict:
+    """
+    Runs the benchmarks.
+
+    Args:
+        names (Sequence[str], optional): Run only benchmarks whose names contain one of these. Defaults to all.
+        repeat (int): The number of repeats of each benchmark. Defaults to 5.
+        model_dir (str | Path, optional): Directory to save the tiny model to. Defaults to a temporary directory.
+        verbose (bool): If True, prints each result as it is measured.
+
+    Returns:
+        dict: The machine info, the calibration time, and the times of each benchmark (see time_function).
+
+    Example:
+        >>> results = run_benchmarks(["is_nhs_number", "anonymise_df"])
+        >>> results["benchmarks"]["is_nhs_number[x1000]"]["min"]
+        0.00041
+    """
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        benchmarks = build_benchmarks(model_dir or temporary_dir)
+        if names:
+            benchmarks = {
+                name: setup
+                for name, setup in benchmarks.items()
+                if any(pattern in name for pattern in names)
+            }
+
+        results = {
+            "version": RESULTS_VERSION,
+            "machine": machine_info(),
+            "calibration": time_function(_calibration(), repeat=repeat)["min"],
+            "benchmarks": {},
+        }
+        for name, setup in benchmarks.items():
+            results["benchmarks"][name] = timing = time_function(setup(), repeat=repeat)
+            if verbose:
+                print(f"{name:<50} {timing['min'] * 1000:>12.3f} ms")
+
+    return results
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Runs the benchmarks and saves the results: python -m pteredactyl.benchmarks.suite -o results.json"""
+    parser = argparse.ArgumentParser(
+        prog="python -m pteredactyl.benchmarks.suite",
+        description="Run pteredactyl's micro-benchmarks.",
+    )
+    parser.add_argument(
+        "-o", "--output", type=Path, required=True, help="JSON file to save results to."
+    )
+    parser.add_argument(
+        "-k",
+        "--names",
+        nargs="+",
+        help="Run only benchmarks whose names contain one of these.",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.names, repeat=args.repeat, verbose=True)
+    args.output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import string
+from pathlib import Path
+
+import torch
+from tokenizers import (
+    Tokenizer,
+    decoders,
+    models,
+    normalizers,
+    pre_tokenizers,
+    processors,
+)
+from transformers import BertConfig, BertForTokenClassification, PreTrainedTokenizerFast
+
+TINY_MODEL_LABELS = [
+    "O",
+    "B-PATIENT",
+    "I-PATIENT",
+    "B-HOSPITAL",
+    "I-HOSPITAL",
+    "B-DATE",
+    "I-DATE",
+]
+
+
+def create_tiny_model(model_path: str | Path) -> str:
+    """
+    Saves a tiny, randomly initialised BERT token classification model with a character-level fast tokenizer, so
+    that tests and benchmarks can run the transformer pipeline without downloading a model. Its predictions are
+    meaningless, but it takes the same code paths as a real model.
+
+    Args:
+        model_path (str | Path): The directory to save the model to.
+
+    Returns:
+        str: The model path.
+    """
+    model_path = Path(model_path)
+    special_tokens = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    characters = string.ascii_letters + string.digits
+    vocab = (
+        special_tokens
+        + list(characters + string.punctuation)
+        + [f"##{c}" for c in characters]
+    )
+    vocab = {token: i for i, token in enumerate(vocab)}
+
+    tokenizer = Tokenizer(models.WordPiece(vocab=vocab, unk_token="[UNK]"))
+    tokenizer.normalizer = normalizers.BertNormalizer(lowercase=False)
+    tokenizer.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    tokenizer.decoder = decoders.WordPiece()
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]",
+        pair="[CLS] $A [SEP] $B [SEP]",
+        special_tokens=[("[CLS]", vocab["[CLS]"]), ("[SEP]", vocab["[SEP]"])],
+    )
+    PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        unk_token="[UNK]",
+        pad_token="[PAD]",
+        cls_token="[CLS]",
+        sep_token="[SEP]",
+        mask_token="[MASK]",
+        model_max_length=128,
+    ).save_pretrained(model_path)
+
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+        max_position_embeddings=128,
+        num_labels=len(TINY_MODEL_LABELS),
+        id2label=dict(enumerate(TINY_MODEL_LABELS)),
+        label2id={label: i for i, label in enumerate(TINY_MODEL_LABELS)},
+    )
+    torch.manual_seed(0)
+    BertForTokenClassification(config).save_pretrained(model_path)
+
+    return str(model_path)
+
+
+def register_tiny_model(model_path: str) -> None:
+    """
+    Adds a recogniser configuration for a tiny model to pteredactyl.mappings, so that create_analyser accepts its path.
+
+    Args:
+        model_path (str): The path of a model saved by create_tiny_model.
+    """
+    from pteredactyl.mappings import configuration, create_configuration
+
+    configuration[model_path] = create_configuration(
+        model_path, "Identified as {} by a tiny model"
+    )
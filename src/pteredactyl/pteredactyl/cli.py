@@ -0,0 +1,344 @@
+import argparse
+import statistics
+import sys
+import time
+from collections.abc import Sequence
+from pathlib import Path
+
+from pteredactyl.defaults import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_ENTITIES,
+    DEFAULT_NER_MODEL,
+    DEFAULT_REGEX_ENTITIES,
+    DEFAULT_SPACY_MODEL,
+)
+
+OUTPUT_SUFFIXES = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "jsonl": ".jsonl",
+    "text": ".txt",
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Builds the argument parser for the pteredactyl command."""
+    parser = argparse.ArgumentParser(
+        prog="pteredactyl",
+        description="Redact PII from CSV, Parquet, JSONL and plain-text files, or directories of them.",
+    )
+    parser.add_argument(
+        "inputs", nargs="+", type=Path, help="Files or directories to redact."
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        required=True,
+        type=Path,
+        help="Output file, or output directory if redacting a directory or several files.",
+    )
+    parser.add_argument(
+        "-c",
+        "--columns",
+        nargs="+",
+        help="Columns to redact in CSV, Parquet and JSONL files. Plain-text files are redacted line by line.",
+    )
+    parser.add_argument(
+        "-r",
+        "--recursive",
+        action="store_true",
+        help="Also redact files in subdirectories of input directories.",
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=sorted(OUTPUT_SUFFIXES),
+        help="Format of the output files. Defaults to the format of each input file.",
+    )
+    parser.add_argument(
+        "--keep-original",
+        action="store_true",
+        help="Keep the original columns and add redacted copies, rather than replacing them.",
+    )
+
+    model_group = parser.add_argument_group("model")
+    model_group.add_argument(
+        "-m", "--model", default=DEFAULT_NER_MODEL, help="Path to the NER model."
+    )
+    model_group.add_argument(
+        "--spacy-model",
+        default=DEFAULT_SPACY_MODEL,
+        help="Run the full pipeline of this spaCy model (e.g. en_core_web_sm). By default text is only tokenized.",
+    )
+    model_group.add_argument(
+        "--language", default="en", help="The language of the text."
+    )
+    model_group.add_argument(
+        "-e",
+        "--entities",
+        nargs="+",
+        default=DEFAULT_ENTITIES,
+        help="Entity types to redact.",
+    )
+    model_group.add_argument(
+        "--regex-entities",
+        nargs="*",
+        default=DEFAULT_REGEX_ENTITIES,
+        help="Regex entity types to redact. Pass with no values to disable regex redaction.",
+    )
+    model_group.add_argument(
+        "--highlight",
+        action="store_true",
+        help="Highlight the placeholders or replacements that redacted spans are replaced with.",
+    )
+    model_group.add_argument(
+        "--mask-individual-words",
+        action="store_true",
+        help="Mask each word of an entity separately.",
+    )
+
+    performance_group = parser.add_argument_group("performance")
+    performance_group.add_argument(
+        "-b",
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Number of texts per model forward pass.",
+    )
+    performance_group.add_argument(
+        "--chunksize",
+        type=int,
+        default=10_000,
+        help="Number of rows read, redacted and written at a time.",
+    )
+    performance_group.add_argument(
+        "--backend",
+        choices=["pytorch", "onnx"],
+        default="pytorch",
+        help="Inference backend. onnx exports the model once and runs it with onnxruntime.",
+    )
+    performance_group.add_argument(
+        "--quantize",
+        choices=["int8"],
+        help="Dynamically quantise the model's linear layers.",
+    )
+    performance_group.add_argument(
+        "--optimize",
+        nargs="*",
+        choices=["inference_mode", "sdpa", "bf16", "compile", "bucketing"],
+        help="Enable CPU fast paths for the pytorch backend. With no values, enables all but bf16.",
+    )
+    performance_group.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes.",
+    )
+    performance_group.add_argument(
+        "--share-model-weights",
+        action="store_true",
+        help="Share one copy of the model weights between worker processes.",
+    )
+
+    return parser
+
+
+def collect_jobs(
+    inputs: Sequence[Path],
+    output: Path,
+    recursive: bool = False,
+    output_format: str | None = None,
+) -> list[tuple[Path, Path]]:
+    """
+    Pairs each input file with its output file.
+    Files found in input directories keep their path relative to that directory under the output directory.
+
+    Args:
+        inputs (Sequence[Path]): Files or directories to redact.
+        output (Path): Output file, or output directory if more than one file is redacted.
+        recursive (bool): If True, also includes files in subdirectories of input directories.
+        output_format (str, optional): The output format, which sets the suffix of output files.
+
+    Returns:
+        list[tuple[Path, Path]]: The (input, output) file pairs.
+
+    Raises:
+        FileNotFoundError: If an input does not exist.
+        ValueError: If two input files would be written to the same output file.
+    """
+    from pteredactyl.streaming import FILE_FORMATS
+
+    input_files = []
+    for input_path in inputs:
+        if input_path.is_dir():
+            pattern = "**/*" if recursive else "*"
+            input_files.extend(
+                (path, path.relative_to(input_path))
+                for path in sorted(input_path.glob(pattern))
+                if path.is_file() and path.suffix.lower() in FILE_FORMATS
+            )
+        elif input_path.is_file():
+            input_files.append((input_path, Path(input_path.name)))
+        else:
+            raise FileNotFoundError(f"No such file or directory: '{input_path}'")
+
+    single_file = len(inputs) == 1 and inputs[0].is_file() and not output.is_dir()
+
+    jobs = []
+    sources = {}
+    for input_file, relative_path in input_files:
+        if output_format:
+            relative_path = relative_path.with_suffix(OUTPUT_SUFFIXES[output_format])
+        output_file = output if single_file else output / relative_path
+        # e.g. the same file name in two input directories, or a.csv and a.jsonl with --output-format
+        if output_file in sources:
+            raise ValueError(
+                f"'{sources[output_file]}' and '{input_file}' would both be written to '{output_file}'"
+            )
+        sources[output_file] = input_file
+        jobs.append((input_file, output_file))
+
+    return jobs
+
+
+def format_summary(
+    n_files: int, n_rows: int, elapsed: float, chunk_latencies: list[float]
+) -> str:
+    """
+    Formats the throughput and latency summary printed at the end of a run.
+
+    Args:
+        n_files (int): Number of files redacted.
+        n_rows (int): Number of rows (or lines) redacted.
+        elapsed (float): Wall-clock time of the run, in seconds.
+        chunk_latencies (list[float]): Time taken to read, redact and write each chunk, in seconds.
+
+    Returns:
+        str: The summary.
+    """
+    lines = [
+        "PteRedactyl Summary",
+        "-------------------",
+        f"Files:              {n_files}",
+        f"Rows:               {n_rows}",
+        f"Elapsed:            {elapsed:.2f} s",
+        f"Throughput:         {n_rows / elapsed if elapsed else 0:.1f} rows/s",
+    ]
+
+    if chunk_latencies:
+        latencies_ms = sorted(latency * 1000 for latency in chunk_latencies)
+        p95_ms = latencies_ms[min(len(latencies_ms) - 1, int(0.95 * len(latencies_ms)))]
+        lines += [
+            f"Chunks:             {len(latencies_ms)}",
+            f"Chunk latency mean: {statistics.mean(latencies_ms):.1f} ms",
+            f"Chunk latency p50:  {statistics.median(latencies_ms):.1f} ms",
+            f"Chunk latency p95:  {p95_ms:.1f} ms",
+            f"Chunk latency max:  {latencies_ms[-1]:.1f} ms",
+            f"Time per row:       {elapsed * 1000 / n_rows if n_rows else 0:.2f} ms",
+        ]
+
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """
+    Runs the pteredactyl command.
+
+    Example:
+        $ pteredactyl notes.csv -o notes_redacted.csv --columns note_text --batch-size 64 --workers 4
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        jobs = collect_jobs(
+            args.inputs,
+            args.output,
+            recursive=args.recursive,
+            output_format=args.output_format,
+        )
+    except (FileNotFoundError, ValueError) as e:
+        parser.error(str(e))
+
+    if not jobs:
+        parser.error("No CSV, Parquet, JSONL or text files found to redact")
+
+    # Imported here, so that --help and argument errors do not wait for torch and pandas to load
+    from pteredactyl.parallel import create_anonymiser_pool
+    from pteredactyl.redactor import create_analyser
+    from pteredactyl.streaming import anonymise_file, infer_file_format
+
+    if args.columns is None and any(
+        infer_file_format(src) != "text" for src, _ in jobs
+    ):
+        parser.error("--columns is required to redact CSV, Parquet and JSONL files")
+
+    analyser, executor = None, None
+    if args.workers > 1:
+        executor = create_anonymiser_pool(
+            n_workers=args.workers,
+            model_path=args.model,
+            spacy_model=args.spacy_model,
+            language=args.language,
+            regex_entities=args.regex_entities,
+            share_model_weights=args.share_model_weights,
+            backend=args.backend,
+            quantize=args.quantize,
+            optimize=True if args.optimize == [] else args.optimize,
+        )
+    else:
+        analyser = create_analyser(
+            model_path=args.model,
+            spacy_model=args.spacy_model,
+            language=args.language,
+            regex_entities=args.regex_entities,
+            backend=args.backend,
+            quantize=args.quantize,
+            optimize=True if args.optimize == [] else args.optimize,
+        )
+
+    chunk_latencies = []
+    last_chunk_time = None
+
+    def record_chunk(n_rows: int) -> None:
+        nonlocal last_chunk_time
+        now = time.perf_counter()
+        chunk_latencies.append(now - last_chunk_time)
+        last_chunk_time = now
+
+    n_rows = 0
+    start_time = time.perf_counter()
+    try:
+        for src, dst in jobs:
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            last_chunk_time = time.perf_counter()
+            n_rows += anonymise_file(
+                src,
+                dst,
+                columns=args.columns,
+                output_format=args.output_format,
+                chunksize=args.chunksize,
+                analyser=analyser,
+                executor=executor,
+                language=args.language,
+                entities=args.entities,
+                regex_entities=args.regex_entities,
+                highlight=args.highlight,
+                mask_individual_words=args.mask_individual_words,
+                col_inplace=not args.keep_original,
+                batch_size=args.batch_size,
+                rebuild_regex_recognisers=False,
+                on_chunk=record_chunk,
+            )
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    elapsed = time.perf_counter() - start_time
+    print(format_summary(len(jobs), n_rows, elapsed, chunk_latencies))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
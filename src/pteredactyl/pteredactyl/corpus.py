@@ -0,0 +1,471 @@
+import argparse
+import json
+import math
+import os
+import random
+import string
+from collections import deque
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+
+import pandas as pd
+
+# Sentences that mention PII. Each field is replaced by a generated value, whose span is recorded with its entity type.
+PII_TEMPLATES = (
+    "{person} was seen in clinic today with her daughter.",
+    "Patient: {person}, NHS number {nhs_number}, DOB {date}.",
+    "{person}, aged {age}, was admitted to {hospital} on {date}.",
+    "Address: 14 Station Road, {town}, {postcode}.",
+    "Reviewed by Dr {surname} on the ward round on {date}.",
+    "Contact number {phone} (mobile), email {email}.",
+    "Referred by Dr {surname} at {town} Health Centre.",
+    "NHS No: {nhs_number}. Postcode {postcode}.",
+    "Discharged home to {town} on {date}, follow up with Dr {surname}.",
+    "Next of kin: {person} (husband), telephone {phone}.",
+    "Transferred from {hospital} for further imaging.",
+    "{forename} reports that her pain is worse at night.",
+)
+
+# Sentences without PII
+FILLER_TEMPLATES = (
+    "She reports intermittent abdominal pain over the last six weeks.",
+    "No weight loss, night sweats or change in bowel habit.",
+    "On examination the abdomen was soft and non-tender.",
+    "Observations were stable and she was apyrexial.",
+    "Plan: bloods today, including full blood count and CRP.",
+    "Chest X-ray showed no consolidation or effusion.",
+    "Continue current medication and review in six weeks.",
+    "He was started on oral antibiotics for a presumed urinary tract infection.",
+    "Blood pressure 132/84, heart rate 78, oxygen saturation 97% on air.",
+    "Discussed the risks and benefits of the procedure, and consent was obtained.",
+    "Known type 2 diabetes, well controlled on metformin.",
+    "Safety-netting advice was given and she is happy with the plan.",
+)
+
+# Used when the raw names file is not present
+FALLBACK_FORENAMES = (
+    "Olivia Amelia Isla Ava Mia Grace Sophia Lily Freya Emily "
+    "Oliver George Noah Arthur Harry Leo Muhammad Jack Charlie Oscar"
+).split()
+FALLBACK_SURNAMES = (
+    "Smith Jones Taylor Brown Williams Wilson Johnson Davies Patel Robinson "
+    "Wright Thompson Evans Walker White Roberts Green Hall Wood Khan"
+).split()
+
+HOSPITAL_SUFFIXES = (
+    "General Hospital",
+    "Royal Infirmary",
+    "Community Hospital",
+    "University Hospital",
+)
+
+_POSTCODE_UNIT_LETTERS = "ABDEFGHJLNPQRSTUWXYZ"
+_POSTCODE_AREAS = "SO PO BH SP RG GU OX B M L LS S E N SW NE CF EH G BT".split()
+
+LENGTH_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+# Columns of a generated corpus
+ID_COLUMN = "id"
+TEXT_COLUMN = "text"
+SPANS_COLUMN = "spans"
+
+
+def _compile(template: str) -> list[tuple[str, str | None]]:
+    return [
+        (literal, field) for literal, field, _, _ in string.Formatter().parse(template)
+    ]
+
+
+def _nhs_check_digit(digits: str) -> int:
+    checksum = 11 - sum(int(digit) * (10 - i) for i, digit in enumerate(digits)) % 11
+    return 0 if checksum == 11 else checksum
+
+
+def generate_nhs_number(rng: random.Random, valid: bool = True) -> str:
+    """
+    Generates a ten digit NHS number, formatted as NHS numbers are written in notes.
+
+    Args:
+        rng (random.Random): The random number generator to use.
+        valid (bool): If True, the number has a correct check digit, otherwise an incorrect one. Defaults to True.
+
+    Returns:
+        str: The NHS number, unspaced, or spaced or hyphenated 3-3-4.
+    """
+    digits = f"{rng.randrange(1, 10)}{rng.randrange(10**8):08d}"
+    check_digit = _nhs_check_digit(digits)
+    if valid:
+        # A check digit of 10 makes the number invalid, so draw again
+        while check_digit == 10:
+            digits = f"{rng.randrange(1, 10)}{rng.randrange(10**8):08d}"
+            check_digit = _nhs_check_digit(digits)
+    else:
+        check_digit = rng.choice([d for d in range(10) if d != check_digit])
+
+    number = f"{digits}{check_digit}"
+    separator = rng.choice(("", " ", "-"))
+    return (
+        separator.join((number[:3], number[3:6], number[6:])) if separator else number
+    )
+
+
+def generate_postcode(rng: random.Random, valid: bool = True) -> str:
+    """
+    Generates a UK postcode.
+
+    Args:
+        rng (random.Random): The random number generator to use.
+        valid (bool): If True, the postcode is in a valid format. Otherwise it looks plausible, but its inward code
+            (e.g. "6YD") is malformed, so the POSTCODE regex entity does not match it. Defaults to True.
+
+    Returns:
+        str: The postcode, e.g. "SO16 6YD".
+    """
+    outward = f"{rng.choice(_POSTCODE_AREAS)}{rng.randrange(1, 30)}"
+    sector = str(rng.randrange(10))
+    unit = [rng.choice(_POSTCODE_UNIT_LETTERS) for _ in range(2)]
+    if valid:
+        return f"{outward} {sector}{''.join(unit)}"
+
+    malformed = rng.randrange(3)
+    if malformed == 0:
+        # A digit in place of the last letter, e.g. "6Y1"
+        inward = f"{sector}{unit[0]}{rng.randrange(10)}"
+    elif malformed == 1:
+        # The sector digit after the first letter, e.g. "Y6D"
+        inward = f"{unit[0]}{sector}{unit[1]}"
+    else:
+        # A letter missing, e.g. "6Y"
+        inward = f"{sector}{unit[0]}"
+    return f"{outward} {inward}"
+
+
+class CorpusGenerator:
+    """
+    Generates synthetic clinical notes, with the gold span of every piece of PII in them, for load and throughput
+    testing. Notes are built from sentence templates, with names drawn from the raw replacement lists.
+
+    Generation is seeded, so the same options always produce the same corpus, and lazy, so corpora of any size can be
+    streamed.
+
+    Args:
+        seed (int): Seed of the random number generator. Defaults to 0.
+        mean_sentences (float): The mean number of sentences per note. Defaults to 8.
+        length_distribution (str): "fixed" (every note has mean_sentences), "uniform" (1 to 2 * mean_sentences - 1)
+            or "lognormal" (mostly short notes, with a long tail). Defaults to "lognormal".
+        max_sentences (int): The most sentences a note can have. Defaults to 200.
+        pii_density (float): The fraction of sentences that contain PII, between 0 and 1. Defaults to 0.5.
+        duplicate_rate (float): The fraction of notes that repeat one of the last 1,000 notes exactly, as copied
+            letters and templated notes do in real data. Defaults to 0.
+        invalid_nhs_number_rate (float): The fraction of NHS numbers with an incorrect check digit. Defaults to 0.1.
+        invalid_postcode_rate (float): The fraction of postcodes in an invalid format, which the POSTCODE regex entity
+            does not match. Defaults to 0.1.
+        forenames (Sequence[str], optional): Forenames to draw from. Defaults to the raw names list, if present.
+        surnames (Sequence[str], optional): Surnames to draw from. Defaults to the raw names list, if present.
+        towns (Sequence[str], optional): Towns to draw from. Defaults to the raw list of UK towns and cities.
+
+    Example:
+        >>> generator = CorpusGenerator(seed=1, mean_sentences=4, duplicate_rate=0.2)
+        >>> for note in generator.generate(1000):
+        ...     for span in note["spans"]:
+        ...         print(span["entity_type"], note["text"][span["start"] : span["end"]], span["valid"])
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        mean_sentences: float = 8,
+        length_distribution: str = "lognormal",
+        max_sentences: int = 200,
+        pii_density: float = 0.5,
+        duplicate_rate: float = 0.0,
+        invalid_nhs_number_rate: float = 0.1,
+        invalid_postcode_rate: float = 0.1,
+        forenames: Sequence[str] | None = None,
+        surnames: Sequence[str] | None = None,
+        towns: Sequence[str] | None = None,
+    ):
+        if length_distribution not in LENGTH_DISTRIBUTIONS:
+            raise ValueError(
+                f"length_distribution must be one of {LENGTH_DISTRIBUTIONS}, not '{length_distribution}'"
+            )
+        if mean_sentences < 1 or max_sentences < 1:
+            raise ValueError("mean_sentences and max_sentences must be at least 1")
+        for name, rate in (
+            ("pii_density", pii_density),
+            ("duplicate_rate", duplicate_rate),
+            ("invalid_nhs_number_rate", invalid_nhs_number_rate),
+            ("invalid_postcode_rate", invalid_postcode_rate),
+        ):
+            if not 0 <= rate <= 1:
+                raise ValueError(f"{name} must be between 0 and 1, not {rate}")
+
+        self.seed = seed
+        self.mean_sentences = mean_sentences
+        self.length_distribution = length_distribution
+        self.max_sentences = max_sentences
+        self.pii_density = pii_density
+        self.duplicate_rate = duplicate_rate
+        self.invalid_nhs_number_rate = invalid_nhs_number_rate
+        self.invalid_postcode_rate = invalid_postcode_rate
+
+        if forenames is None or surnames is None:
+            default_forenames, default_surnames = _default_names()
+            forenames = default_forenames if forenames is None else forenames
+            surnames = default_surnames if surnames is None else surnames
+        if towns is None:
+            from pteredactyl.replacement_lists.generate_lists import generate_locations
+
+            towns = generate_locations()
+        self.forenames = list(forenames)
+        self.surnames = list(surnames)
+        self.towns = list(towns)
+
+        self._pii_templates = [_compile(template) for template in PII_TEMPLATES]
+        self._filler_templates = [_compile(template) for template in FILLER_TEMPLATES]
+        # Template field: the entity type of its values, and the method generating a value and whether it is valid
+        self._fields = {
+            "person": ("PERSON", self._person),
+            "forename": ("PERSON", self._forename),
+            "surname": ("PERSON", self._surname),
+            "town": ("LOCATION", self._town),
+            "hospital": ("LOCATION", self._hospital),
+            "date": ("DATE_TIME", self._date),
+            "age": ("AGE", self._age),
+            "phone": ("PHONE_NUMBER", self._phone),
+            "email": ("EMAIL_ADDRESS", self._email),
+            "nhs_number": ("NHS_NUMBER", self._nhs_number),
+            "postcode": ("POSTCODE", self._postcode),
+        }
+
+    def _person(self, rng: random.Random) -> tuple[str, bool]:
+        return f"{rng.choice(self.forenames)} {rng.choice(self.surnames)}", True
+
+    def _forename(self, rng: random.Random) -> tuple[str, bool]:
+        return rng.choice(self.forenames), True
+
+    def _surname(self, rng: random.Random) -> tuple[str, bool]:
+        return rng.choice(self.surnames), True
+
+    def _town(self, rng: random.Random) -> tuple[str, bool]:
+        return rng.choice(self.towns), True
+
+    def _hospital(self, rng: random.Random) -> tuple[str, bool]:
+        return f"{rng.choice(self.towns)} {rng.choice(HOSPITAL_SUFFIXES)}", True
+
+    def _date(self, rng: random.Random) -> tuple[str, bool]:
+        day, month, year = (
+            rng.randrange(1, 29),
+            rng.randrange(1, 13),
+            rng.randrange(1930, 2025),
+        )
+        return f"{day:02d}/{month:02d}/{year}", True
+
+    def _age(self, rng: random.Random) -> tuple[str, bool]:
+        return str(rng.randrange(18, 100)), True
+
+    def _phone(self, rng: random.Random) -> tuple[str, bool]:
+        # Ofcom reserves 07700 900000 to 900999 for fiction
+        return f"07700 900{rng.randrange(1000):03d}", True
+
+    def _email(self, rng: random.Random) -> tuple[str, bool]:
+        forename, surname = rng.choice(self.forenames), rng.choice(self.surnames)
+        return f"{forename.lower()}.{surname.lower()}@example.com", True
+
+    def _nhs_number(self, rng: random.Random) -> tuple[str, bool]:
+        valid = rng.random() >= self.invalid_nhs_number_rate
+        return generate_nhs_number(rng, valid=valid), valid
+
+    def _postcode(self, rng: random.Random) -> tuple[str, bool]:
+        valid = rng.random() >= self.invalid_postcode_rate
+        return generate_postcode(rng, valid=valid), valid
+
+    def _n_sentences(self, rng: random.Random) -> int:
+        if self.length_distribution == "fixed":
+            n_sentences = round(self.mean_sentences)
+        elif self.length_distribution == "uniform":
+            n_sentences = rng.randint(1, max(1, round(2 * self.mean_sentences) - 1))
+        else:
+            # Parameterised so that the mean of the distribution is mean_sentences
+            sigma = 0.75
+            n_sentences = round(
+                rng.lognormvariate(math.log(self.mean_sentences) - sigma**2 / 2, sigma)
+            )
+        return min(max(n_sentences, 1), self.max_sentences)
+
+    def _note(self, rng: random.Random) -> tuple[str, list[dict]]:
+        parts, spans = [], []
+        position = 0
+        for i in range(self._n_sentences(rng)):
+            if i:
+                parts.append(" ")
+                position += 1
+            if rng.random() < self.pii_density:
+                template = rng.choice(self._pii_templates)
+            else:
+                template = rng.choice(self._filler_templates)
+
+            for literal, field in template:
+                parts.append(literal)
+                position += len(literal)
+                if field is None:
+                    continue
+                entity_type, generate_value = self._fields[field]
+                value, valid = generate_value(rng)
+                parts.append(value)
+                spans.append(
+                    {
+                        "entity_type": entity_type,
+                        "start": position,
+                        "end": position + len(value),
+                        "valid": valid,
+                    }
+                )
+                position += len(value)
+
+        return "".join(parts), spans
+
+    def generate(self, n_documents: int) -> Iterator[dict]:
+        """
+        Generates notes one at a time.
+
+        Args:
+            n_documents (int): The number of notes to generate.
+
+        Yields:
+            dict: The note's "id" (its position in the corpus), "text", and gold "spans": the "entity_type", "start"
+                and "end" character offsets, and whether it is "valid", of every piece of PII in the text. Invalid NHS
+                numbers and postcodes should not be redacted by checks of their format or check digit.
+        """
+        rng = random.Random(self.seed)
+        recent: deque[tuple[str, list[dict]]] = deque(maxlen=1000)
+        for index in range(n_documents):
+            if recent and rng.random() < self.duplicate_rate:
+                text, spans = rng.choice(recent)
+            else:
+                text, spans = self._note(rng)
+                recent.append((text, spans))
+            yield {ID_COLUMN: index, TEXT_COLUMN: text, SPANS_COLUMN: spans}
+
+    def iter_chunks(
+        self, n_documents: int, chunksize: int = 10_000
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Generates notes as DataFrames of up to chunksize rows, with the gold spans of each note as a JSON string.
+
+        Args:
+            n_documents (int): The number of notes to generate.
+            chunksize (int): The most rows per DataFrame. Defaults to 10,000.
+
+        Yields:
+            pd.DataFrame: Columns "id", "text" and "spans".
+        """
+        chunk = []
+        for document in self.generate(n_documents):
+            document[SPANS_COLUMN] = json.dumps(document[SPANS_COLUMN])
+            chunk.append(document)
+            if len(chunk) == chunksize:
+                yield pd.DataFrame(chunk)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk)
+
+
+def _default_names() -> tuple[list[str], list[str]]:
+    from pteredactyl.replacement_lists.generate_lists import (
+        NAMES_FILE,
+        REPLACEMENT_RAW_DIR,
+        generate_forenames,
+        generate_surnames,
+    )
+
+    if (REPLACEMENT_RAW_DIR / NAMES_FILE).exists():
+        return generate_forenames(), generate_surnames()
+    return list(FALLBACK_FORENAMES), list(FALLBACK_SURNAMES)
+
+
+def write_corpus(
+    dst: str | os.PathLike,
+    n_documents: int,
+    file_format: str | None = None,
+    chunksize: int = 10_000,
+    encoding: str = "utf-8",
+    **kwargs,
+) -> int:
+    """
+    Generates a synthetic corpus of clinical notes and streams it to a CSV, Parquet, JSONL or plain-text file, chunk by
+    chunk, so corpora of any size can be written in flat memory. The file can be read back with anonymise_file.
+
+    Args:
+        dst (str or PathLike): The output file.
+        n_documents (int): The number of notes to generate.
+        file_format (str, optional): One of "csv", "parquet", "jsonl" or "text". Inferred from the extension of dst if
+            not provided. Plain-text files hold one note per line, without ids or gold spans.
+        chunksize (int): Number of notes generated and written at a time. Defaults to 10,000.
+        encoding (str): The text encoding of CSV, JSONL and plain-text files. Defaults to "utf-8".
+        **kwargs: Options for CorpusGenerator (e.g. seed, mean_sentences, pii_density, duplicate_rate).
+
+    Returns:
+        int: The number of notes written.
+
+    Example:
+        >>> write_corpus("notes.parquet", 1_000_000, mean_sentences=12, duplicate_rate=0.05)
+        >>> anonymise_file("notes.parquet", "notes_redacted.parquet", columns="text")
+    """
+    from pteredactyl.streaming import _ChunkWriter, infer_file_format
+
+    file_format = file_format or infer_file_format(dst)
+    if file_format not in ("csv", "jsonl", "parquet", "text"):
+        raise ValueError(f"Unsupported file_format '{file_format}'")
+
+    generator = CorpusGenerator(**kwargs)
+    n_written = 0
+    with _ChunkWriter(
+        dst, file_format, encoding=encoding, text_column=TEXT_COLUMN
+    ) as writer:
+        for chunk in generator.iter_chunks(n_documents, chunksize=chunksize):
+            writer.write(chunk)
+            n_written += len(chunk)
+
+    return n_written
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Writes a synthetic corpus: python -m pteredactyl.corpus notes.csv -n 100000"""
+    parser = argparse.ArgumentParser(
+        prog="python -m pteredactyl.corpus",
+        description="Generate a synthetic corpus of clinical notes, with gold PII spans.",
+    )
+    parser.add_argument(
+        "output", type=Path, help="CSV, Parquet, JSONL or plain-text file."
+    )
+    parser.add_argument("-n", "--n-documents", type=int, required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mean-sentences", type=float, default=8)
+    parser.add_argument(
+        "--length-distribution", choices=LENGTH_DISTRIBUTIONS, default="lognormal"
+    )
+    parser.add_argument("--pii-density", type=float, default=0.5)
+    parser.add_argument("--duplicate-rate", type=float, default=0.0)
+    parser.add_argument("--invalid-nhs-number-rate", type=float, default=0.1)
+    parser.add_argument("--invalid-postcode-rate", type=float, default=0.1)
+    parser.add_argument("--chunksize", type=int, default=10_000)
+    args = parser.parse_args(argv)
+
+    n_written = write_corpus(
+        args.output,
+        args.n_documents,
+        chunksize=args.chunksize,
+        seed=args.seed,
+        mean_sentences=args.mean_sentences,
+        length_distribution=args.length_distribution,
+        pii_density=args.pii_density,
+        duplicate_rate=args.duplicate_rate,
+        invalid_nhs_number_rate=args.invalid_nhs_number_rate,
+        invalid_postcode_rate=args.invalid_postcode_rate,
+    )
+    print(f"Wrote {n_written:,} notes to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
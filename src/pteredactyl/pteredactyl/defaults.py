@@ -1,8 +1,12 @@
 from pteredactyl.regex_entities import REGEX_ENTITIES
 
-DEFAULT_SPACY_MODEL = "en_core_web_sm"
+# None uses a tokenizer-only pipeline; set a spaCy model name (e.g. "en_core_web_sm") to run the full spaCy pipeline
+DEFAULT_SPACY_MODEL = None
 DEFAULT_NER_MODEL = "StanfordAIMI/stanford-deidentifier-base"
 
+# Number of texts analysed together by analyse_batch, anonymise_batch, anonymise_df and the CLI
+DEFAULT_BATCH_SIZE = 32
+
 DEFAULT_ENTITIES = [
     "LOCATION",
     "PERSON",
@@ -57,6 +57,9 @@ BASE_CONFIGURATION = {
     },
     "CHUNK_OVERLAP_SIZE": 40,
     "CHUNK_SIZE": 600,
+    "CHUNK_STRIDE": 32,
+    "BATCH_SIZE": 8,
+    "CHUNK_WORKERS": 1,
     "ID_SCORE_MULTIPLIER": 0.4,
     "ID_ENTITY_NAME": "ID",
 }
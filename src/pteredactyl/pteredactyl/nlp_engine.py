@@ -0,0 +1,35 @@
+import spacy
+from presidio_analyzer.nlp_engine import NerModelConfiguration, SpacyNlpEngine
+
+from pteredactyl.defaults import SPACY_LABELS_TO_IGNORE
+
+
+class TokenizerNlpEngine(SpacyNlpEngine):
+    """
+    A spaCy NLP engine that only tokenizes text, using a blank spaCy pipeline for each language.
+
+    Pteredactyl's recognisers find entities with the transformers model and regexes, and do not use the part-of-speech
+    tags, dependency parse, lemmas or named entities that a full spaCy model produces. A blank pipeline has no
+    components to run and no model to download, so it is much cheaper per document than e.g. en_core_web_sm.
+    The resulting NlpArtifacts contain tokens, but no entities, and each token's lemma is empty.
+
+    Args:
+        languages (list[str]): The language codes to create blank pipelines for (e.g. ["en"]).
+    """
+
+    def __init__(self, languages: list[str] | None = None):
+        languages = languages or ["en"]
+        super().__init__(
+            models=[
+                {"lang_code": language, "model_name": f"blank:{language}"}
+                for language in languages
+            ],
+            ner_model_configuration=NerModelConfiguration(
+                labels_to_ignore=SPACY_LABELS_TO_IGNORE
+            ),
+        )
+        self.languages = languages
+
+    def load(self) -> None:
+        """Creates a blank spaCy pipeline for each language. Nothing is downloaded."""
+        self.nlp = {language: spacy.blank(language) for language in self.languages}
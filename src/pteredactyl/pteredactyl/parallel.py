@@ -0,0 +1,269 @@
+import math
+import os
+from collections.abc import Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from multiprocessing.context import BaseContext
+from typing import Any
+
+import torch
+import torch.multiprocessing
+from presidio_analyzer import AnalyzerEngine
+from tqdm.auto import tqdm
+from transformers import AutoModelForTokenClassification, PreTrainedModel
+
+from pteredactyl.defaults import (
+    DEFAULT_NER_MODEL,
+    DEFAULT_REGEX_ENTITIES,
+    DEFAULT_SPACY_MODEL,
+)
+from pteredactyl.recognisers.backends import (
+    export_onnx,
+    load_quantized_model,
+    quantize_onnx_int8,
+)
+from pteredactyl.recognisers.pteredactyl_recogniser import PteredactylRecogniser
+from pteredactyl.redactor import anonymise_batch, create_analyser
+from pteredactyl.support import load_transformers_recognizer
+
+# Analyser built once per worker process by _init_worker
+_worker_analyser: AnalyzerEngine | None = None
+
+
+def _init_worker(
+    model_path: str,
+    spacy_model: str | None,
+    language: str,
+    regex_entities: Sequence[str | PteredactylRecogniser],
+    torch_threads: int | None,
+    shared_model: PreTrainedModel | None = None,
+    backend: str = "pytorch",
+    quantize: str | None = None,
+    optimize: bool | Sequence[str] | None = None,
+) -> None:
+    """Builds the worker process's analyser, once, when the process starts.
+    If a shared_model is given, the worker's pipeline is built around it rather than loading its own copy of the weights.
+    """
+    global _worker_analyser
+
+    if torch_threads:
+        torch.set_num_threads(torch_threads)
+
+    transformers_recogniser = (
+        load_transformers_recognizer(
+            model_path,
+            model=shared_model,
+            backend=backend,
+            quantize=quantize,
+            optimize=optimize,
+        )
+        if shared_model is not None
+        else None
+    )
+
+    _worker_analyser = create_analyser(
+        model_path=model_path,
+        spacy_model=spacy_model,
+        language=language,
+        regex_entities=regex_entities,
+        transformers_recogniser=transformers_recogniser,
+        backend=backend,
+        quantize=quantize,
+        optimize=optimize,
+    )
+
+
+def load_shared_model(model_path: str, quantize: str | None = None) -> PreTrainedModel:
+    """
+    Loads a token classification model once and moves its weights to shared memory, so that worker processes
+    can use the same pages rather than each holding their own copy.
+    Forked workers inherit the weights copy-on-write; spawned workers receive handles to the shared memory.
+
+    Args:
+        model_path (str): The path to the NER model.
+        quantize (str, optional): "int8" to share a dynamically quantised copy of the model.
+
+    Returns:
+        PreTrainedModel: The model, in eval mode with its weights in shared memory.
+    """
+    if quantize == "int8":
+        model = load_quantized_model(model_path)
+    else:
+        model = AutoModelForTokenClassification.from_pretrained(model_path)
+    model.eval()
+    model.share_memory()
+    return model
+
+
+def _anonymise_shard(
+    shard_index: int, texts: list[str], anonymise_kwargs: dict[str, Any]
+) -> tuple[int, list[str]]:
+    """Anonymises a shard of texts with the worker process's analyser."""
+    return shard_index, anonymise_batch(
+        texts,
+        analyser=_worker_analyser,
+        rebuild_regex_recognisers=False,
+        **anonymise_kwargs,
+    )
+
+
+def create_anonymiser_pool(
+    n_workers: int | None = None,
+    model_path: str = DEFAULT_NER_MODEL,
+    spacy_model: str | None = DEFAULT_SPACY_MODEL,
+    language: str = "en",
+    regex_entities: Sequence[str | PteredactylRecogniser] = DEFAULT_REGEX_ENTITIES,
+    torch_threads: int | None = None,
+    mp_context: BaseContext | None = None,
+    share_model_weights: bool = False,
+    backend: str = "pytorch",
+    quantize: str | None = None,
+    optimize: bool | Sequence[str] | None = None,
+) -> ProcessPoolExecutor:
+    """
+    Creates a process pool whose workers each build their own analyser once, when they start.
+    The pool can be passed as the executor to anonymise_df or anonymise_parallel, and reused across calls.
+
+    With share_model_weights, the model is loaded once in this process and its weights are moved to shared memory
+    before the workers start, so memory no longer grows with the number of workers. Workers are forked where the
+    platform supports it (inheriting the weights copy-on-write), and spawned otherwise.
+
+    Args:
+        n_workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+        model_path (str): The path to the model used by each worker's analyser.
+        spacy_model (str, optional): The spaCy model used by each worker's analyser.
+        language (str): The language used by each worker's analyser. Defaults to "en".
+        regex_entities (list, optional): Regex entities or PteredactylRecognisers used by each worker's analyser.
+            Custom PteredactylRecognisers must be picklable (i.e. check functions defined at module level).
+        torch_threads (int, optional): Number of torch threads per worker. Defaults to CPUs divided by n_workers.
+        mp_context (BaseContext, optional): The multiprocessing context used to start workers.
+        share_model_weights (bool): If True, workers share one copy of the model weights. Defaults to False.
+        backend (str): Inference backend of each worker's model, "pytorch" or "onnx". Defaults to "pytorch".
+        quantize (str, optional): "int8" for each worker to run a dynamically quantised model. Defaults to None.
+        optimize (bool or list, optional): CPU fast paths for each worker's pytorch model (see create_analyser).
+
+    Returns:
+        ProcessPoolExecutor: The process pool.
+
+    Example:
+        >>> with create_anonymiser_pool(n_workers=8, share_model_weights=True) as pool:
+        ...     df = anonymise_df(df, column="text", executor=pool)
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // n_workers)
+
+    # Export or quantise in this process first, so that workers load the cached model rather than racing to create it
+    if backend == "onnx" and quantize == "int8":
+        quantize_onnx_int8(model_path)
+    elif backend == "onnx":
+        export_onnx(model_path)
+    elif quantize == "int8" and not share_model_weights:
+        load_quantized_model(model_path)
+
+    shared_model = None
+    if share_model_weights and backend == "pytorch":
+        shared_model = load_shared_model(model_path, quantize=quantize)
+        if mp_context is None:
+            start_methods = torch.multiprocessing.get_all_start_methods()
+            mp_context = torch.multiprocessing.get_context(
+                "fork" if "fork" in start_methods else "spawn"
+            )
+
+    return ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=mp_context,
+        initializer=_init_worker,
+        initargs=(
+            model_path,
+            spacy_model,
+            language,
+            regex_entities,
+            torch_threads,
+            shared_model,
+            backend,
+            quantize,
+            optimize,
+        ),
+    )
+
+
+def anonymise_parallel(
+    texts: Sequence[str],
+    n_workers: int | None = None,
+    executor: Executor | None = None,
+    shard_size: int | None = None,
+    model_path: str = DEFAULT_NER_MODEL,
+    spacy_model: str | None = DEFAULT_SPACY_MODEL,
+    language: str = "en",
+    regex_entities: Sequence[str | PteredactylRecogniser] = DEFAULT_REGEX_ENTITIES,
+    share_model_weights: bool = False,
+    desc: str | None = None,
+    **kwargs,
+) -> list[str]:
+    """
+    Anonymises texts across a pool of worker processes, returning the anonymised texts in input order.
+    The texts are split into shards of consecutive rows, each worker anonymises whole shards with anonymise_batch,
+    and progress is reported across all workers as shards complete.
+
+    Args:
+        texts (Sequence[str]): The texts to be anonymised.
+        n_workers (int, optional): Number of worker processes, if executor is not provided. Defaults to the number of CPUs.
+        executor (Executor, optional): A pool created by create_anonymiser_pool, to reuse workers and their analysers across calls.
+        shard_size (int, optional): Number of texts per shard. Defaults to splitting the texts into four shards per worker.
+        model_path (str): The path to the model used by each worker. Used only if executor not provided.
+        spacy_model (str, optional): The spaCy model used by each worker. Used only if executor not provided.
+        language (str): The language of the texts. Defaults to "en".
+        regex_entities (list, optional): Regex entities or PteredactylRecognisers to analyse.
+        share_model_weights (bool): If True, workers share one copy of the model weights. Used only if executor not provided.
+        desc (str, optional): Description for the progress bar.
+        **kwargs: Additional keyword arguments for anonymise_batch (e.g. entities, highlight, batch_size).
+
+    Returns:
+        list[str]: The anonymised texts.
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+
+    own_executor = executor is None
+    if own_executor:
+        executor = create_anonymiser_pool(
+            n_workers=n_workers,
+            model_path=model_path,
+            spacy_model=spacy_model,
+            language=language,
+            regex_entities=regex_entities,
+            share_model_weights=share_model_weights,
+        )
+
+    n_workers = getattr(executor, "_max_workers", n_workers) or 1
+    shard_size = shard_size or max(1, math.ceil(len(texts) / (n_workers * 4)))
+
+    anonymise_kwargs = {"language": language, "regex_entities": regex_entities}
+    anonymise_kwargs.update(kwargs)
+
+    anonymised_shards = {}
+    try:
+        futures = [
+            executor.submit(
+                _anonymise_shard,
+                shard_index,
+                texts[start : start + shard_size],
+                anonymise_kwargs,
+            )
+            for shard_index, start in enumerate(range(0, len(texts), shard_size))
+        ]
+
+        with tqdm(total=len(texts), desc=desc) as progress_bar:
+            for future in as_completed(futures):
+                shard_index, anonymised_texts = future.result()
+                anonymised_shards[shard_index] = anonymised_texts
+                progress_bar.update(len(anonymised_texts))
+    finally:
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
+
+    return [
+        anonymised_text
+        for shard_index in range(len(anonymised_shards))
+        for anonymised_text in anonymised_shards[shard_index]
+    ]
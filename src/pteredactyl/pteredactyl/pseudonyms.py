@@ -0,0 +1,350 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping, Sequence
+from pathlib import Path
+from typing import Any
+
+from pteredactyl.renderer import PLACEHOLDER_LABELS
+from pteredactyl.surrogates import SurrogatePool, sample_surrogates
+
+# SQLite limits the number of parameters in a query, so bulk lookups are made this many keys at a time
+MAX_KEYS_PER_QUERY = 500
+
+# Times surrogates already taken are drawn again, before falling back to numbered placeholders
+MAX_SURROGATE_DRAWS = 8
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value BLOB NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS pseudonyms (key BLOB PRIMARY KEY, surrogate TEXT NOT NULL) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS counters (entity_type TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS used_surrogates (entity_type TEXT NOT NULL, surrogate TEXT NOT NULL, "
+    "PRIMARY KEY (entity_type, surrogate)) WITHOUT ROWID",
+)
+
+
+def normalise_original(original: str) -> str:
+    """
+    Normalises an original value, so that differences in case and whitespace do not give different pseudonyms.
+
+    Args:
+        original (str): The original text of an entity, e.g. "Jane  SMITH".
+
+    Returns:
+        str: The normalised text, e.g. "jane smith".
+    """
+    return " ".join(original.split()).casefold()
+
+
+class PseudonymStore:
+    """
+    A persistent, SQLite-backed map from (entity type, normalised original) to a surrogate, so that the same person,
+    place or identifier gets the same pseudonym across texts, rows, worker processes and runs.
+
+    Originals are not stored: each is keyed by a keyed BLAKE2b hash, with a random key created with the store. New
+    originals get a surrogate drawn at random from surrogates[entity_type] (a list, a SurrogatePool or the path of a
+    pool file), or a numbered placeholder such as <PERSON_17> if there are no surrogates for the entity type. Different
+    originals of an entity type always get different pseudonyms: surrogates already taken are drawn again, up to
+    MAX_SURROGATE_DRAWS times, then drawn from those left in a list. Once the surrogates run out (or, for a pool, are
+    still taken after every draw), new originals get numbered placeholders instead.
+
+    Lookups are made in bulk: all the originals in a batch are looked up in one query per MAX_KEYS_PER_QUERY keys,
+    and new pseudonyms are added in one transaction. Pseudonyms are then kept in an in-memory LRU cache, which is always
+    valid as pseudonyms never change. The database is opened in WAL mode, so several processes can share it. A store
+    passed to worker processes (e.g. in operators) reopens the database in each worker.
+
+    Args:
+        path (str | Path): The SQLite database file. Created if it does not exist.
+        surrogates (Mapping, optional): Surrogate values for each entity type.
+        cache_size (int): Maximum number of pseudonyms kept in memory. Defaults to 1,000,000.
+        timeout (float): Seconds to wait for another process's write to finish. Defaults to 60.
+
+    Example:
+        >>> store = PseudonymStore("pseudonyms.db", surrogates={"PERSON": ["Alice Jones", "Bob Smith"]})
+        >>> store.lookup("PERSON", ["Jane Smith", "jane  smith", "John Doe", "Ann Lee"])
+        ['Bob Smith', 'Bob Smith', 'Alice Jones', '<PERSON_1>']
+        >>> store.lookup("LOCATION", ["Southampton", "Winchester"])
+        ['<LOCATION_1>', '<LOCATION_2>']
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        surrogates: Mapping[str, Any] | None = None,
+        cache_size: int = 1_000_000,
+        timeout: float = 60.0,
+    ):
+        self.path = Path(path)
+        self.surrogates = dict(surrogates or {})
+        self.cache_size = cache_size
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[bytes, str] = OrderedDict()
+        self._connection: sqlite3.Connection | None = None
+        self._pid: int | None = None
+        self._key: bytes | None = None
+        self.hits = 0
+        self.misses = 0
+
+        # Create the database (and its key) now, rather than on first lookup
+        with self._lock:
+            self._connect()
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {
+            "path": self.path,
+            "surrogates": self.surrogates,
+            "cache_size": self.cache_size,
+            "timeout": self.timeout,
+        }
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(**state)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return (
+                self._connect().execute("SELECT COUNT(*) FROM pseudonyms").fetchone()[0]
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Returns this process's connection, opening it if needed. Called with the lock held."""
+        if self._connection is not None and self._pid == os.getpid():
+            return self._connection
+
+        # A connection inherited from a parent process must not be used, so each process opens its own
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        # Processes opening a new store at the same time must agree on its key
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in _SCHEMA:
+                connection.execute(statement)
+            connection.execute(
+                "INSERT OR IGNORE INTO metadata VALUES ('key', ?)", (os.urandom(32),)
+            )
+            row = connection.execute(
+                "SELECT value FROM metadata WHERE name = 'key'"
+            ).fetchone()
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            connection.close()
+            raise
+
+        self._connection, self._pid, self._key = connection, os.getpid(), row[0]
+        self._cache.clear()
+        return connection
+
+    def close(self) -> None:
+        """Closes the database connection. It is reopened if the store is used again."""
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+    def _hash(self, entity_type: str, original: str) -> bytes:
+        return hashlib.blake2b(
+            f"{entity_type}\0{normalise_original(original)}".encode(),
+            key=self._key,
+            digest_size=16,
+        ).digest()
+
+    def _select(
+        self, connection: sqlite3.Connection, keys: Sequence[bytes]
+    ) -> dict[bytes, str]:
+        found = {}
+        for start in range(0, len(keys), MAX_KEYS_PER_QUERY):
+            chunk = keys[start : start + MAX_KEYS_PER_QUERY]
+            found.update(
+                connection.execute(
+                    f"SELECT key, surrogate FROM pseudonyms WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+            )
+        return found
+
+    @staticmethod
+    def _select_used(
+        connection: sqlite3.Connection, entity_type: str, surrogates: Sequence[str]
+    ) -> set[str]:
+        used = set()
+        for start in range(0, len(surrogates), MAX_KEYS_PER_QUERY):
+            chunk = surrogates[start : start + MAX_KEYS_PER_QUERY]
+            used.update(
+                surrogate
+                for (surrogate,) in connection.execute(
+                    "SELECT surrogate FROM used_surrogates WHERE entity_type = ? "
+                    f"AND surrogate IN ({','.join('?' * len(chunk))})",
+                    (entity_type, *chunk),
+                )
+            )
+        return used
+
+    @staticmethod
+    def _number(
+        connection: sqlite3.Connection, entity_type: str, count: int
+    ) -> list[str]:
+        """Numbered placeholders for count new originals of an entity type, e.g. <PERSON_17>."""
+        row = connection.execute(
+            "SELECT value FROM counters WHERE entity_type = ?", (entity_type,)
+        ).fetchone()
+        first = row[0] if row else 1
+        connection.execute(
+            "INSERT OR REPLACE INTO counters VALUES (?, ?)",
+            (entity_type, first + count),
+        )
+        label = PLACEHOLDER_LABELS.get(entity_type, entity_type)
+        return [f"<{label}_{number}>" for number in range(first, first + count)]
+
+    def _draw(
+        self, connection: sqlite3.Connection, entity_type: str, count: int
+    ) -> list[str]:
+        """Draws count surrogates of an entity type that no other original has, in one query per draw."""
+        values = self.surrogates[entity_type]
+        drawn: list[str | None] = [None] * count
+        remaining = list(range(count))
+        taken: set[str] = set()
+        for _ in range(MAX_SURROGATE_DRAWS):
+            candidates = sample_surrogates(values, len(remaining))
+            taken.update(self._select_used(connection, entity_type, candidates))
+            still_remaining = []
+            for position, candidate in zip(remaining, candidates):
+                if candidate in taken:
+                    still_remaining.append(position)
+                else:
+                    drawn[position] = candidate
+                    taken.add(candidate)
+            remaining = still_remaining
+            if not remaining:
+                break
+
+        if remaining and not isinstance(values, (str, os.PathLike, SurrogatePool)):
+            # Few surrogates in the list are left, so draw the rest from those no original has yet
+            used = taken | self._select_used(connection, entity_type, list(values))
+            unused = [value for value in dict.fromkeys(values) if value not in used]
+            for position, surrogate in zip(
+                remaining,
+                sample_surrogates(
+                    unused, min(len(remaining), len(unused)), replace=False
+                ),
+            ):
+                drawn[position] = surrogate
+            remaining = remaining[len(unused) :]
+
+        # The surrogates have run out, so the rest are numbered
+        for position, surrogate in zip(
+            remaining, self._number(connection, entity_type, len(remaining))
+        ):
+            drawn[position] = surrogate
+        return drawn
+
+    def _create(
+        self, connection: sqlite3.Connection, new_keys: dict[bytes, str]
+    ) -> dict[bytes, str]:
+        """Assigns surrogates to new keys (mapped to their entity types). Called in a write transaction."""
+        keys_by_type: dict[str, list[bytes]] = {}
+        for key, entity_type in new_keys.items():
+            keys_by_type.setdefault(entity_type, []).append(key)
+
+        created = {}
+        for entity_type, keys in keys_by_type.items():
+            if entity_type in self.surrogates:
+                surrogates = self._draw(connection, entity_type, len(keys))
+                connection.executemany(
+                    "INSERT INTO used_surrogates VALUES (?, ?)",
+                    [(entity_type, surrogate) for surrogate in surrogates],
+                )
+            else:
+                surrogates = self._number(connection, entity_type, len(keys))
+            created.update(zip(keys, surrogates))
+
+        connection.executemany(
+            "INSERT INTO pseudonyms VALUES (?, ?)", list(created.items())
+        )
+        return created
+
+    def lookup_many(self, entities: Iterable[tuple[str, str]]) -> list[str]:
+        """
+        Returns the pseudonym of each (entity type, original) pair, creating pseudonyms for new originals.
+
+        Args:
+            entities (Iterable[tuple[str, str]]): The entity type and original text of each entity.
+
+        Returns:
+            list[str]: The pseudonym of each entity.
+        """
+        with self._lock:
+            connection = self._connect()
+            entity_types: dict[bytes, str] = {}
+            keys = []
+            for entity_type, original in entities:
+                key = self._hash(entity_type, original)
+                keys.append(key)
+                entity_types[key] = entity_type
+
+            found: dict[bytes, str] = {}
+            missing = []
+            for key in dict.fromkeys(keys):
+                surrogate = self._cache.get(key)
+                if surrogate is None:
+                    missing.append(key)
+                else:
+                    self._cache.move_to_end(key)
+                    found[key] = surrogate
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+            if missing:
+                found_in_store = self._select(connection, missing)
+                new_keys = [key for key in missing if key not in found_in_store]
+                if new_keys:
+                    # Check again inside the write transaction, in case another process has just added them
+                    connection.execute("BEGIN IMMEDIATE")
+                    try:
+                        found_in_store.update(self._select(connection, new_keys))
+                        found_in_store.update(
+                            self._create(
+                                connection,
+                                {
+                                    key: entity_types[key]
+                                    for key in new_keys
+                                    if key not in found_in_store
+                                },
+                            )
+                        )
+                        connection.execute("COMMIT")
+                    except BaseException:
+                        connection.execute("ROLLBACK")
+                        raise
+
+                found.update(found_in_store)
+                # Cached in the order requested, so the most recently requested are evicted last
+                self._cache.update((key, found_in_store[key]) for key in missing)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+            return [found[key] for key in keys]
+
+    def lookup(self, entity_type: str, originals: Sequence[str]) -> list[str]:
+        """
+        Returns the pseudonym of each original of one entity type, creating pseudonyms for new originals.
+
+        Args:
+            entity_type (str): The entity type, e.g. "PERSON".
+            originals (Sequence[str]): The original texts.
+
+        Returns:
+            list[str]: The pseudonym of each original.
+        """
+        return self.lookup_many((entity_type, original) for original in originals)
@@ -0,0 +1,804 @@
+import hashlib
+import inspect
+import logging
+import os
+import re
+import tempfile
+import warnings
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Optional
+
+import torch
+
+logger = logging.getLogger("presidio-analyzer")
+
+# Inference backends supported by TransformersRecogniser
+BACKENDS = ("pytorch", "onnx")
+
+# Quantisation modes supported by TransformersRecogniser
+QUANTIZE_MODES = ("int8",)
+
+# CPU fast paths that can be enabled with TransformersRecogniser(optimize=...)
+OPTIMIZATIONS = ("inference_mode", "sdpa", "bf16", "compile", "bucketing")
+
+# Enabled by optimize=True. bf16 is opt-in, as it changes outputs and is only faster on CPUs with native bf16 support
+DEFAULT_OPTIMIZATIONS = ("inference_mode", "sdpa", "compile", "bucketing")
+
+# Sequence lengths inputs are padded up to when bucketing, so compiled graphs are reused rather than recompiled
+SEQUENCE_BUCKETS = (32, 64, 128, 256, 512)
+
+# Sample texts used to compare a quantised model's predictions with the full precision model's
+ACCURACY_CHECK_TEXTS = [
+    "The patient's name is Steven Johnson and he was seen at Southampton General Hospital on 12/03/2021.",
+    "Mrs Jane Smith, aged 67, lives at 10 Downing Street, London SW1A 2AA. Tel: 07700 900123.",
+    "Dr Patel reviewed Mr O'Brien in clinic today. NHS Number 943 476 5919.",
+    "Discharged home to Winchester with follow up by her GP, Dr Emily Clarke, in two weeks.",
+    "He works as a teacher at St Mary's School and was referred by Queen Alexandra Hospital, Portsmouth.",
+]
+
+ONNX_OPSET_VERSION = 17
+
+# Longest sequence bucket, used when neither the tokenizer nor the model defines a maximum length
+MAX_BUCKET_LENGTH = 512
+
+try:
+    from transformers import (
+        AutoConfig,
+        AutoModelForTokenClassification,
+        AutoTokenizer,
+        PreTrainedModel,
+        TokenClassificationPipeline,
+        pipeline,
+    )
+
+except ImportError:
+    logger.error("transformers is not installed")
+
+
+def _warn_if_no_cuda() -> None:
+    """Warns that the model will run on CPU, if CUDA is not available.
+    Called when a PyTorch model is loaded, rather than when pteredactyl is imported."""
+    if not torch.cuda.is_available():
+        warnings.warn(
+            """
+CUDA is not installed, so pteredactyl will use CPU rather than GPU.
+    -> You can install CUDA 12.1 by running: pip3 install torch torchvision torchaudio --index-url https://download.pytorch.org/whl/cu121 --upgrade
+    -> Alternatively to select a compatible version visit: https://pytorch.org/get-started/locally/ and generate a pip3 installation command"""
+        )
+
+
+def get_cache_dir() -> Path:
+    """Returns the directory where exported models are cached.
+    Set by the PTEREDACTYL_CACHE_DIR environment variable, defaulting to ~/.cache/pteredactyl
+
+    :return: The cache directory
+    :rtype: Path
+    """
+    return Path(
+        os.environ.get("PTEREDACTYL_CACHE_DIR", Path.home() / ".cache" / "pteredactyl")
+    )
+
+
+# Files whose contents or modification times identify the version of a model
+MODEL_VERSION_FILES = ("config.json",)
+MODEL_WEIGHTS_PATTERNS = ("*.safetensors", "*.bin", "*.pt")
+
+
+def _model_version(model_path: str) -> bytes:
+    """Identifies the version of a model, so that cached exports of an older version are not reused.
+    For a local directory, this is the contents of its config and the sizes and modification times of its weights.
+    For a HuggingFace model, it is the revision and config in the local HuggingFace cache, if it has been downloaded.
+    """
+    model_dir = Path(model_path)
+    if model_dir.is_dir():
+        version = [
+            (model_dir / name).read_bytes()
+            for name in MODEL_VERSION_FILES
+            if (model_dir / name).is_file()
+        ]
+        for weights_path in sorted(
+            path
+            for pattern in MODEL_WEIGHTS_PATTERNS
+            for path in model_dir.glob(pattern)
+        ):
+            stat = weights_path.stat()
+            version.append(
+                f"{weights_path.name}:{stat.st_size}:{stat.st_mtime_ns}".encode()
+            )
+        return b"\0".join(version)
+
+    try:
+        from huggingface_hub import try_to_load_from_cache
+
+        config_path = try_to_load_from_cache(model_path, "config.json")
+    except (ImportError, ValueError):
+        # Not a valid HuggingFace model name
+        config_path = None
+    if not isinstance(config_path, str):
+        return b""
+    # Cached files are stored under snapshots/<revision>/
+    config_path = Path(config_path)
+    return config_path.parent.name.encode() + b"\0" + config_path.read_bytes()
+
+
+def _cache_key(model_path: str) -> str:
+    """Turns a HuggingFace model name or local path into a directory name, unique to the model and its version"""
+    name = re.sub(r"[^\w.-]+", "--", model_path).strip("-")
+    # Different paths can give the same name (e.g. "a/b" and "a--b"), so the digest is of the path itself
+    digest = hashlib.blake2b(
+        model_path.encode() + b"\0" + _model_version(model_path), digest_size=8
+    ).hexdigest()
+    return f"{name}-{digest}"
+
+
+def _import_onnxruntime():
+    try:
+        import onnxruntime
+    except ImportError as e:
+        raise ImportError(
+            "The onnx backend requires onnxruntime and onnx. Install them with: pip install pteredactyl[onnx]"
+        ) from e
+    return onnxruntime
+
+
+def export_onnx(
+    model_path: str,
+    model: Optional["PreTrainedModel"] = None,
+    cache_dir: Optional[Path] = None,
+) -> Path:
+    """Exports a token classification model to ONNX, once, and caches the exported file.
+    Later calls for the same model_path return the cached file without loading the model.
+
+    :param model_path: HuggingFace model name or local path of the model
+    :type model_path: str
+    :param model: Preloaded model to export, defaults to None (loaded from model_path)
+    :type model: Optional[PreTrainedModel], optional
+    :param cache_dir: Directory to cache the exported model in, defaults to get_cache_dir()
+    :type cache_dir: Optional[Path], optional
+    :return: Path to the exported model
+    :rtype: Path
+    """
+    onnx_dir = (cache_dir or get_cache_dir()) / "onnx" / _cache_key(model_path)
+    onnx_path = onnx_dir / "model.onnx"
+    if onnx_path.exists():
+        return onnx_path
+
+    logger.info(f"Exporting {model_path} to ONNX at {onnx_path}")
+    if model is None:
+        model = AutoModelForTokenClassification.from_pretrained(model_path)
+    model.eval()
+
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    dummy_inputs = tokenizer(
+        ["Exporting the model", "to ONNX"], padding=True, return_tensors="pt"
+    )
+
+    # ONNX inputs are positional, so they must follow the order of the model's forward() arguments
+    input_names = [
+        name
+        for name in inspect.signature(model.forward).parameters
+        if name in dummy_inputs
+    ]
+    dynamic_axes = {
+        name: {0: "batch", 1: "sequence"} for name in input_names + ["logits"]
+    }
+
+    onnx_dir.mkdir(parents=True, exist_ok=True)
+
+    # Export to a temporary file and rename it, so that concurrent processes never load a partial export
+    with tempfile.TemporaryDirectory(dir=onnx_dir) as tmp_dir:
+        tmp_path = Path(tmp_dir) / "model.onnx"
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                (),
+                str(tmp_path),
+                kwargs={name: dummy_inputs[name] for name in input_names},
+                input_names=input_names,
+                output_names=["logits"],
+                dynamic_axes=dynamic_axes,
+                opset_version=ONNX_OPSET_VERSION,
+                dynamo=False,
+            )
+        os.replace(tmp_path, onnx_path)
+
+    return onnx_path
+
+
+def create_onnx_session(onnx_path: Path, num_threads: Optional[int] = None) -> Any:
+    """Creates an onnxruntime inference session tuned for token classification on CPU:
+    all graph optimisations (e.g. attention and layer norm fusion), sequential execution,
+    and intra-op parallelism matched to the torch thread count, so worker processes set up
+    by pteredactyl.parallel do not oversubscribe the CPU.
+
+    :param onnx_path: Path to the exported model
+    :type onnx_path: Path
+    :param num_threads: Number of intra-op threads, defaults to torch.get_num_threads()
+    :type num_threads: Optional[int], optional
+    :return: The inference session
+    :rtype: onnxruntime.InferenceSession
+    """
+    onnxruntime = _import_onnxruntime()
+
+    session_options = onnxruntime.SessionOptions()
+    session_options.graph_optimization_level = (
+        onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    )
+    session_options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+    session_options.intra_op_num_threads = num_threads or torch.get_num_threads()
+    session_options.inter_op_num_threads = 1
+
+    providers = [
+        provider
+        for provider in ("CUDAExecutionProvider", "CPUExecutionProvider")
+        if provider in onnxruntime.get_available_providers()
+    ]
+
+    return onnxruntime.InferenceSession(
+        str(onnx_path), sess_options=session_options, providers=providers
+    )
+
+
+class OnnxTokenClassificationPipeline(TokenClassificationPipeline):
+    """
+    A TokenClassificationPipeline whose forward pass runs through an onnxruntime session.
+    Tokenisation, batching and entity aggregation are inherited unchanged, so predictions
+    have the same format as the PyTorch pipeline's.
+    The pipeline's model only provides the configuration (e.g. id2label), and can be an empty
+    model on the meta device.
+
+    :param session: The onnxruntime inference session
+    :type session: onnxruntime.InferenceSession
+    :param onnx_path: Path to the exported model the session was created from, defaults to None
+    :type onnx_path: Optional[Path], optional
+    """
+
+    def __init__(self, *args, session: Any, onnx_path: Optional[Path] = None, **kwargs):
+        self.session = session
+        self.onnx_path = onnx_path
+        self.session_input_names = [node.name for node in session.get_inputs()]
+        super().__init__(*args, **kwargs)
+
+        # The pipeline takes its device from the (meta) model, but tokenised inputs
+        # must stay on the CPU, where onnxruntime reads them
+        self.device = torch.device("cpu")
+
+    def _forward(self, model_inputs: dict[str, Any]) -> dict[str, Any]:
+        special_tokens_mask = model_inputs.pop("special_tokens_mask")
+        offset_mapping = model_inputs.pop("offset_mapping", None)
+        sentence = model_inputs.pop("sentence")
+        is_last = model_inputs.pop("is_last")
+
+        logits = self.session.run(
+            ["logits"],
+            {
+                name: model_inputs[name].cpu().numpy()
+                for name in self.session_input_names
+            },
+        )[0]
+
+        return {
+            "logits": torch.from_numpy(logits),
+            "special_tokens_mask": special_tokens_mask,
+            "offset_mapping": offset_mapping,
+            "sentence": sentence,
+            "is_last": is_last,
+            **model_inputs,
+        }
+
+
+def load_onnx_pipeline(
+    model_path: str,
+    model: Optional["PreTrainedModel"] = None,
+    quantize: Optional[str] = None,
+    **pipeline_kwargs,
+) -> OnnxTokenClassificationPipeline:
+    """Builds a token classification pipeline backed by onnxruntime, exporting the model first if it is not cached.
+
+    :param model_path: HuggingFace model name or local path of the model
+    :type model_path: str
+    :param model: Preloaded model, used only if the model has not been exported yet, defaults to None
+    :type model: Optional[PreTrainedModel], optional
+    :param quantize: "int8" to run a dynamically quantised copy of the exported model, defaults to None
+    :type quantize: Optional[str], optional
+    :param pipeline_kwargs: Additional arguments for the pipeline (e.g. aggregation_strategy, ignore_labels)
+    :return: The pipeline
+    :rtype: OnnxTokenClassificationPipeline
+    """
+    if quantize == "int8":
+        onnx_path = quantize_onnx_int8(model_path, model=model)
+    else:
+        onnx_path = export_onnx(model_path, model=model)
+    session = create_onnx_session(onnx_path)
+
+    # The weights live in the ONNX session, so the pipeline only needs an empty model for its configuration
+    config = AutoConfig.from_pretrained(model_path)
+    with torch.device("meta"):
+        config_model = AutoModelForTokenClassification.from_config(config)
+
+    return OnnxTokenClassificationPipeline(
+        model=config_model,
+        tokenizer=AutoTokenizer.from_pretrained(model_path),
+        session=session,
+        onnx_path=onnx_path,
+        framework="pt",
+        device=-1,
+        **pipeline_kwargs,
+    )
+
+
+def quantize_dynamic_int8(model: "PreTrainedModel") -> "PreTrainedModel":
+    """Applies dynamic int8 quantisation to a model's linear layers.
+    Weights are stored as int8 and activations are quantised on the fly, which makes the
+    matrix multiplications that dominate transformer inference on CPU faster and the weights ~4x smaller.
+
+    :param model: The full precision model
+    :type model: PreTrainedModel
+    :return: A quantised copy of the model, in eval mode
+    :rtype: PreTrainedModel
+    """
+    return torch.ao.quantization.quantize_dynamic(
+        model.eval(), {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def _is_quantized(model: "PreTrainedModel") -> bool:
+    """Whether a model's linear layers have been dynamically quantised"""
+    return any(
+        isinstance(module, torch.ao.nn.quantized.dynamic.Linear)
+        for module in model.modules()
+    )
+
+
+def load_quantized_model(
+    model_path: str,
+    model: Optional["PreTrainedModel"] = None,
+    cache_dir: Optional[Path] = None,
+) -> "PreTrainedModel":
+    """Loads a dynamically int8 quantised token classification model.
+    The quantised weights are cached on disk the first time, so later loads skip the full precision checkpoint.
+
+    :param model_path: HuggingFace model name or local path of the model
+    :type model_path: str
+    :param model: Preloaded full precision model, used only if the quantised weights are not cached yet, defaults to None
+    :type model: Optional[PreTrainedModel], optional
+    :param cache_dir: Directory to cache the quantised weights in, defaults to get_cache_dir()
+    :type cache_dir: Optional[Path], optional
+    :return: The quantised model
+    :rtype: PreTrainedModel
+    """
+    quantized_dir = (cache_dir or get_cache_dir()) / "int8" / _cache_key(model_path)
+    quantized_path = quantized_dir / "model.pt"
+
+    if quantized_path.exists():
+        config = AutoConfig.from_pretrained(model_path)
+        quantized_model = quantize_dynamic_int8(
+            AutoModelForTokenClassification.from_config(config)
+        )
+        quantized_model.load_state_dict(torch.load(quantized_path, weights_only=True))
+        return quantized_model
+
+    logger.info(f"Quantising {model_path} to int8 at {quantized_path}")
+    if model is None:
+        model = AutoModelForTokenClassification.from_pretrained(model_path)
+    quantized_model = quantize_dynamic_int8(model)
+
+    quantized_dir.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=quantized_dir) as tmp_dir:
+        tmp_path = Path(tmp_dir) / "model.pt"
+        torch.save(quantized_model.state_dict(), tmp_path)
+        os.replace(tmp_path, quantized_path)
+
+    return quantized_model
+
+
+def quantize_onnx_int8(
+    model_path: str,
+    model: Optional["PreTrainedModel"] = None,
+    cache_dir: Optional[Path] = None,
+) -> Path:
+    """Dynamically quantises the exported ONNX model's weights to int8, once, and caches the quantised file.
+
+    :param model_path: HuggingFace model name or local path of the model
+    :type model_path: str
+    :param model: Preloaded model, used only if the model has not been exported yet, defaults to None
+    :type model: Optional[PreTrainedModel], optional
+    :param cache_dir: Directory the exported models are cached in, defaults to get_cache_dir()
+    :type cache_dir: Optional[Path], optional
+    :return: Path to the quantised model
+    :rtype: Path
+    """
+    onnx_path = export_onnx(model_path, model=model, cache_dir=cache_dir)
+    quantized_path = onnx_path.with_name("model.int8.onnx")
+    if quantized_path.exists():
+        return quantized_path
+
+    _import_onnxruntime()
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    logger.info(f"Quantising {onnx_path} to int8 at {quantized_path}")
+    with tempfile.TemporaryDirectory(dir=onnx_path.parent) as tmp_dir:
+        tmp_path = Path(tmp_dir) / "model.int8.onnx"
+        quantize_dynamic(onnx_path, tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, quantized_path)
+
+    return quantized_path
+
+
+def resolve_optimizations(
+    optimize: bool | str | Sequence[str] | None,
+) -> tuple[str, ...]:
+    """Turns the optimize option into the tuple of optimisations to enable.
+
+    :param optimize: True for DEFAULT_OPTIMIZATIONS, False or None for none,
+    or the name(s) of optimisations from OPTIMIZATIONS
+    :type optimize: bool | str | Sequence[str] | None
+    :return: The optimisations, in the order of OPTIMIZATIONS
+    :rtype: tuple[str, ...]
+    """
+    if not optimize:
+        return ()
+    if optimize is True:
+        return DEFAULT_OPTIMIZATIONS
+
+    optimize = [optimize] if isinstance(optimize, str) else list(optimize)
+    unknown = [name for name in optimize if name not in OPTIMIZATIONS]
+    if unknown:
+        raise ValueError(
+            f"Unsupported optimizations {unknown}. Choose from {list(OPTIMIZATIONS)}"
+        )
+    return tuple(name for name in OPTIMIZATIONS if name in optimize)
+
+
+def _raise_recompile_limit(n_shapes: int) -> None:
+    """Lets torch.compile keep a graph for each of n_shapes static input shapes, rather than falling back to eager
+    execution once it reaches its recompile limit (8 by default)."""
+    import torch._dynamo
+
+    dynamo_config = torch._dynamo.config
+    # Renamed from cache_size_limit in recent versions of torch
+    name = (
+        "recompile_limit"
+        if hasattr(dynamo_config, "recompile_limit")
+        else "cache_size_limit"
+    )
+    setattr(dynamo_config, name, max(getattr(dynamo_config, name), n_shapes))
+
+
+class OptimizedTokenClassificationPipeline(TokenClassificationPipeline):
+    """
+    A TokenClassificationPipeline with optional CPU fast paths for the forward pass:
+    inference_mode instead of no_grad, a torch.compile'd model, and padding of each batch up to
+    a small set of sequence lengths and batch sizes (bucketing), so that compiled graphs and
+    oneDNN kernels are reused rather than rebuilt for every new input shape.
+    Padding is removed from the logits before post-processing, so predictions are unchanged.
+
+    :param optimizations: The optimisations to enable, from OPTIMIZATIONS
+    :type optimizations: Sequence[str]
+    :param sequence_buckets: Sequence lengths to pad inputs up to, defaults to SEQUENCE_BUCKETS
+    :type sequence_buckets: Sequence[int], optional
+    """
+
+    def __init__(
+        self,
+        *args,
+        optimizations: Sequence[str] = DEFAULT_OPTIMIZATIONS,
+        sequence_buckets: Sequence[int] = SEQUENCE_BUCKETS,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.optimizations = tuple(optimizations)
+
+        max_length = min(
+            self.tokenizer.model_max_length,
+            getattr(self.model.config, "max_position_embeddings", MAX_BUCKET_LENGTH),
+            MAX_BUCKET_LENGTH,
+        )
+        self.sequence_buckets = tuple(
+            length for length in sorted(sequence_buckets) if length < max_length
+        ) + (max_length,)
+        # Batch sizes inputs are padded up to, set by warm_up
+        self.batch_buckets: tuple[int, ...] = ()
+
+        self.forward_model = (
+            torch.compile(self.model, dynamic=False)
+            if "compile" in self.optimizations
+            else self.model
+        )
+
+    def get_inference_context(self):
+        if "inference_mode" in self.optimizations:
+            return torch.inference_mode
+        return super().get_inference_context()
+
+    def _bucket_shape(self, batch_size: int, sequence_length: int) -> tuple[int, int]:
+        """The padded shape of a batch: the next warmed up batch size (or, beyond those, the next power of two) and
+        the next sequence bucket"""
+        padded_batch_size = next(
+            (size for size in self.batch_buckets if size >= batch_size),
+            1 << (batch_size - 1).bit_length(),
+        )
+        padded_length = next(
+            (length for length in self.sequence_buckets if length >= sequence_length),
+            sequence_length,
+        )
+        return padded_batch_size, padded_length
+
+    def _pad_inputs(
+        self,
+        model_inputs: dict[str, torch.Tensor],
+        batch_size: int,
+        sequence_length: int,
+    ) -> dict[str, torch.Tensor]:
+        """Pads the model inputs (input_ids, attention_mask, ...) to a batch_size x sequence_length shape"""
+        pad_token_id = self.tokenizer.pad_token_id or 0
+        padded_inputs = {}
+        for name, tensor in model_inputs.items():
+            rows, columns = tensor.shape[:2]
+            padded_inputs[name] = torch.nn.functional.pad(
+                tensor,
+                (0, sequence_length - columns, 0, batch_size - rows),
+                value=pad_token_id if name == "input_ids" else 0,
+            )
+        return padded_inputs
+
+    def warm_up(self, batch_sizes: Sequence[int] = (1,)) -> None:
+        """Runs the model once for every sequence bucket and batch size, so that compilation
+        and kernel selection happen at load time rather than on the first requests.
+        Smaller batches are then padded up to the next of these batch sizes, so they reuse a warmed up shape, and
+        torch.compile's recompile limit is raised to cover every warmed up shape.
+
+        :param batch_sizes: Batch sizes that will be used, defaults to (1,)
+        :type batch_sizes: Sequence[int], optional
+        """
+        self.batch_buckets = tuple(sorted(set(batch_sizes)))
+        dummy_inputs = self.tokenizer("warm up", return_tensors="pt")
+        model_inputs = {
+            name: dummy_inputs[name]
+            for name in inspect.signature(self.model.forward).parameters
+            if name in dummy_inputs
+        }
+
+        shapes = {
+            self._bucket_shape(batch_size, length)
+            for batch_size in batch_sizes
+            for length in self.sequence_buckets
+        }
+        if "compile" in self.optimizations:
+            _raise_recompile_limit(len(shapes))
+
+        with self.get_inference_context()():
+            for batch_size, length in sorted(shapes):
+                logger.debug(f"Warming up {batch_size} x {length} inputs")
+                self.forward_model(**self._pad_inputs(model_inputs, batch_size, length))
+
+    def _forward(self, model_inputs: dict[str, Any]) -> dict[str, Any]:
+        special_tokens_mask = model_inputs.pop("special_tokens_mask")
+        offset_mapping = model_inputs.pop("offset_mapping", None)
+        sentence = model_inputs.pop("sentence")
+        is_last = model_inputs.pop("is_last")
+
+        batch_size, sequence_length = model_inputs["input_ids"].shape
+        forward_inputs = model_inputs
+        if "bucketing" in self.optimizations:
+            forward_inputs = self._pad_inputs(
+                model_inputs, *self._bucket_shape(batch_size, sequence_length)
+            )
+
+        output = self.forward_model(**forward_inputs)
+        logits = output["logits"] if isinstance(output, dict) else output[0]
+
+        return {
+            # Remove the bucket padding, and return fp32 logits for post-processing
+            "logits": logits[:batch_size, :sequence_length].float(),
+            "special_tokens_mask": special_tokens_mask,
+            "offset_mapping": offset_mapping,
+            "sentence": sentence,
+            "is_last": is_last,
+            **model_inputs,
+        }
+
+
+def load_pipeline(
+    model_path: str,
+    model: Optional["PreTrainedModel"] = None,
+    backend: str = "pytorch",
+    quantize: Optional[str] = None,
+    optimize: bool | str | Sequence[str] | None = None,
+    warm_up_batch_sizes: Sequence[int] = (1,),
+    **pipeline_kwargs,
+) -> "TokenClassificationPipeline":
+    """Builds a token classification pipeline for a model, with the given backend and quantisation.
+
+    :param model_path: HuggingFace model name or local path of the model
+    :type model_path: str
+    :param model: Preloaded full precision model to build the pipeline around, defaults to None (loaded from model_path)
+    :type model: Optional[PreTrainedModel], optional
+    :param backend: "pytorch" or "onnx", defaults to "pytorch"
+    :type backend: str, optional
+    :param quantize: "int8" for dynamic int8 quantisation, or None for full precision, defaults to None
+    :type quantize: Optional[str], optional
+    :param optimize: CPU fast paths to enable with the pytorch backend (see resolve_optimizations), defaults to None
+    :type optimize: bool | str | Sequence[str] | None, optional
+    :param warm_up_batch_sizes: Batch sizes each sequence bucket is warmed up with, if bucketing, defaults to (1,)
+    :type warm_up_batch_sizes: Sequence[int], optional
+    :param pipeline_kwargs: Additional arguments for the pipeline (e.g. aggregation_strategy, ignore_labels)
+    :return: The pipeline
+    :rtype: TokenClassificationPipeline
+    """
+    optimizations = resolve_optimizations(optimize)
+
+    if backend == "onnx":
+        if optimizations:
+            raise ValueError("optimize is only supported by the pytorch backend")
+        return load_onnx_pipeline(
+            model_path, model=model, quantize=quantize, **pipeline_kwargs
+        )
+
+    if quantize and "bf16" in optimizations:
+        raise ValueError("bf16 cannot be combined with int8 quantisation")
+
+    _warn_if_no_cuda()
+
+    if optimizations:
+        return load_optimized_pipeline(
+            model_path,
+            model=model,
+            quantize=quantize,
+            optimizations=optimizations,
+            warm_up_batch_sizes=warm_up_batch_sizes,
+            **pipeline_kwargs,
+        )
+
+    if quantize == "int8":
+        # A preloaded model may already be quantised, e.g. one shared between worker processes
+        if model is None or not _is_quantized(model):
+            model = load_quantized_model(model_path, model=model)
+        # Dynamically quantised models only run on CPU
+        device = -1
+    else:
+        model = model or AutoModelForTokenClassification.from_pretrained(model_path)
+        device = 0 if torch.cuda.is_available() else -1
+
+    return pipeline(
+        "ner",
+        model=model,
+        tokenizer=AutoTokenizer.from_pretrained(model_path),
+        device=device,
+        framework="pt",
+        **pipeline_kwargs,
+    )
+
+
+def load_optimized_pipeline(
+    model_path: str,
+    model: Optional["PreTrainedModel"] = None,
+    quantize: Optional[str] = None,
+    optimizations: Sequence[str] = DEFAULT_OPTIMIZATIONS,
+    warm_up_batch_sizes: Sequence[int] = (1,),
+    **pipeline_kwargs,
+) -> OptimizedTokenClassificationPipeline:
+    """Builds a token classification pipeline with CPU fast paths, warming up each sequence bucket if bucketing.
+
+    :param model_path: HuggingFace model name or local path of the model
+    :type model_path: str
+    :param model: Preloaded model to build the pipeline around, defaults to None (loaded from model_path)
+    :type model: Optional[PreTrainedModel], optional
+    :param quantize: "int8" for dynamic int8 quantisation, or None for full precision, defaults to None
+    :type quantize: Optional[str], optional
+    :param optimizations: The optimisations to enable, from OPTIMIZATIONS, defaults to DEFAULT_OPTIMIZATIONS
+    :type optimizations: Sequence[str], optional
+    :param warm_up_batch_sizes: Batch sizes each sequence bucket is warmed up with, defaults to (1,)
+    :type warm_up_batch_sizes: Sequence[int], optional
+    :param pipeline_kwargs: Additional arguments for the pipeline (e.g. aggregation_strategy, ignore_labels)
+    :return: The pipeline
+    :rtype: OptimizedTokenClassificationPipeline
+    """
+    if model is not None and "sdpa" in optimizations:
+        logger.warning(
+            "The attention implementation of a preloaded model cannot be changed, so sdpa is not applied"
+        )
+
+    if quantize == "int8":
+        if model is None or not _is_quantized(model):
+            model = load_quantized_model(model_path, model=model)
+    elif model is None:
+        model = AutoModelForTokenClassification.from_pretrained(
+            model_path,
+            **({"attn_implementation": "sdpa"} if "sdpa" in optimizations else {}),
+        )
+    model.eval()
+
+    if "bf16" in optimizations:
+        model = model.to(torch.bfloat16)
+
+    optimized_pipeline = OptimizedTokenClassificationPipeline(
+        model=model,
+        tokenizer=AutoTokenizer.from_pretrained(model_path),
+        optimizations=optimizations,
+        framework="pt",
+        # Dynamically quantised models only run on CPU
+        device=0 if torch.cuda.is_available() and not quantize else -1,
+        **pipeline_kwargs,
+    )
+
+    if "bucketing" in optimizations:
+        optimized_pipeline.warm_up(warm_up_batch_sizes)
+
+    return optimized_pipeline
+
+
+def check_quantization_accuracy(
+    model_path: str,
+    texts: Optional[list[str]] = None,
+    backend: str = "pytorch",
+    quantize: str = "int8",
+    min_f1: float = 0.95,
+    max_delta: float = 0.05,
+) -> dict[str, Any]:
+    """Compares a quantised model's entity predictions with the full precision model's on the same texts.
+    Predicted entities match when their start, end and entity group are identical. The check passes when the F1 is
+    at least min_f1 and no matching entity's score differs by more than max_delta.
+
+    :param model_path: HuggingFace model name or local path of the model
+    :type model_path: str
+    :param texts: Texts to compare predictions on, defaults to ACCURACY_CHECK_TEXTS
+    :type texts: Optional[list[str]], optional
+    :param backend: "pytorch" or "onnx", defaults to "pytorch"
+    :type backend: str, optional
+    :param quantize: The quantisation mode to check, defaults to "int8"
+    :type quantize: str, optional
+    :param min_f1: Lowest F1 of the quantised predictions against the full precision predictions that passes, defaults to 0.95
+    :type min_f1: float, optional
+    :param max_delta: Largest score difference between matching entities that passes, defaults to 0.05
+    :type max_delta: float, optional
+    :return: The number of entities predicted by each model, the precision, recall and F1 of the quantised
+    model's entities against the full precision model's, the largest score difference between matching entities,
+    and whether the check passed
+    :rtype: dict[str, Any]
+
+    :example
+    >report = check_quantization_accuracy("StanfordAIMI/stanford-deidentifier-base")
+    >assert report["passed"], report
+    """
+    texts = list(texts or ACCURACY_CHECK_TEXTS)
+
+    def predict(quantize_mode: Optional[str]) -> dict[tuple, float]:
+        ner_pipeline = load_pipeline(
+            model_path,
+            backend=backend,
+            quantize=quantize_mode,
+            aggregation_strategy="simple",
+        )
+        return {
+            (
+                i,
+                prediction["start"],
+                prediction["end"],
+                prediction["entity_group"],
+            ): float(prediction["score"])
+            for i, predictions in enumerate(ner_pipeline(texts))
+            for prediction in predictions
+        }
+
+    full_precision = predict(None)
+    quantized = predict(quantize)
+
+    matches = full_precision.keys() & quantized.keys()
+    precision = len(matches) / len(quantized) if quantized else 1.0
+    recall = len(matches) / len(full_precision) if full_precision else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    max_score_delta = max(
+        (abs(full_precision[key] - quantized[key]) for key in matches), default=0.0
+    )
+
+    return {
+        "full_precision_entities": len(full_precision),
+        "quantized_entities": len(quantized),
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "max_score_delta": max_score_delta,
+        "passed": f1 >= min_f1 and max_score_delta <= max_delta,
+    }
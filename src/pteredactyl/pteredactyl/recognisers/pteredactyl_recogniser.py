@@ -1,10 +1,14 @@
 import re
-from collections.abc import Callable
+import threading
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
 from typing import Optional
 
 from presidio_analyzer import EntityRecognizer, RecognizerResult
 from presidio_analyzer.nlp_engine import NlpArtifacts
 
+from pteredactyl.recognisers.regex_engine import RegexScanner, compile_prefilter
+
 PTEREDACTYL_RECOGNISER_NAME = "PteredactylRecogniser"
 
 
@@ -19,6 +23,10 @@ class PteredactylRecogniser(EntityRecognizer):
         regex (str): The regular expression pattern used to identify entities.
         check_function (Optional[Callable]): An optional function to further validate matches.
         expected_confidence_level (float): The confidence level assigned to recognized entities.
+        prefilter (Optional[str]): Characters, at least one of which appears in every match (e.g. digits).
+            Texts without any of them are not scanned.
+        batch_check_function (Optional[Callable]): An optional function that validates a list of matches at once,
+            returning a bool for each (e.g. are_nhs_numbers). Used instead of check_function where given.
 
     Example:
         >>> from pteredactyl.support import is_nhs_number
@@ -38,6 +46,8 @@ class PteredactylRecogniser(EntityRecognizer):
         check_function: Optional[Callable] = None,
         supported_entities: Optional[list[str]] = None,
         expected_confidence_level: float = 1.5,
+        prefilter: Optional[str] = None,
+        batch_check_function: Optional[Callable] = None,
     ):
         self.entity_type = entity_type
         self.regex = regex if isinstance(regex, re.Pattern) else re.compile(regex)
@@ -46,6 +56,9 @@ class PteredactylRecogniser(EntityRecognizer):
             supported_entities if supported_entities is not None else [entity_type]
         )
         self.expected_confidence_level = expected_confidence_level
+        self.prefilter = prefilter
+        self.prefilter_regex = compile_prefilter(prefilter)
+        self.batch_check_function = batch_check_function
         super().__init__(supported_entities=self.supported_entities)
 
     def load(self) -> None:
@@ -60,8 +73,19 @@ class PteredactylRecogniser(EntityRecognizer):
         checks them with a custom check function.
         """
         results = []
-        for match in self.regex.finditer(text):
-            if not self.check_function or self.check_function(match.group()):
+        if self.prefilter_regex is not None and not self.prefilter_regex.search(text):
+            return results
+
+        matches = list(self.regex.finditer(text))
+        if self.batch_check_function:
+            valid = self.batch_check_function([match.group() for match in matches])
+        elif self.check_function:
+            valid = [self.check_function(match.group()) for match in matches]
+        else:
+            valid = [True] * len(matches)
+
+        for match, is_valid in zip(matches, valid):
+            if is_valid:
                 result = RecognizerResult(
                     entity_type=self.entity_type,
                     start=match.start(),
@@ -71,3 +95,137 @@ class PteredactylRecogniser(EntityRecognizer):
                 results.append(result)
 
         return results
+
+
+class CombinedPteredactylRecogniser(EntityRecognizer):
+    """
+    Runs several PteredactylRecognisers as one recogniser. Each regex is scanned on its own, so matches are the same
+    as the individual recognisers', including overlapping matches of different entities, but the matches of each
+    recogniser are checked together across a batch of texts (see analyze_batch and prefetch), and regexes whose
+    prefilter characters do not appear in a text are not scanned. Results are attributed to
+    PTEREDACTYL_RECOGNISER_NAME, as for individual PteredactylRecognisers.
+
+    Args:
+        recognisers (list[PteredactylRecogniser]): The recognisers to combine.
+        regex_backend (str): "re" (default), or "regex" to scan with regexes recompiled by the regex package.
+
+    Example:
+        >>> recogniser = CombinedPteredactylRecogniser(build_regex_entity_recogniser_list(["NHS_NUMBER", "POSTCODE"]))
+        >>> analyser.registry.add_recognizer(recogniser)
+    """
+
+    def __init__(
+        self,
+        recognisers: Sequence[PteredactylRecogniser],
+        regex_backend: str = "re",
+    ):
+        self.recognisers = list(recognisers)
+        self.regex_backend = regex_backend
+        self.scanner = RegexScanner(
+            [recogniser.regex for recogniser in self.recognisers],
+            prefilters=[recogniser.prefilter for recogniser in self.recognisers],
+            check_functions=[
+                recogniser.check_function for recogniser in self.recognisers
+            ],
+            backend=regex_backend,
+            batch_check_functions=[
+                getattr(recogniser, "batch_check_function", None)
+                for recogniser in self.recognisers
+            ],
+        )
+        # Matches found ahead of time by prefetch(), per thread
+        self._prefetched = threading.local()
+        self._active_indexes_cache: dict[tuple[str, ...], list[int]] = {}
+        supported_entities = list(
+            dict.fromkeys(
+                entity
+                for recogniser in self.recognisers
+                for entity in recogniser.supported_entities
+            )
+        )
+        super().__init__(
+            supported_entities=supported_entities, name=PTEREDACTYL_RECOGNISER_NAME
+        )
+
+    def load(self) -> None:
+        """No loading is required."""
+        pass
+
+    def analyze(
+        self, text: str, entities: list[str], nlp_artifacts: NlpArtifacts
+    ) -> list[RecognizerResult]:
+        """
+        Scans text for the regexes of the recognisers that support any of the requested entities.
+        """
+        prefetched = getattr(self._prefetched, "matches", {})
+        if text in prefetched and entities == self._prefetched.entities:
+            matches = prefetched[text]
+        else:
+            matches = self.scanner.scan(text, self._active_indexes(entities))
+
+        return self._to_results(matches)
+
+    def analyze_batch(
+        self, texts: Sequence[str], entities: list[str]
+    ) -> list[list[RecognizerResult]]:
+        """
+        Scans several texts, checking the candidate matches of each recogniser across all of them together
+        (so e.g. NHS number checksums are computed with one vectorised call).
+        """
+        return [
+            self._to_results(matches)
+            for matches in self.scanner.scan_batch(
+                texts, self._active_indexes(entities)
+            )
+        ]
+
+    @contextmanager
+    def prefetch(self, texts: Sequence[str], entities: list[str]) -> Iterator[None]:
+        """
+        Scans texts together, and serves analyze() calls for those texts (in the same thread) from the results
+        until the context exits.
+
+        Example:
+            >>> with combined_recogniser.prefetch(texts, entities):
+            ...     results = [analyser.analyze(text, language="en", entities=entities) for text in texts]
+        """
+        matches = self.scanner.scan_batch(texts, self._active_indexes(entities))
+        self._prefetched.matches = dict(zip(texts, matches))
+        self._prefetched.entities = entities
+        try:
+            yield
+        finally:
+            self._prefetched.matches = {}
+            self._prefetched.entities = None
+
+    def _active_indexes(self, entities: list[str]) -> list[int]:
+        """The indexes of the recognisers that support any of the requested entities."""
+        key = tuple(entities) if entities else ()
+        active_indexes = self._active_indexes_cache.get(key)
+        if active_indexes is None:
+            active_indexes = [
+                index
+                for index, recogniser in enumerate(self.recognisers)
+                if not entities
+                or any(entity in entities for entity in recogniser.supported_entities)
+            ]
+            self._active_indexes_cache[key] = active_indexes
+
+        return active_indexes
+
+    def _to_results(
+        self, matches: list[tuple[int, int, int]]
+    ) -> list[RecognizerResult]:
+        results = []
+        for index, start, end in matches:
+            recogniser = self.recognisers[index]
+            results.append(
+                RecognizerResult(
+                    entity_type=recogniser.entity_type,
+                    start=start,
+                    end=end,
+                    score=recogniser.expected_confidence_level,
+                )
+            )
+
+        return results
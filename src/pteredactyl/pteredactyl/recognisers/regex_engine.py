@@ -0,0 +1,199 @@
+import re
+from collections.abc import Callable, Sequence
+from typing import Any, Optional
+
+# Regex backends supported by RegexScanner
+REGEX_BACKENDS = ("re", "regex")
+
+# Characters that prefilter patterns which can only match text containing a digit
+DIGITS = "0123456789"
+
+
+def _import_regex():
+    try:
+        import regex
+    except ImportError as e:
+        raise ImportError(
+            "The regex backend requires the regex package. Install it with: pip install regex"
+        ) from e
+    return regex
+
+
+def compile_prefilter(prefilter: Optional[str]) -> Optional[re.Pattern]:
+    """
+    Compiles a prefilter, a string of characters at least one of which must appear in any text a pattern can match,
+    into a character class.
+
+    :param prefilter: The characters, e.g. "0123456789" for patterns that always match a digit.
+    :return: The compiled character class, or None if there is no prefilter.
+    """
+    if not prefilter:
+        return None
+    return re.compile(
+        "[" + "".join(re.escape(char) for char in sorted(set(prefilter))) + "]"
+    )
+
+
+def _compile_with_regex(pattern: re.Pattern) -> Any:
+    """Recompiles a pattern with the regex package, keeping its flags."""
+    regex = _import_regex()
+    if not isinstance(pattern.pattern, str):
+        return pattern
+    flags = 0
+    for flag in (re.ASCII, re.IGNORECASE, re.MULTILINE, re.DOTALL, re.VERBOSE):
+        if pattern.flags & flag:
+            flags |= getattr(regex, flag.name)
+    return regex.compile(pattern.pattern, flags)
+
+
+class RegexScanner:
+    """
+    Finds the matches of several regular expressions in one or more texts, checking the candidate matches of each
+    pattern together.
+
+    Each pattern is scanned on its own, as each PteredactylRecogniser would scan it, so matches of different patterns
+    can overlap (e.g. a postcode inside an email address) and a match one pattern's check function rejects does not
+    hide matches of the others. Patterns whose prefilter characters do not appear in a text are not scanned for it.
+    The candidate matches of a pattern across all the texts are checked together, so a batch check function is called
+    once per pattern rather than once per match.
+
+    :param patterns: The compiled regular expressions.
+    :param prefilters: For each pattern, optional characters at least one of which appears in every match.
+    :param check_functions: For each pattern, an optional function that takes a matched string and returns whether
+        it is a valid match.
+    :param backend: "re" (default), or "regex" to scan with patterns recompiled by the regex package.
+    :param batch_check_functions: For each pattern, an optional function that takes a list of matched strings and
+        returns whether each is a valid match. Used instead of the pattern's check function, except for single matches.
+    """
+
+    def __init__(
+        self,
+        patterns: Sequence[re.Pattern],
+        prefilters: Optional[Sequence[Optional[str]]] = None,
+        check_functions: Optional[Sequence[Optional[Callable[[str], bool]]]] = None,
+        backend: str = "re",
+        batch_check_functions: Optional[
+            Sequence[Optional[Callable[[list[str]], Sequence[bool]]]]
+        ] = None,
+    ):
+        if backend not in REGEX_BACKENDS:
+            raise ValueError(
+                f"Unsupported regex backend '{backend}'. Choose from {REGEX_BACKENDS}"
+            )
+
+        self.patterns = list(patterns)
+        self.backend = backend
+        self.prefilters = [
+            compile_prefilter(prefilter)
+            for prefilter in (prefilters or [None] * len(self.patterns))
+        ]
+        self.check_functions = list(check_functions or [None] * len(self.patterns))
+        self.batch_check_functions = list(
+            batch_check_functions or [None] * len(self.patterns)
+        )
+        self._has_check = [
+            check_function is not None or batch_check_function is not None
+            for check_function, batch_check_function in zip(
+                self.check_functions, self.batch_check_functions
+            )
+        ]
+        self._scan_patterns = (
+            [_compile_with_regex(pattern) for pattern in self.patterns]
+            if backend == "regex"
+            else self.patterns
+        )
+
+    def _check(self, index: int, matches: list[str]) -> list[bool]:
+        """Checks the matched strings of one pattern, all at once if it has a batch check function."""
+        batch_check_function = self.batch_check_functions[index]
+        check_function = self.check_functions[index]
+        # A single match is checked with the check function, which avoids the batch function's setup cost
+        if batch_check_function is not None and (
+            check_function is None or len(matches) > 1
+        ):
+            return [bool(valid) for valid in batch_check_function(matches)]
+
+        if check_function is None:
+            return [True] * len(matches)
+        return [bool(check_function(match)) for match in matches]
+
+    def _active_indexes(self, text: str, indexes: Sequence[int]) -> list[int]:
+        """Returns the patterns whose prefilters pass for text."""
+        prefilter_results: dict[re.Pattern, bool] = {}
+        active = []
+        for index in indexes:
+            prefilter = self.prefilters[index]
+            if prefilter is not None:
+                if prefilter not in prefilter_results:
+                    prefilter_results[prefilter] = bool(prefilter.search(text))
+                if not prefilter_results[prefilter]:
+                    continue
+            active.append(index)
+
+        return active
+
+    def scan_batch(
+        self, texts: Sequence[str], indexes: Optional[Sequence[int]] = None
+    ) -> list[list[tuple[int, int, int]]]:
+        """
+        Finds the valid matches of the patterns in each of several texts.
+
+        :param texts: The texts to scan.
+        :param indexes: The indexes of the patterns to match. Defaults to all patterns.
+        :return: For each text, (pattern index, start, end) for each match that passes its pattern's check, grouped
+            by pattern in the order of indexes.
+        """
+        indexes = range(len(self.patterns)) if indexes is None else indexes
+
+        # Find the candidate matches of each pattern in every text, without checking them yet
+        candidates = []
+        for text in texts:
+            candidates.append(
+                [
+                    (index, match.start(), match.end())
+                    for index in self._active_indexes(text, indexes)
+                    for match in self._scan_patterns[index].finditer(text)
+                    if match.end() > match.start()
+                ]
+            )
+
+        # Check the candidates of each pattern together
+        candidate_positions: dict[int, list[tuple[int, int]]] = {}
+        for text_number, text_candidates in enumerate(candidates):
+            for candidate_number, (index, _, _) in enumerate(text_candidates):
+                if self._has_check[index]:
+                    candidate_positions.setdefault(index, []).append(
+                        (text_number, candidate_number)
+                    )
+
+        valid = [[True] * len(text_candidates) for text_candidates in candidates]
+        for index, positions in candidate_positions.items():
+            matched_strings = []
+            for text_number, candidate_number in positions:
+                _, start, end = candidates[text_number][candidate_number]
+                matched_strings.append(texts[text_number][start:end])
+            for (text_number, candidate_number), is_valid in zip(
+                positions, self._check(index, matched_strings)
+            ):
+                valid[text_number][candidate_number] = is_valid
+
+        return [
+            [
+                candidate
+                for candidate, is_valid in zip(text_candidates, text_valid)
+                if is_valid
+            ]
+            for text_candidates, text_valid in zip(candidates, valid)
+        ]
+
+    def scan(
+        self, text: str, indexes: Optional[Sequence[int]] = None
+    ) -> list[tuple[int, int, int]]:
+        """
+        Finds the valid matches of the patterns in text.
+
+        :param text: The text to scan.
+        :param indexes: The indexes of the patterns to match. Defaults to all patterns.
+        :return: (pattern index, start, end) for each match that passes its pattern's check.
+        """
+        return self.scan_batch([text], indexes)[0]
@@ -1,22 +1,30 @@
-import copy
+import bisect
 import logging
+import threading
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import Optional
 
-import torch
 from presidio_analyzer import AnalysisExplanation, EntityRecognizer, RecognizerResult
 from presidio_analyzer.nlp_engine import NlpArtifacts
 
+from pteredactyl.defaults import DEFAULT_BATCH_SIZE
+from pteredactyl.recognisers.backends import (
+    BACKENDS,
+    QUANTIZE_MODES,
+    load_pipeline,
+    resolve_optimizations,
+)
 from pteredactyl.recognisers.support import _get_config
 
 logger = logging.getLogger("presidio-analyzer")
 
+# Upper bound on tokens per window, used when a tokenizer does not define its own maximum length
+MAX_SUPPORTED_TOKENS = 512
+
 try:
-    from transformers import (
-        AutoModelForTokenClassification,
-        AutoTokenizer,
-        TokenClassificationPipeline,
-        pipeline,
-    )
+    from transformers import PreTrainedModel, TokenClassificationPipeline
 
 except ImportError:
     logger.error("transformers is not installed")
@@ -27,8 +35,8 @@ class TransformersRecogniser(EntityRecognizer):
     Wrapper for a transformers model, if needed to be used within Presidio Analyzer.
     The class loads models hosted on HuggingFace - https://huggingface.co/
     and loads the model and tokenizer into a TokenClassification pipeline.
-    Samples are split into short text chunks, ideally shorter than max_length input_ids of the individual model,
-    to avoid truncation by the Tokenizer and loss of information
+    Samples longer than the max_length input_ids of the individual model are split into overlapping windows
+    using the fast tokenizer's offsets, to avoid truncation by the Tokenizer and loss of information
 
     A configuration object should be maintained for each dataset-model combination and translate
     entities names into a standardized view. A sample of a configuration file is attached in
@@ -37,8 +45,21 @@ class TransformersRecogniser(EntityRecognizer):
     :type supported_entities: Optional[list[str]]
     :param pipeline: Instance of a TokenClassificationPipeline including a Tokenizer and a Model, defaults to None
     :type pipeline: Optional[TokenClassificationPipeline], optional
+    :param model: Preloaded token classification model to build the pipeline around, e.g. one whose weights
+    are in shared memory, defaults to None (loaded from model_path)
+    :type model: Optional[PreTrainedModel], optional
     :param model_path: string referencing a HuggingFace uploaded model to be used for Inference, defaults to None
     :type model_path: Optional[str], optional
+    :param backend: Inference backend, "pytorch" or "onnx". The onnx backend exports the model once, caches it
+    locally and runs inference through onnxruntime, defaults to "pytorch"
+    :type backend: str, optional
+    :param quantize: "int8" to apply dynamic int8 quantisation to the model's linear layers (cached on disk),
+    or None to run in full precision, defaults to None
+    :type quantize: Optional[str], optional
+    :param optimize: CPU fast paths for the pytorch backend: True for inference_mode, sdpa attention, torch.compile
+    and sequence length bucketing (each bucket is warmed up at load time), or a list chosen from
+    "inference_mode", "sdpa", "bf16", "compile" and "bucketing", defaults to None
+    :type optimize: Optional[bool | Sequence[str]], optional
 
     :example
     >from presidio_analyzer import AnalyzerEngine, RecognizerRegistry
@@ -64,7 +85,20 @@ class TransformersRecogniser(EntityRecognizer):
         model_path: str,
         pipeline: Optional[TokenClassificationPipeline] = None,
         supported_entities: Optional[list[str]] = None,
+        model: Optional["PreTrainedModel"] = None,
+        backend: str = "pytorch",
+        quantize: Optional[str] = None,
+        optimize: Optional[bool | Sequence[str]] = None,
     ):
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"Unsupported backend '{backend}'. Choose one of {list(BACKENDS)}"
+            )
+        if quantize is not None and quantize not in QUANTIZE_MODES:
+            raise ValueError(
+                f"Unsupported quantize '{quantize}'. Choose one of {list(QUANTIZE_MODES)} or None"
+            )
+
         config = _get_config(model_path=model_path)
 
         if not supported_entities:
@@ -76,6 +110,10 @@ class TransformersRecogniser(EntityRecognizer):
 
         self.model_path = model_path
         self.pipeline = pipeline
+        self.model = model
+        self.backend = backend
+        self.quantize = quantize
+        self.optimizations = resolve_optimizations(optimize)
         self.is_loaded = False
 
         self.aggregation_mechanism = None
@@ -85,8 +123,14 @@ class TransformersRecogniser(EntityRecognizer):
         self.default_explanation = None
         self.text_overlap_length = None
         self.chunk_length = None
+        self.chunk_stride = None
         self.id_entity_name = None
         self.id_score_reduction = None
+        self.batch_size = None
+        self.chunk_workers = None
+
+        # Predictions computed ahead of time by prefetch(), per thread
+        self._prefetched = threading.local()
 
     def load_transformer(self, **kwargs) -> None:
         """Load external configuration parameters and set default values.
@@ -99,10 +143,13 @@ class TransformersRecogniser(EntityRecognizer):
         **CHUNK_OVERLAP_SIZE (int) - number of overlapping characters in each text chunk
         when splitting a single text into multiple inferences
         **CHUNK_SIZE (int) - number of characters in each chunk of text
+        **CHUNK_STRIDE (int) - number of overlapping tokens between windows when a long text is split using a fast tokenizer
         **LABELS_TO_IGNORE (list(str)) - List of entities to skip evaluation. Defaults to ["O"]
         **DEFAULT_EXPLANATION (str) - string format to use for prediction explanations
         **ID_ENTITY_NAME (str) - name of the ID entity
         **ID_SCORE_REDUCTION (float) - score multiplier for ID entities
+        **BATCH_SIZE (int) - number of texts, or windows of a long text, sent through the model in one padded batch
+        **CHUNK_WORKERS (int) - number of threads the batches of a very long text are spread over. Defaults to 1
         """
 
         self.entity_mapping = kwargs.get("DATASET_TO_PRESIDIO_MAPPING", {})
@@ -112,8 +159,11 @@ class TransformersRecogniser(EntityRecognizer):
         self.default_explanation = kwargs.get("DEFAULT_EXPLANATION", None)
         self.text_overlap_length = kwargs.get("CHUNK_OVERLAP_SIZE", 40)
         self.chunk_length = kwargs.get("CHUNK_SIZE", 600)
+        self.chunk_stride = kwargs.get("CHUNK_STRIDE", 32)
         self.id_entity_name = kwargs.get("ID_ENTITY_NAME", "ID")
         self.id_score_reduction = kwargs.get("ID_SCORE_REDUCTION", 0.5)
+        self.batch_size = kwargs.get("BATCH_SIZE", 8)
+        self.chunk_workers = kwargs.get("CHUNK_WORKERS", 1)
 
         if not self.pipeline:
             if not self.model_path:
@@ -128,15 +178,17 @@ class TransformersRecogniser(EntityRecognizer):
         """Initialize NER transformers pipeline using the model_path provided"""
 
         logging.debug(f"Initializing NER pipeline using {self.model_path} path")
-        device = 0 if torch.cuda.is_available() else -1
-        self.pipeline = pipeline(
-            "ner",
-            model=AutoModelForTokenClassification.from_pretrained(self.model_path),
-            tokenizer=AutoTokenizer.from_pretrained(self.model_path),
+
+        self.pipeline = load_pipeline(
+            self.model_path,
+            model=self.model,
+            backend=self.backend,
+            quantize=self.quantize,
+            optimize=self.optimizations,
+            # Single texts, this recogniser's batches, and the batches of analyse_batch and anonymise_df
+            warm_up_batch_sizes=(1, self.batch_size, DEFAULT_BATCH_SIZE),
             # Will attempt to group sub-entities to word level
             aggregation_strategy=self.aggregation_mechanism,
-            device=device,
-            framework="pt",
             ignore_labels=self.ignore_labels,
         )
 
@@ -163,10 +215,15 @@ class TransformersRecogniser(EntityRecognizer):
         """
 
         results = list()
-        # Run transformer model on the provided text
-        ner_results = self._get_ner_results_for_text(text)
+        # Run transformer model on the provided text, unless it was already run by prefetch()
+        prefetched = getattr(self._prefetched, "predictions", {})
+        ner_results = prefetched.get(text)
+        if ner_results is None:
+            ner_results = self._get_ner_results_for_text(text)
 
         for res in ner_results:
+            # copy, as prefetched predictions may be shared by duplicate texts
+            res = dict(res)
             res["entity_group"] = self.__check_label_transformer(res["entity_group"])
             if not res["entity_group"]:
                 continue
@@ -185,6 +242,29 @@ class TransformersRecogniser(EntityRecognizer):
 
         return results
 
+    @contextmanager
+    def prefetch(
+        self, texts: Sequence[str], batch_size: Optional[int] = None
+    ) -> Iterator[None]:
+        """Runs the model over texts in batches, and serves analyze() calls for those texts
+        (in the same thread) from the batched predictions until the context exits.
+
+        :param texts: The texts that are about to be analysed
+        :type texts: Sequence[str]
+        :param batch_size: Number of texts per forward pass, defaults to BATCH_SIZE from the model configuration
+        :type batch_size: Optional[int]
+
+        :example
+        >with transformers_recognizer.prefetch(texts, batch_size=32):
+        >    results = [analyzer.analyze(text, language="en") for text in texts]
+        """
+        predictions = self._get_ner_results_for_texts(texts, batch_size=batch_size)
+        self._prefetched.predictions = dict(zip(texts, predictions))
+        try:
+            yield
+        finally:
+            self._prefetched.predictions = {}
+
     @staticmethod
     def split_text_to_word_chunks(
         input_length: int, chunk_length: int, overlap_length: int
@@ -216,51 +296,284 @@ class TransformersRecogniser(EntityRecognizer):
             )
         ]
 
+    def _get_max_tokens(self) -> int:
+        """Returns the maximum number of tokens (including special tokens) the model accepts per input.
+        Falls back to the model's position embeddings when the tokenizer does not define a maximum length.
+        """
+        model_max_length = self.pipeline.tokenizer.model_max_length
+        if model_max_length > MAX_SUPPORTED_TOKENS:
+            model_max_length = min(
+                getattr(
+                    self.pipeline.model.config,
+                    "max_position_embeddings",
+                    MAX_SUPPORTED_TOKENS,
+                ),
+                MAX_SUPPORTED_TOKENS,
+            )
+        return model_max_length
+
+    def _get_chunk_spans(self, texts: Sequence[str]) -> list[list[tuple[int, int]]]:
+        """The function calculates the character spans of the windows each text is split into.
+        With a fast tokenizer, the texts are tokenized once with return_overflowing_tokens, so that each window
+        fills the model's token budget, and consecutive windows overlap by chunk_stride tokens.
+        Window boundaries are moved to the nearest whole word inside the window, as the overlap covers the remainder,
+        except where that would leave text between two windows that neither covers.
+        With a slow tokenizer, texts with more tokens than the model's max length are split into character chunks instead.
+
+        :param texts: The texts to split
+        :type texts: Sequence[str]
+        :return: List of (start, end) character spans for each text; a single span covers the whole text
+        :rtype: list[list[tuple[int, int]]]
+        """
+        tokenizer = self.pipeline.tokenizer
+        max_tokens = self._get_max_tokens()
+
+        if not tokenizer.is_fast:
+            special_tokens = tokenizer.num_special_tokens_to_add()
+            return [
+                (
+                    [(0, len(text))]
+                    if len(tokenizer.tokenize(text)) + special_tokens <= max_tokens
+                    else [
+                        (start, end)
+                        for start, end in TransformersRecogniser.split_text_to_word_chunks(
+                            len(text), self.chunk_length, self.text_overlap_length
+                        )
+                    ]
+                )
+                for text in texts
+            ]
+
+        stride = min(self.chunk_stride, max_tokens // 2)
+        encodings = tokenizer(
+            list(texts),
+            max_length=max_tokens,
+            stride=stride,
+            truncation=True,
+            return_overflowing_tokens=True,
+            return_offsets_mapping=True,
+            return_special_tokens_mask=True,
+        )
+
+        windows = [[] for _ in texts]
+        for offsets, special_tokens_mask, text_index in zip(
+            encodings["offset_mapping"],
+            encodings["special_tokens_mask"],
+            encodings["overflow_to_sample_mapping"],
+        ):
+            token_offsets = [
+                offset
+                for offset, is_special in zip(offsets, special_tokens_mask)
+                if not is_special
+            ]
+            if token_offsets:
+                windows[text_index].append((token_offsets[0][0], token_offsets[-1][1]))
+
+        chunk_spans = []
+        for text, text_windows in zip(texts, windows):
+            if len(text_windows) <= 1:
+                chunk_spans.append([(0, len(text))])
+                continue
+
+            spans = []
+            for i, (start, end) in enumerate(text_windows):
+                snapped_start = (
+                    0 if i == 0 else self._snap_to_word_start(text, start, end)
+                )
+                if spans and snapped_start > spans[-1][1]:
+                    # A word longer than the overlap was cut by both window edges, and snapping both would skip it.
+                    # The tokenizer's windows overlap, so their unsnapped edges always cover the text between them
+                    snapped_start = start
+                    if snapped_start > spans[-1][1]:
+                        spans[-1] = (spans[-1][0], text_windows[i - 1][1])
+                end = (
+                    len(text)
+                    if i == len(text_windows) - 1
+                    else self._snap_to_word_end(text, snapped_start, end)
+                )
+                spans.append((snapped_start, end))
+            chunk_spans.append(spans)
+
+        return chunk_spans
+
+    @staticmethod
+    def _snap_to_word_start(text: str, start: int, end: int) -> int:
+        """Moves start forward past a word cut by the window edge, unless the word fills the whole window."""
+        snapped = start
+        while snapped < end and snapped > 0 and text[snapped - 1].isalnum():
+            if not text[snapped].isalnum():
+                break
+            snapped += 1
+        return snapped if snapped < end else start
+
+    @staticmethod
+    def _snap_to_word_end(text: str, start: int, end: int) -> int:
+        """Moves end back before a word cut by the window edge, unless the word fills the whole window."""
+        snapped = end
+        while snapped > start and snapped < len(text) and text[snapped].isalnum():
+            if not text[snapped - 1].isalnum():
+                break
+            snapped -= 1
+        return snapped if snapped > start else end
+
+    @staticmethod
+    def _reconcile_chunk_predictions(
+        chunk_spans: list[tuple[int, int]],
+        chunk_predictions: list[list[dict[str, int | float | str]]],
+        text_length: int,
+    ) -> list[dict[str, int | float | str]]:
+        """The function aligns predictions from overlapping windows to the original text and reconciles them by offset.
+        Predictions touching a window edge that was cut are dropped, as the neighbouring window sees them with more
+        context. Each window then owns the text from the middle of its overlap with the previous window to the middle
+        of its overlap with the next one, except that a prediction starting in an earlier window's text but running
+        past that window's cut end is kept by the later window, as the earlier window could not see all of it.
+        Finally, overlapping predictions of the same entity are merged.
+
+        :param chunk_spans: (start, end) character span of each window
+        :type chunk_spans: list[tuple[int, int]]
+        :param chunk_predictions: Pipeline predictions for each window, with offsets relative to the window
+        :type chunk_predictions: list[list[dict]]
+        :param text_length: Length of the original text
+        :type text_length: int
+        :return: List of entity predictions on the word level, sorted by start
+        :rtype: list[dict]
+        """
+        boundaries = [0]
+        for (_, previous_end), (next_start, _) in zip(chunk_spans, chunk_spans[1:]):
+            boundaries.append((next_start + previous_end) // 2)
+        boundaries.append(text_length)
+
+        predictions = []
+        for i, ((chunk_start, chunk_end), window_predictions) in enumerate(
+            zip(chunk_spans, chunk_predictions)
+        ):
+            owned_start, owned_end = boundaries[i], boundaries[i + 1]
+            for prediction in window_predictions:
+                start = prediction["start"] + chunk_start
+                end = prediction["end"] + chunk_start
+                if (start <= chunk_start and chunk_start > 0) or (
+                    end >= chunk_end and chunk_end < text_length
+                ):
+                    continue
+                if owned_start <= start < owned_end:
+                    predictions.append({**prediction, "start": start, "end": end})
+                elif start < owned_start:
+                    owner = bisect.bisect_right(boundaries, start) - 1
+                    if end >= chunk_spans[owner][1]:
+                        predictions.append({**prediction, "start": start, "end": end})
+
+        predictions.sort(
+            key=lambda prediction: (prediction["start"], prediction["end"])
+        )
+
+        # merge predictions of the same entity which overlap across a window boundary
+        reconciled = []
+        last_by_entity = {}
+        for prediction in predictions:
+            previous = last_by_entity.get(prediction["entity_group"])
+            if previous is None or previous["end"] <= prediction["start"]:
+                reconciled.append(prediction)
+                last_by_entity[prediction["entity_group"]] = prediction
+                continue
+            if (
+                prediction["end"] - prediction["start"]
+                > previous["end"] - previous["start"]
+            ):
+                previous["word"] = prediction["word"]
+            previous["end"] = max(previous["end"], prediction["end"])
+            previous["score"] = max(previous["score"], prediction["score"])
+
+        return reconciled
+
     def _get_ner_results_for_text(
         self, text: str
     ) -> list[dict[str, int | float | str]]:
         """The function runs model inference on the provided text.
-        The text is split into chunks with n overlapping characters.
-        The results are then aggregated and duplications are removed.
+        Texts longer than the model's token budget are split into overlapping windows,
+        and the predictions of each window are reconciled by offset.
 
         :param text: The text to run inference on
         :type text: str
         :return: List of entity predictions on the word level
         :rtype: list[dict]
         """
-        model_max_length = self.pipeline.tokenizer.model_max_length
-        # calculate inputs based on the text
-        text_length = len(text)
-        # split text into chunks
-        if text_length <= model_max_length:
-            predictions = self.pipeline(text)
-        else:
-            logger.info(
-                f"splitting the text into chunks, length {text_length} > {model_max_length}"
-            )
-            predictions = list()
-            chunk_indexes = TransformersRecogniser.split_text_to_word_chunks(
-                text_length, self.chunk_length, self.text_overlap_length
-            )
+        return self._get_ner_results_for_texts([text])[0]
+
+    def _get_ner_results_for_texts(
+        self, texts: Sequence[str], batch_size: Optional[int] = None
+    ) -> list[list[dict[str, int | float | str]]]:
+        """The function runs model inference on a batch of texts, returning predictions in input order.
+        Longer texts are split into overlapping windows (see _get_chunk_spans), and the windows are stacked
+        with the short texts so that everything is passed through the pipeline as padded batches of batch_size.
+
+        :param texts: The texts to run inference on
+        :type texts: Sequence[str]
+        :param batch_size: Number of texts per forward pass, defaults to BATCH_SIZE from the model configuration
+        :type batch_size: Optional[int]
+        :return: A list of entity predictions on the word level for each text
+        :rtype: list[list[dict]]
+        """
+        batch_size = batch_size or self.batch_size
+
+        predictions = [[] for _ in texts]
+        text_indexes = [i for i, text in enumerate(texts) if text.strip()]
+        if not text_indexes:
+            return predictions
+
+        chunk_spans = self._get_chunk_spans([texts[i] for i in text_indexes])
+
+        # stack short texts and the windows of long texts into a single list of inputs
+        inputs = []
+        for i, spans in zip(text_indexes, chunk_spans):
+            text = texts[i]
+            if len(spans) > 1:
+                logger.info(f"splitting the text into {len(spans)} chunks")
+            inputs.extend(text[start:end] for start, end in spans)
+
+        input_predictions = self._run_pipeline(inputs, batch_size=batch_size)
+
+        position = 0
+        for i, spans in zip(text_indexes, chunk_spans):
+            text_predictions = input_predictions[position : position + len(spans)]
+            position += len(spans)
+            if len(spans) == 1:
+                predictions[i] = text_predictions[0]
+            else:
+                predictions[i] = self._reconcile_chunk_predictions(
+                    spans, text_predictions, len(texts[i])
+                )
 
-            # iterate over text chunks and run inference
-            for chunk_start, chunk_end in chunk_indexes:
-                chunk_text = text[chunk_start:chunk_end]
-                chunk_preds = self.pipeline(chunk_text)
+        return predictions
 
-                # align indexes to match the original text - add to each position the value of chunk_start
-                aligned_predictions = list()
-                for prediction in chunk_preds:
-                    prediction_tmp = copy.deepcopy(prediction)
-                    prediction_tmp["start"] += chunk_start
-                    prediction_tmp["end"] += chunk_start
-                    aligned_predictions.append(prediction_tmp)
+    def _run_pipeline(
+        self, inputs: list[str], batch_size: int
+    ) -> list[list[dict[str, int | float | str]]]:
+        """The function runs the pipeline over inputs as padded batches of batch_size.
+        When there are more inputs than fit in one batch and chunk_workers > 1,
+        the batches are spread over a thread pool.
+
+        :param inputs: The texts or text windows to run inference on
+        :type inputs: list[str]
+        :param batch_size: Number of inputs per forward pass
+        :type batch_size: int
+        :return: Pipeline predictions for each input, in input order
+        :rtype: list[list[dict]]
+        """
+        if not inputs:
+            return []
 
-                predictions.extend(aligned_predictions)
+        if self.chunk_workers <= 1 or len(inputs) <= batch_size:
+            return self.pipeline(inputs, batch_size=batch_size)
 
-        # remove duplicates
-        predictions = [dict(t) for t in {tuple(d.items()) for d in predictions}]
-        return predictions
+        batches = [
+            inputs[start : start + batch_size]
+            for start in range(0, len(inputs), batch_size)
+        ]
+        with ThreadPoolExecutor(max_workers=self.chunk_workers) as executor:
+            batch_predictions = executor.map(
+                lambda batch: self.pipeline(batch, batch_size=batch_size), batches
+            )
+            return [prediction for batch in batch_predictions for prediction in batch]
 
     @staticmethod
     def _convert_to_recognizer_result(
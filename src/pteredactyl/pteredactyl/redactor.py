@@ -1,17 +1,20 @@
 import copy
 import logging
-import random
-from collections.abc import Sequence
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable, Sequence
+from concurrent.futures import Executor
+from contextlib import ExitStack
 
+import numpy as np
 import pandas as pd
 from presidio_analyzer import AnalyzerEngine
 from presidio_analyzer.recognizer_result import RecognizerResult
-from presidio_anonymizer import AnonymizerEngine
-from presidio_anonymizer.entities import ConflictResolutionStrategy, OperatorConfig
-from presidio_anonymizer.operators import OperatorType
+from presidio_anonymizer.entities import OperatorConfig
 from tqdm.auto import tqdm
 
 from pteredactyl.defaults import (
+    DEFAULT_BATCH_SIZE,
     DEFAULT_ENTITIES,
     DEFAULT_NER_MODEL,
     DEFAULT_REGEX_ENTITIES,
@@ -19,16 +22,27 @@ from pteredactyl.defaults import (
     change_model,
 )
 from pteredactyl.recognisers.pteredactyl_recogniser import PteredactylRecogniser
+from pteredactyl.recognisers.transformers_recogniser import TransformersRecogniser
 from pteredactyl.regex_entities import (
     build_regex_entity_recogniser_list,
     rebuild_analyser_regex_recognisers,
 )
+from pteredactyl.renderer import (
+    has_random_operators,
+    lookup_pseudonyms,
+    render,
+    resolve_conflicts,
+)
+from pteredactyl.result_cache import ResultCache, analyser_fingerprint
 from pteredactyl.support import (
-    highlight_text,
+    estimate_analyser_memory_mb,
+    get_pteredactyl_recognisers,
+    get_transformers_recognisers,
     load_nlp_configuration,
     load_nlp_engine,
     load_registry,
     load_spacy_model,
+    load_tokenizer_nlp_engine,
     load_transformers_recognizer,
     return_allowed_results,
     split_results_into_individual_words,
@@ -39,12 +53,27 @@ presidio_logger = logging.getLogger("presidio-analyzer")
 
 def create_analyser(
     model_path: str = DEFAULT_NER_MODEL,
-    spacy_model: str = DEFAULT_SPACY_MODEL,
+    spacy_model: str | None = DEFAULT_SPACY_MODEL,
     language: str = "en",
     regex_entities: Sequence[str | PteredactylRecogniser] = DEFAULT_REGEX_ENTITIES,
+    transformers_recogniser: TransformersRecogniser | None = None,
+    backend: str = "pytorch",
+    quantize: str | None = None,
+    optimize: bool | Sequence[str] | None = None,
+    regex_backend: str = "re",
 ) -> AnalyzerEngine:
     """
     Create an analyser engine with a Transformers NER model and spaCy model.
+    By default (spacy_model=None) text is only tokenized, with a blank spaCy pipeline, as pteredactyl's recognisers do not
+    use spaCy's tags, parse, lemmas or entities. Pass a spaCy model name (e.g. "en_core_web_sm") to opt in to the full
+    spaCy pipeline, e.g. for custom recognisers that need it; the model is downloaded the first time if not installed.
+    A preloaded transformers_recogniser can be passed to reuse its model, in which case model_path is only used for logging.
+    With backend="onnx", the NER model is exported to ONNX once, cached locally, and run with onnxruntime.
+    With quantize="int8", the NER model's linear layers are dynamically quantised to int8 and the quantised weights are
+    cached locally (see pteredactyl.recognisers.backends.check_quantization_accuracy to compare it with the fp32 model).
+    optimize enables CPU fast paths for the pytorch backend (True for inference_mode, sdpa, torch.compile and sequence
+    length bucketing, or a list of those and "bf16"). Compiled buckets are warmed up here, so loading takes longer.
+    The regex entities are scanned for with the re module, or with the regex package if regex_backend="regex".
     """
     if not model_path:
         raise ValueError("No model path provided for NER model.")
@@ -56,38 +85,343 @@ def create_analyser(
             regex_entities=regex_entities
         )
 
-    load_spacy_model(spacy_model)
-
-    transformers_recogniser = load_transformers_recognizer(model_path)
+    if spacy_model:
+        load_spacy_model(spacy_model)
 
-    nlp_configuration = load_nlp_configuration(
-        language=language, spacy_model=spacy_model
-    )
+    if transformers_recogniser is None:
+        transformers_recogniser = load_transformers_recognizer(
+            model_path, backend=backend, quantize=quantize, optimize=optimize
+        )
 
     registry = load_registry(
-        transformers_recogniser=transformers_recogniser, regex_entities=regex_entities
+        transformers_recogniser=transformers_recogniser,
+        regex_entities=regex_entities,
+        regex_backend=regex_backend,
     )
 
-    nlp_engine = load_nlp_engine(
-        presidio_logger=presidio_logger, nlp_configuration=nlp_configuration
-    )
+    if spacy_model:
+        nlp_configuration = load_nlp_configuration(
+            language=language, spacy_model=spacy_model
+        )
+        nlp_engine = load_nlp_engine(
+            presidio_logger=presidio_logger, nlp_configuration=nlp_configuration
+        )
+    else:
+        # Pteredactyl's recognisers only need tokens, so skip spaCy's tagger, parser, lemmatiser and NER
+        nlp_engine = load_tokenizer_nlp_engine(language=language)
 
     analyser = AnalyzerEngine(nlp_engine=nlp_engine, registry=registry)
 
     return analyser
 
 
+class AnalyserCache:
+    """
+    A thread-safe cache of analysers keyed by model path, so that spaCy, the tokenizer and the NER model
+    are loaded once per model rather than on every call. Each analyser is warmed up with a short text when
+    it is first built, and the least recently used analysers are evicted once the estimated memory of the
+    cached models exceeds max_memory_mb.
+
+    Args:
+        max_memory_mb (float, optional): Memory cap for the cached models, in megabytes. If None, nothing is evicted.
+            The most recently used analyser is always kept, even if it alone exceeds the cap.
+        spacy_model (str, optional): The spaCy model used to build each analyser.
+        language (str): The language used to build each analyser. Defaults to "en".
+        regex_entities (list, optional): Regex entities or PteredactylRecognisers used to build each analyser.
+        warm_up_text (str): Text analysed once when an analyser is built, so the first real request is not slowed down.
+
+    Example:
+        >>> cache = AnalyserCache(max_memory_mb=4096)
+        >>> cache.warm([DEFAULT_NER_MODEL])
+        >>> cache.is_ready()
+        True
+        >>> anonymise(text, analyser=cache.get(DEFAULT_NER_MODEL))
+    """
+
+    def __init__(
+        self,
+        max_memory_mb: float | None = None,
+        spacy_model: str | None = DEFAULT_SPACY_MODEL,
+        language: str = "en",
+        regex_entities: Sequence[str | PteredactylRecogniser] = DEFAULT_REGEX_ENTITIES,
+        warm_up_text: str = "Patient John Smith was seen at Southampton General Hospital on 01/01/2024.",
+    ):
+        self.max_memory_mb = max_memory_mb
+        self.spacy_model = spacy_model
+        self.language = language
+        self.regex_entities = regex_entities
+        self.warm_up_text = warm_up_text
+
+        self._analysers: OrderedDict[str, tuple[AnalyzerEngine, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_locks: dict[str, threading.Lock] = {}
+
+    def __contains__(self, model_path: str) -> bool:
+        with self._lock:
+            return model_path in self._analysers
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._analysers)
+
+    @property
+    def memory_mb(self) -> float:
+        """The estimated memory held by all cached analysers, in megabytes."""
+        with self._lock:
+            return sum(memory_mb for _, memory_mb in self._analysers.values())
+
+    def get(self, model_path: str = DEFAULT_NER_MODEL) -> AnalyzerEngine:
+        """
+        Returns the cached analyser for model_path, building and warming it up first if needed.
+
+        Args:
+            model_path (str): The path to the NER model.
+
+        Returns:
+            AnalyzerEngine: The cached analyser.
+        """
+        with self._lock:
+            if model_path in self._analysers:
+                self._analysers.move_to_end(model_path)
+                return self._analysers[model_path][0]
+            build_lock = self._build_locks.setdefault(model_path, threading.Lock())
+
+        # Only one thread builds each model; others wait and then reuse it
+        with build_lock:
+            with self._lock:
+                if model_path in self._analysers:
+                    self._analysers.move_to_end(model_path)
+                    return self._analysers[model_path][0]
+
+            analyser = create_analyser(
+                model_path=model_path,
+                spacy_model=self.spacy_model,
+                language=self.language,
+                regex_entities=self.regex_entities,
+            )
+            if self.warm_up_text:
+                analyser.analyze(self.warm_up_text, language=self.language)
+            memory_mb = estimate_analyser_memory_mb(analyser)
+
+            with self._lock:
+                self._analysers[model_path] = (analyser, memory_mb)
+                self._evict()
+
+        return analyser
+
+    def warm(self, model_paths: Sequence[str] = (DEFAULT_NER_MODEL,)) -> None:
+        """
+        Builds and warms up the analysers for model_paths, e.g. at application startup.
+
+        Args:
+            model_paths (list[str]): The model paths to load.
+        """
+        for model_path in model_paths:
+            self.get(model_path)
+
+    def is_ready(self, model_path: str = DEFAULT_NER_MODEL) -> bool:
+        """
+        Readiness check: True once the analyser for model_path has been loaded and warmed up.
+
+        Args:
+            model_path (str): The model path to check. Defaults to the default NER model.
+
+        Returns:
+            bool: Whether the analyser is ready to serve requests.
+        """
+        return model_path in self
+
+    def evict(self, model_path: str) -> None:
+        """Removes the analyser for model_path from the cache, if present."""
+        with self._lock:
+            self._analysers.pop(model_path, None)
+
+    def clear(self) -> None:
+        """Removes all analysers from the cache."""
+        with self._lock:
+            self._analysers.clear()
+
+    def _evict(self) -> None:
+        """Evicts least recently used analysers until the memory cap is met. Must be called while holding the lock."""
+        if self.max_memory_mb is None:
+            return
+
+        total_mb = sum(memory_mb for _, memory_mb in self._analysers.values())
+        while total_mb > self.max_memory_mb and len(self._analysers) > 1:
+            model_path, (_, memory_mb) = self._analysers.popitem(last=False)
+            total_mb -= memory_mb
+            presidio_logger.info(
+                f"Evicted analyser for {model_path} from cache ({memory_mb:.0f} MB)"
+            )
+
+
+def _prepare_entities(
+    entities: str | list[str],
+    regex_entities: Sequence[str | PteredactylRecogniser],
+) -> tuple[list[str], list[PteredactylRecogniser], list[str], list[str]]:
+    """
+    Normalises the requested entities and regex entities.
+
+    Returns:
+        tuple: All entities to analyse, the regex PteredactylRecognisers, the allowed NER entities and the allowed regex entities.
+    """
+    entities = [entities] if isinstance(entities, str) else entities if entities else []
+    regex_entities = (
+        build_regex_entity_recogniser_list(regex_entities=regex_entities)
+        if regex_entities
+        else []
+    )
+    allowed_entities = entities
+    allowed_regex_entities = [
+        regex_entity.entity_type for regex_entity in regex_entities
+    ]
+    entities = allowed_entities + allowed_regex_entities
+
+    return entities, regex_entities, allowed_entities, allowed_regex_entities
+
+
+def _check_analyser(
+    analyser: AnalyzerEngine | None,
+    model_path: str,
+    spacy_model: str | None,
+    language: str,
+    regex_entities: Sequence[str | PteredactylRecogniser],
+    rebuild_regex_recognisers: bool,
+) -> AnalyzerEngine:
+    """
+    Creates an analyser if one is not provided, otherwise optionally rebuilds its regex recognisers.
+
+    Returns:
+        AnalyzerEngine: The analyser to use.
+    """
+    if not analyser:
+        analyser = create_analyser(
+            model_path=model_path,
+            spacy_model=spacy_model,
+            language=language,
+            regex_entities=regex_entities,
+        )
+    else:
+        if rebuild_regex_recognisers:
+            rebuild_analyser_regex_recognisers(
+                analyser=analyser, regex_entities=regex_entities
+            )
+
+    return analyser
+
+
+def _filter_results(
+    text: str,
+    initial_results: list[RecognizerResult],
+    allowed_entities: list[str],
+    allowed_regex_entities: list[str],
+    mask_individual_words: bool,
+    text_separator: str,
+) -> list[RecognizerResult]:
+    """
+    Optionally splits results into individual words, then keeps only allowed entities, sorted by start position.
+
+    Returns:
+        list[RecognizerResult]: The filtered results.
+    """
+    if mask_individual_words:
+        initial_results = split_results_into_individual_words(
+            text=text, results=initial_results, text_separator=text_separator
+        )
+
+    results = return_allowed_results(
+        initial_results=initial_results,
+        allowed_entities=allowed_entities,
+        allowed_regex_entities=allowed_regex_entities,
+    )
+
+    results.sort(key=lambda x: x.start)
+
+    return results
+
+
+def _result_cache_keys(
+    result_cache: ResultCache,
+    texts: Sequence[str],
+    analyser: AnalyzerEngine,
+    language: str,
+    entities: list[str],
+    allowed_entities: list[str],
+    allowed_regex_entities: list[str],
+    mask_individual_words: bool,
+    text_separator: str,
+    kwargs: dict,
+) -> list[bytes]:
+    """
+    Keys each text by everything its filtered results depend on.
+
+    Returns:
+        list[bytes]: A result cache key for each text.
+    """
+    return result_cache.keys(
+        texts,
+        analyser=analyser_fingerprint(analyser),
+        language=language,
+        entities=entities,
+        allowed_entities=allowed_entities,
+        allowed_regex_entities=allowed_regex_entities,
+        mask_individual_words=mask_individual_words,
+        text_separator=text_separator,
+        kwargs=sorted(kwargs.items()),
+    )
+
+
+def _anonymise_results(
+    texts: Sequence[str],
+    batch_results: Sequence[list[RecognizerResult]],
+    entities: list[str],
+    highlight: bool,
+    replacement_lists: dict | None,
+    mask_individual_words: bool,
+    operators: dict[str, OperatorConfig] | None = None,
+) -> list[str]:
+    """
+    Replaces analysed results in each text with their entity placeholders, the output of their operators, or values
+    from replacement_lists. The pseudonyms of the whole batch are looked up together.
+
+    Returns:
+        list[str]: The anonymised texts.
+    """
+    # Draw replacements at random from the replacement lists, for entities without an operator
+    operators = dict(operators or {})
+    if entities and replacement_lists:
+        for entity in entities:
+            if entity in replacement_lists and entity not in operators:
+                operators[entity] = OperatorConfig(
+                    "surrogate", {"values": replacement_lists[entity]}
+                )
+
+    # Adjacent entities of the same type are not merged when masking individual words
+    # some discussion around merging adjacent entities: https://github.com/microsoft/presidio/issues/1090
+    batch_spans = [
+        resolve_conflicts(text, results, merge_adjacent=not mask_individual_words)
+        for text, results in zip(texts, batch_results)
+    ]
+    lookup_pseudonyms(texts, batch_spans, operators)
+
+    return [
+        render(text, spans, operators=operators, highlight=highlight)
+        for text, spans in zip(texts, batch_spans)
+    ]
+
+
 def analyse(
     text: str,
     analyser: AnalyzerEngine | None = None,
     entities: str | list[str] = DEFAULT_ENTITIES,
     regex_entities: Sequence[str | PteredactylRecogniser] = DEFAULT_REGEX_ENTITIES,
     model_path: str = DEFAULT_NER_MODEL,
-    spacy_model: str = DEFAULT_SPACY_MODEL,
+    spacy_model: str | None = DEFAULT_SPACY_MODEL,
     language: str = "en",
     mask_individual_words: bool = False,
     text_separator: str = " ",
     rebuild_regex_recognisers: bool = True,
+    result_cache: ResultCache | None = None,
     **kwargs,
 ) -> list[RecognizerResult]:
     """
@@ -103,12 +437,14 @@ def analyse(
         entities (list, optional): A list of entity types to analyse. If not provided, a default list will be used.
         regex_entities (list, optional): A list of regex entities or PteredactylRecognisers to analyse. If not provided, a default list will be used.
         model_path (str): The path to the model used for analysis (e.g. 'StanfordAIMI/stanford-deidentifier-base'). Used only if analyser not provided.
-        spacy_model (str): The spaCy model to use (e.g. 'en_core_web_sm'). Used only if analyser not provided.
+        spacy_model (str, optional): The spaCy model to use (e.g. 'en_core_web_sm'), or None to only tokenize. Used only if analyser not provided.
         language (str): The language of the text to be analyzed. Defaults to "en". Used only if analyser not provided.
         mask_individual_words (bool): If True, prevents joining of next-door entities together.
             (i.e. with Jane Smith, both 'Jane' and 'Smith' are identified separately if True, combined if False). Defaults to False.
         text_separator (str): Text separator. Default is whitespace.
         rebuild_regex_recognisers (bool): If True, and an existing analyser is provided, the analyser's regex recognisers will be rebuilt before execution.
+        result_cache (ResultCache, optional): If provided, results are looked up in and stored in this cache, so text that has
+            already been analysed with the same analyser and options is not analysed again.
         **kwargs: Additional keyword arguments for the analyzer.
 
     Returns:
@@ -124,51 +460,51 @@ def analyse(
     """
 
     # Prepare
-    entities = [entities] if isinstance(entities, str) else entities if entities else []
-    regex_entities = (
-        build_regex_entity_recogniser_list(regex_entities=regex_entities)
-        if regex_entities
-        else []
+    entities, regex_entities, allowed_entities, allowed_regex_entities = (
+        _prepare_entities(entities=entities, regex_entities=regex_entities)
     )
-    allowed_entities = entities
-    allowed_regex_entities = [
-        regex_entity.entity_type for regex_entity in regex_entities
-    ]
-    entities = allowed_entities + allowed_regex_entities
 
     # Check Analyser
-    if not analyser:
-        analyser = create_analyser(
-            model_path=model_path,
-            spacy_model=spacy_model,
-            language=language,
-            regex_entities=regex_entities,
-        )
-    else:
-        if rebuild_regex_recognisers:
-            rebuild_analyser_regex_recognisers(
-                analyser=analyser, regex_entities=regex_entities
-            )
+    analyser = _check_analyser(
+        analyser=analyser,
+        model_path=model_path,
+        spacy_model=spacy_model,
+        language=language,
+        regex_entities=regex_entities,
+        rebuild_regex_recognisers=rebuild_regex_recognisers,
+    )
 
     # Analyse
-    initial_results = analyser.analyze(
-        text, language=language, entities=entities, **kwargs
-    )
+    def analyse_text() -> list[RecognizerResult]:
+        initial_results = analyser.analyze(
+            text, language=language, entities=entities, **kwargs
+        )
 
-    if mask_individual_words:
-        initial_results = split_results_into_individual_words(
-            text=text, results=initial_results, text_separator=text_separator
+        return _filter_results(
+            text=text,
+            initial_results=initial_results,
+            allowed_entities=allowed_entities,
+            allowed_regex_entities=allowed_regex_entities,
+            mask_individual_words=mask_individual_words,
+            text_separator=text_separator,
         )
 
-    results = return_allowed_results(
-        initial_results=initial_results,
+    if result_cache is None:
+        return analyse_text()
+
+    keys = _result_cache_keys(
+        result_cache,
+        [text],
+        analyser=analyser,
+        language=language,
+        entities=entities,
         allowed_entities=allowed_entities,
         allowed_regex_entities=allowed_regex_entities,
+        mask_individual_words=mask_individual_words,
+        text_separator=text_separator,
+        kwargs=kwargs,
     )
-
-    results.sort(key=lambda x: x.start)
-
-    return results
+    return result_cache.get_or_compute(keys, lambda _: [analyse_text()])[0]
 
 
 def anonymise(
@@ -178,12 +514,14 @@ def anonymise(
     regex_entities: Sequence[str | PteredactylRecogniser] = DEFAULT_REGEX_ENTITIES,
     highlight: bool = False,
     replacement_lists: dict | None = None,
+    operators: dict[str, OperatorConfig] | None = None,
     model_path: str = DEFAULT_NER_MODEL,
-    spacy_model: str = DEFAULT_SPACY_MODEL,
+    spacy_model: str | None = DEFAULT_SPACY_MODEL,
     language: str = "en",
     mask_individual_words: bool = False,
     text_separator: str = " ",
     rebuild_regex_recognisers: bool = True,
+    result_cache: ResultCache | None = None,
     **kwargs,
 ) -> str:
     """
@@ -196,14 +534,18 @@ def anonymise(
     entities (list, optional): A list of entity types to anonymize. If not provided, a default list will be used.
     regex_entities (list, optional): A list of regex entities or PteredactylRecognisers to analyse. If not provided, a default list will be used.
     highlight (bool): If True, highlights the anonymized parts in the text.
-    replacement_lists: (dict, optional): A dictionary with entity types as keys and lists of replacement values for hide-in-plain-sight redaction.
+    replacement_lists: (dict, optional): A dictionary with entity types as keys and lists of replacement values (or SurrogatePools, see
+            pteredactyl.surrogates) for hide-in-plain-sight redaction. A replacement is drawn at random for each entity.
+    operators (dict, optional): A dictionary with entity types (or "DEFAULT") as keys and OperatorConfigs as values, to replace
+            entities with the replace, mask, hash or surrogate operator (see pteredactyl.renderer.render) rather than a placeholder.
     model_path (str): The path to the model used for analysis. Used only if analyser not provided.
-    spacy_model (str): The spaCy model to use. Used only if analyser not provided.
+    spacy_model (str, optional): The spaCy model to use. Used only if analyser not provided.
     language (str): The language of the text to be analyzed. Defaults to "en". Used only if analyser not provided.
     mask_individual_words (bool): If True, prevents joining of next-door entities together.
             (i.e. Jane Smith becomes <PERSON> <PERSON> if True, or <PERSON> if False). Defaults to False.
     text_separator (str): Text separator. Default is whitespace.
     rebuild_regex_recognisers (bool): If True, and an existing analyser is provided, the analyser's regex recognisers will be rebuilt before execution.
+    result_cache (ResultCache, optional): If provided, analysis results are looked up in and stored in this cache.
     **kwargs: Additional keyword arguments for analyse.
 
     Returns:
@@ -241,31 +583,19 @@ def anonymise(
             If the tumor is malignant, further treatment, such as surgery or radiotherapy, may be recommended.
     """
     # Prepare
-    entities = [entities] if isinstance(entities, str) else entities if entities else []
-    regex_entities = (
-        build_regex_entity_recogniser_list(regex_entities=regex_entities)
-        if regex_entities
-        else []
+    entities, regex_entities, allowed_entities, allowed_regex_entities = (
+        _prepare_entities(entities=entities, regex_entities=regex_entities)
     )
-    allowed_entities = entities
-    allowed_regex_entities = [
-        regex_entity.entity_type for regex_entity in regex_entities
-    ]
-    entities = allowed_entities + allowed_regex_entities
 
     # Check Analyser
-    if not analyser:
-        analyser = create_analyser(
-            model_path=model_path,
-            spacy_model=spacy_model,
-            language=language,
-            regex_entities=regex_entities,
-        )
-    else:
-        if rebuild_regex_recognisers:
-            rebuild_analyser_regex_recognisers(
-                analyser=analyser, regex_entities=regex_entities
-            )
+    analyser = _check_analyser(
+        analyser=analyser,
+        model_path=model_path,
+        spacy_model=spacy_model,
+        language=language,
+        regex_entities=regex_entities,
+        rebuild_regex_recognisers=rebuild_regex_recognisers,
+    )
 
     # Analyse the text
     initial_results = analyse(
@@ -276,46 +606,269 @@ def anonymise(
         mask_individual_words=mask_individual_words,
         text_separator=text_separator,
         rebuild_regex_recognisers=False,
+        result_cache=result_cache,
         **kwargs,
     )
 
-    # Create an OperatorConfig that randomly selects replacements from the replacement list
-    operator_config = None
-    if entities:
-        if replacement_lists:
-            operator_config = {}
-            for entity in entities:
-                if entity in replacement_lists:
-                    operator_config[entity] = OperatorConfig(
-                        "replace",
-                        {"new_value": random.choice(replacement_lists[entity])},
-                    )
-
-    # Anonymise the text
-    anonymiser = AnonymizerEngine()
-
-    # if-else is strictly required as the anonymize method modifies initial_results variable when called
-    if not mask_individual_words:
-        anonymized_result = anonymiser.anonymize(
-            text=text, analyzer_results=initial_results, operators=operator_config
-        )
-    else:
-        # this is essentially AnonymizerEngine.anonymize without merging adjacent entities of the same type
-        # some discussion around merging adjacent entities: https://github.com/microsoft/presidio/issues/1090
-        analyzer_results = anonymiser._remove_conflicts_and_get_text_manipulation_data(
-            initial_results, ConflictResolutionStrategy.MERGE_SIMILAR_OR_CONTAINED
-        )
-        operators = anonymiser._AnonymizerEngine__check_or_add_default_operator(
-            operator_config
+    return _anonymise_results(
+        texts=[text],
+        batch_results=[initial_results],
+        entities=entities,
+        highlight=highlight,
+        replacement_lists=replacement_lists,
+        mask_individual_words=mask_individual_words,
+        operators=operators,
+    )[0]
+
+
+def analyse_batch(
+    texts: Iterable[str],
+    analyser: AnalyzerEngine | None = None,
+    entities: str | list[str] = DEFAULT_ENTITIES,
+    regex_entities: Sequence[str | PteredactylRecogniser] = DEFAULT_REGEX_ENTITIES,
+    model_path: str = DEFAULT_NER_MODEL,
+    spacy_model: str | None = DEFAULT_SPACY_MODEL,
+    language: str = "en",
+    mask_individual_words: bool = False,
+    text_separator: str = " ",
+    rebuild_regex_recognisers: bool = True,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    result_cache: ResultCache | None = None,
+    **kwargs,
+) -> list[list[RecognizerResult]]:
+    """
+    Analyses a batch of texts, returning the entities identified in each text in input order.
+    This is equivalent to calling analyse on each text, but spaCy is run over the texts with nlp.pipe
+    and the transformer model sees batch_size texts per forward pass, amortising the per-call overhead.
+
+    Args:
+        texts (Iterable[str]): The texts to be analysed.
+        analyser (AnalyzerEngine, optional): An instance of AnalyzerEngine. If not provided, a new analyser will be created.
+        entities (list, optional): A list of entity types to analyse. If not provided, a default list will be used.
+        regex_entities (list, optional): A list of regex entities or PteredactylRecognisers to analyse. If not provided, a default list will be used.
+        model_path (str): The path to the model used for analysis. Used only if analyser not provided.
+        spacy_model (str, optional): The spaCy model to use. Used only if analyser not provided.
+        language (str): The language of the texts to be analysed. Defaults to "en".
+        mask_individual_words (bool): If True, prevents joining of next-door entities together. Defaults to False.
+        text_separator (str): Text separator. Default is whitespace.
+        rebuild_regex_recognisers (bool): If True, and an existing analyser is provided, the analyser's regex recognisers will be rebuilt before execution.
+        batch_size (int): Number of texts processed together by spaCy and the transformer model. Defaults to 32.
+        result_cache (ResultCache, optional): If provided, results are looked up in and stored in this cache, and only texts
+            not already cached (each distinct text once) are analysed.
+        **kwargs: Additional keyword arguments for the analyzer.
+
+    Returns:
+        list[list[RecognizerResult]]: The analysis results for each text.
+
+    Example:
+        >>> analyser = create_analyser()
+        >>> texts = ["My name is John Doe", "My NHS number is 7890123450"]
+        >>> results = analyse_batch(texts, analyser=analyser, batch_size=64)
+        >>> print(results)
+        [[RecognizerResult(entity_type='PERSON', start=11, end=19, score=1.0)],
+         [RecognizerResult(entity_type='NHS_NUMBER', start=17, end=27, score=1.5)]]
+    """
+    texts = list(texts)
+
+    # Prepare
+    entities, regex_entities, allowed_entities, allowed_regex_entities = (
+        _prepare_entities(entities=entities, regex_entities=regex_entities)
+    )
+
+    # Check Analyser
+    analyser = _check_analyser(
+        analyser=analyser,
+        model_path=model_path,
+        spacy_model=spacy_model,
+        language=language,
+        regex_entities=regex_entities,
+        rebuild_regex_recognisers=rebuild_regex_recognisers,
+    )
+
+    if result_cache is None:
+        return _analyse_texts(
+            texts,
+            analyser=analyser,
+            language=language,
+            entities=entities,
+            allowed_entities=allowed_entities,
+            allowed_regex_entities=allowed_regex_entities,
+            mask_individual_words=mask_individual_words,
+            text_separator=text_separator,
+            batch_size=batch_size,
+            **kwargs,
         )
-        anonymized_result = anonymiser._operate(
-            text, analyzer_results, operators, OperatorType.Anonymize
+
+    keys = _result_cache_keys(
+        result_cache,
+        texts,
+        analyser=analyser,
+        language=language,
+        entities=entities,
+        allowed_entities=allowed_entities,
+        allowed_regex_entities=allowed_regex_entities,
+        mask_individual_words=mask_individual_words,
+        text_separator=text_separator,
+        kwargs=kwargs,
+    )
+    return result_cache.get_or_compute(
+        keys,
+        lambda positions: _analyse_texts(
+            [texts[i] for i in positions],
+            analyser=analyser,
+            language=language,
+            entities=entities,
+            allowed_entities=allowed_entities,
+            allowed_regex_entities=allowed_regex_entities,
+            mask_individual_words=mask_individual_words,
+            text_separator=text_separator,
+            batch_size=batch_size,
+            **kwargs,
+        ),
+    )
+
+
+def _analyse_texts(
+    texts: list[str],
+    analyser: AnalyzerEngine,
+    language: str,
+    entities: list[str],
+    allowed_entities: list[str],
+    allowed_regex_entities: list[str],
+    mask_individual_words: bool,
+    text_separator: str,
+    batch_size: int,
+    **kwargs,
+) -> list[list[RecognizerResult]]:
+    """
+    Analyses texts with an analyser that is ready to use (see analyse_batch).
+
+    Returns:
+        list[list[RecognizerResult]]: The filtered results for each text.
+    """
+    # Run spaCy over all texts at once
+    nlp_artifacts_list = [
+        nlp_artifacts
+        for _, nlp_artifacts in analyser.nlp_engine.process_batch(
+            texts, language=language, batch_size=batch_size
         )
+    ]
 
-    # TODO - could be managed by creating an Operatorconfig for "PHONE_NUMBER"
-    anonymised_text = anonymized_result.text.replace("PHONE_NUMBER", "NUMBER")
+    # Run the transformer models over all texts in batches, and check all regex matches together, then analyse each text
+    batch_results = []
+    with ExitStack() as stack:
+        for transformers_recogniser in get_transformers_recognisers(analyser):
+            stack.enter_context(
+                transformers_recogniser.prefetch(texts, batch_size=batch_size)
+            )
+        for pteredactyl_recogniser in get_pteredactyl_recognisers(analyser):
+            stack.enter_context(pteredactyl_recogniser.prefetch(texts, entities))
 
-    return highlight_text(anonymised_text) if highlight else anonymised_text
+        for text, nlp_artifacts in zip(texts, nlp_artifacts_list):
+            initial_results = analyser.analyze(
+                text,
+                language=language,
+                entities=entities,
+                nlp_artifacts=nlp_artifacts,
+                **kwargs,
+            )
+            batch_results.append(
+                _filter_results(
+                    text=text,
+                    initial_results=initial_results,
+                    allowed_entities=allowed_entities,
+                    allowed_regex_entities=allowed_regex_entities,
+                    mask_individual_words=mask_individual_words,
+                    text_separator=text_separator,
+                )
+            )
+
+    return batch_results
+
+
+def anonymise_batch(
+    texts: Iterable[str],
+    analyser: AnalyzerEngine | None = None,
+    entities: str | list[str] = DEFAULT_ENTITIES,
+    regex_entities: Sequence[str | PteredactylRecogniser] = DEFAULT_REGEX_ENTITIES,
+    highlight: bool = False,
+    replacement_lists: dict | None = None,
+    operators: dict[str, OperatorConfig] | None = None,
+    model_path: str = DEFAULT_NER_MODEL,
+    spacy_model: str | None = DEFAULT_SPACY_MODEL,
+    language: str = "en",
+    mask_individual_words: bool = False,
+    text_separator: str = " ",
+    rebuild_regex_recognisers: bool = True,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    result_cache: ResultCache | None = None,
+    **kwargs,
+) -> list[str]:
+    """
+    Anonymises a batch of texts, returning the anonymised texts in input order.
+    This is equivalent to calling anonymise on each text, but analysis is run with analyse_batch.
+
+    Args:
+        texts (Iterable[str]): The texts to be anonymised.
+        analyser (AnalyzerEngine, optional): An instance of AnalyzerEngine. If not provided, a new analyser will be created.
+        entities (list, optional): A list of entity types to anonymise. If not provided, a default list will be used.
+        regex_entities (list, optional): A list of regex entities or PteredactylRecognisers to analyse. If not provided, a default list will be used.
+        highlight (bool): If True, highlights the anonymised parts in the text.
+        replacement_lists: (dict, optional): A dictionary with entity types as keys and lists of replacement values (or SurrogatePools, see
+            pteredactyl.surrogates) for hide-in-plain-sight redaction. A replacement is drawn at random for each entity.
+        operators (dict, optional): A dictionary with entity types (or "DEFAULT") as keys and OperatorConfigs as values, to replace
+            entities with the replace, mask, hash or surrogate operator (see pteredactyl.renderer.render) rather than a placeholder.
+        model_path (str): The path to the model used for analysis. Used only if analyser not provided.
+        spacy_model (str, optional): The spaCy model to use. Used only if analyser not provided.
+        language (str): The language of the texts to be analysed. Defaults to "en".
+        mask_individual_words (bool): If True, prevents joining of next-door entities together. Defaults to False.
+        text_separator (str): Text separator. Default is whitespace.
+        rebuild_regex_recognisers (bool): If True, and an existing analyser is provided, the analyser's regex recognisers will be rebuilt before execution.
+        batch_size (int): Number of texts processed together by spaCy and the transformer model. Defaults to 32.
+        result_cache (ResultCache, optional): If provided, analysis results are looked up in and stored in this cache.
+        **kwargs: Additional keyword arguments for the analyzer.
+
+    Returns:
+        list[str]: The anonymised texts.
+
+    Example:
+        >>> analyser = create_analyser()
+        >>> anonymise_batch(["My name is John Doe", "My NHS number is 7890123450"], analyser=analyser)
+        ['My name is <PERSON>', 'My NHS number is <NHS_NUMBER>']
+    """
+    texts = list(texts)
+
+    # Prepare
+    entities, regex_entities, _, _ = _prepare_entities(
+        entities=entities, regex_entities=regex_entities
+    )
+
+    # Analyse the texts
+    batch_results = analyse_batch(
+        texts,
+        analyser=analyser,
+        entities=entities,
+        regex_entities=regex_entities,
+        model_path=model_path,
+        spacy_model=spacy_model,
+        language=language,
+        mask_individual_words=mask_individual_words,
+        text_separator=text_separator,
+        rebuild_regex_recognisers=rebuild_regex_recognisers,
+        batch_size=batch_size,
+        result_cache=result_cache,
+        **kwargs,
+    )
+
+    return _anonymise_results(
+        texts=texts,
+        batch_results=batch_results,
+        entities=entities,
+        highlight=highlight,
+        replacement_lists=replacement_lists,
+        mask_individual_words=mask_individual_words,
+        operators=operators,
+    )
 
 
 def anonymise_df(
@@ -326,20 +879,29 @@ def anonymise_df(
     regex_entities: Sequence[str | PteredactylRecogniser] = DEFAULT_REGEX_ENTITIES,
     highlight: bool = False,
     replacement_lists: dict | None = None,
+    operators: dict[str, OperatorConfig] | None = None,
     inplace: bool = False,
     model_path: str = DEFAULT_NER_MODEL,
-    spacy_model: str = DEFAULT_SPACY_MODEL,
+    spacy_model: str | None = DEFAULT_SPACY_MODEL,
     language: str = "en",
     mask_individual_words: bool = False,
     text_separator: str = " ",
     col_inplace: bool = False,
     col_header_append: str = "_redacted",
     rebuild_regex_recognisers: bool = True,
+    n_workers: int = 1,
+    executor: Executor | None = None,
+    shard_size: int | None = None,
+    share_model_weights: bool = False,
+    batch_size: int | None = None,
+    result_cache: ResultCache | None = None,
     **kwargs,
 ) -> pd.DataFrame:
     """
     Anonymises the given text by replacing specified entities by NER, and and regex entities by REGEX. Regex entities take priority and are analysed first.
     It is recommended to first create an analyser and feed this in to be reused.
+    Each distinct text across all the columns is analysed once, in batches, so repeated values cost nothing extra.
+    Missing values, numbers and blank strings are left as they are.
 
     Args:
     df (DataFrame): The DataFrame to anonymise.
@@ -348,9 +910,12 @@ def anonymise_df(
     entities (list, optional): A list of entity types to anonymize. If not provided, a default list will be used.
     regex_entities (list, optional): A list of regex entities or PteredactylRecognisers to analyse. If not provided, a default list will be used.
     highlight (bool): If True, highlights the anonymized parts in the text.
-    replacement_lists: (dict, optional): A dictionary with entity types as keys and lists of replacement values for hide-in-plain-sight redaction.
+    replacement_lists: (dict, optional): A dictionary with entity types as keys and lists of replacement values (or SurrogatePools, see
+            pteredactyl.surrogates) for hide-in-plain-sight redaction. A replacement is drawn at random for each entity.
+    operators (dict, optional): A dictionary with entity types (or "DEFAULT") as keys and OperatorConfigs as values, to replace
+            entities with the replace, mask, hash or surrogate operator (see pteredactyl.renderer.render) rather than a placeholder.
     model_path (str): The path to the model used for analysis. Used only if analyser not provided.
-    spacy_model (str): The spaCy model to use. Used only if analyser not provided.
+    spacy_model (str, optional): The spaCy model to use. Used only if analyser not provided.
     language (str): The language of the text to be analyzed. Defaults to "en". Used only if analyser not provided.
     mask_individual_words (bool): If True, prevents joining of next-door entities together.
             (i.e. Jane Smith becomes <PERSON> <PERSON> if True, or <PERSON> if False). Defaults to False.
@@ -359,56 +924,240 @@ def anonymise_df(
     col_inplace (bool): If True, replaces the original column with the anonymized column. If False, returns anonymised text in a new column.
     col_header_append (str): String to append to the header of the anonymised column.
     rebuild_regex_recognisers (bool): If True, and an existing analyser is provided, the analyser's regex recognisers will be rebuilt before execution.
+    n_workers (int): Number of worker processes. If greater than 1, rows are sharded across a process pool in which each worker
+            builds its own analyser from model_path and spacy_model (the analyser argument is not used). Defaults to 1.
+    executor (Executor, optional): A pool created by pteredactyl.parallel.create_anonymiser_pool, to reuse workers across calls.
+    shard_size (int, optional): Number of rows per shard sent to a worker. Defaults to four shards per worker.
+    share_model_weights (bool): If True, the model is loaded once and its weights are shared by all workers,
+            so memory does not grow with n_workers. Defaults to False.
+    batch_size (int, optional): Number of distinct texts analysed together (see analyse_batch). Defaults to 32.
+    result_cache (ResultCache, optional): If provided, analysis results are looked up in and stored in this cache, so repeated
+            text is analysed once. Not supported with n_workers or executor, as the cache is not shared between processes.
     **kwargs: Additional keyword arguments for analyse.
 
     Returns:
     DataFrame: The anonymized DataFrame.
     """
 
-    # Check Analyser
-    if not analyser:
-        analyser = create_analyser(
-            model_path=model_path,
-            spacy_model=spacy_model,
-            language=language,
-            regex_entities=regex_entities,
-        )
-    else:
-        if rebuild_regex_recognisers:
-            rebuild_analyser_regex_recognisers(
-                analyser=analyser, regex_entities=regex_entities
-            )
-
     # Prepare
     if type(column) not in [str, list]:
         raise TypeError("column argument must be a string or list of strings")
 
     columns = [column] if isinstance(column, str) else column
 
+    if n_workers > 1 or executor is not None:
+        if result_cache is not None:
+            raise ValueError(
+                "result_cache is not supported with n_workers or executor, as it is not shared between processes"
+            )
+
+        return _anonymise_df_parallel(
+            df=df,
+            columns=columns,
+            entities=entities,
+            regex_entities=regex_entities,
+            highlight=highlight,
+            replacement_lists=replacement_lists,
+            operators=operators,
+            inplace=inplace,
+            model_path=model_path,
+            spacy_model=spacy_model,
+            language=language,
+            mask_individual_words=mask_individual_words,
+            text_separator=text_separator,
+            col_inplace=col_inplace,
+            col_header_append=col_header_append,
+            n_workers=n_workers,
+            executor=executor,
+            shard_size=shard_size,
+            share_model_weights=share_model_weights,
+            **({} if batch_size is None else {"batch_size": batch_size}),
+            **kwargs,
+        )
+
+    # Check Analyser
+    analyser = _check_analyser(
+        analyser=analyser,
+        model_path=model_path,
+        spacy_model=spacy_model,
+        language=language,
+        regex_entities=regex_entities,
+        rebuild_regex_recognisers=rebuild_regex_recognisers,
+    )
+
     if not inplace:
         df = copy.copy(df)
 
-    def anonymize_row(text: str) -> str:
-        return anonymise(
-            text,
+    # Find the distinct texts across all columns at once. Missing values (e.g. NaN or None), numbers and blank strings
+    # are left as they are, and every other distinct text is analysed once however many cells it appears in
+    column_values = [df[col].to_numpy(dtype=object) for col in columns]
+    all_values = (
+        np.concatenate(column_values) if column_values else np.empty(0, dtype=object)
+    )
+    string_positions = np.flatnonzero(
+        np.fromiter(
+            (isinstance(value, str) for value in all_values),
+            dtype=bool,
+            count=len(all_values),
+        )
+    )
+    codes, unique_texts = pd.factorize(all_values[string_positions])
+    unique_texts = np.asarray(unique_texts, dtype=object)
+    text_codes = np.flatnonzero(
+        np.fromiter(
+            (text.strip() != "" for text in unique_texts),
+            dtype=bool,
+            count=len(unique_texts),
+        )
+    )
+
+    entities, regex_entities, _, _ = _prepare_entities(
+        entities=entities, regex_entities=regex_entities
+    )
+    batch_size = batch_size or DEFAULT_BATCH_SIZE
+
+    # Each distinct text is anonymised once, unless replacements are random for each cell
+    anonymise_each_cell = bool(replacement_lists) or has_random_operators(operators)
+    unique_anonymised = unique_texts.copy()
+    for start in tqdm(
+        range(0, len(text_codes), batch_size),
+        desc=f"Redacting {', '.join(repr(col) for col in columns)}",
+    ):
+        batch_codes = text_codes[start : start + batch_size]
+        texts = unique_texts[batch_codes].tolist()
+        batch_results = analyse_batch(
+            texts,
             analyser=analyser,
-            highlight=highlight,
             entities=entities,
             regex_entities=regex_entities,
-            replacement_lists=replacement_lists,
+            language=language,
             mask_individual_words=mask_individual_words,
             text_separator=text_separator,
             rebuild_regex_recognisers=False,
+            batch_size=batch_size,
+            result_cache=result_cache,
             **kwargs,
         )
+        if anonymise_each_cell:
+            for code, results in zip(batch_codes, batch_results):
+                unique_anonymised[code] = results
+        else:
+            unique_anonymised[batch_codes] = _anonymise_results(
+                texts=texts,
+                batch_results=batch_results,
+                entities=entities,
+                highlight=highlight,
+                replacement_lists=replacement_lists,
+                mask_individual_words=mask_individual_words,
+                operators=operators,
+            )
 
-    for col in tqdm(columns):
+    # Scatter the anonymised texts back into the cells they came from
+    anonymised_values = all_values.copy()
+    if anonymise_each_cell:
+        is_text = np.zeros(len(unique_texts), dtype=bool)
+        is_text[text_codes] = True
+        text_cells = is_text[codes]
+        positions = string_positions[text_cells]
+        anonymised_values[positions] = _anonymise_results(
+            texts=all_values[positions].tolist(),
+            batch_results=[
+                [copy.copy(result) for result in unique_anonymised[code]]
+                for code in codes[text_cells]
+            ],
+            entities=entities,
+            highlight=highlight,
+            replacement_lists=replacement_lists,
+            mask_individual_words=mask_individual_words,
+            operators=operators,
+        )
+    else:
+        anonymised_values[string_positions] = unique_anonymised[codes]
+
+    offset = 0
+    for col, values in zip(columns, column_values):
         new_col = f"{col}{col_header_append}"
-        tqdm.pandas(desc=f"Redacting '{col}'")
-        df[new_col] = df[col].progress_apply(anonymize_row)
+        if np.searchsorted(string_positions, offset + len(values)) > np.searchsorted(
+            string_positions, offset
+        ):
+            df[new_col] = pd.Series(
+                anonymised_values[offset : offset + len(values)], index=df.index
+            )
+        else:
+            # No text to anonymise, e.g. a numeric column
+            df[new_col] = df[col]
+        offset += len(values)
 
         if col_inplace:
             df[col] = df[new_col]
             df.drop(columns=[new_col], inplace=True)
 
     return df
+
+
+def _anonymise_df_parallel(
+    df: pd.DataFrame,
+    columns: list[str],
+    inplace: bool,
+    col_inplace: bool,
+    col_header_append: str,
+    n_workers: int,
+    executor: Executor | None,
+    shard_size: int | None,
+    share_model_weights: bool,
+    model_path: str,
+    spacy_model: str | None,
+    language: str,
+    regex_entities: Sequence[str | PteredactylRecogniser],
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    Anonymises DataFrame columns across a process pool (see anonymise_df), keeping the original row order.
+    """
+    from pteredactyl.parallel import anonymise_parallel, create_anonymiser_pool
+
+    own_executor = executor is None
+    if own_executor:
+        executor = create_anonymiser_pool(
+            n_workers=n_workers,
+            model_path=model_path,
+            spacy_model=spacy_model,
+            language=language,
+            regex_entities=regex_entities,
+            share_model_weights=share_model_weights,
+        )
+
+    if not inplace:
+        df = copy.copy(df)
+
+    try:
+        for col in columns:
+            new_col = f"{col}{col_header_append}"
+            values = df[col].tolist()
+
+            # Missing values (e.g. NaN or None) are left as they are
+            text_positions = [
+                i for i, value in enumerate(values) if isinstance(value, str)
+            ]
+            anonymised_texts = anonymise_parallel(
+                [values[i] for i in text_positions],
+                executor=executor,
+                shard_size=shard_size,
+                language=language,
+                regex_entities=regex_entities,
+                desc=f"Redacting '{col}'",
+                **kwargs,
+            )
+            for i, anonymised_text in zip(text_positions, anonymised_texts):
+                values[i] = anonymised_text
+
+            df[new_col] = pd.Series(values, index=df.index)
+
+            if col_inplace:
+                df[col] = df[new_col]
+                df.drop(columns=[new_col], inplace=True)
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    return df
@@ -1,3 +1,11 @@
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+
+# NumPy is imported by are_nhs_numbers when it is first called, so that is_nhs_number stays light to import
+if TYPE_CHECKING:
+    import numpy as np
+
+
 def is_nhs_number(nhs_number: str | int) -> bool:
     """
     Check if a given value is a valid NHS number.
@@ -56,3 +64,60 @@ def is_nhs_number(nhs_number: str | int) -> bool:
     # All checks passed
     else:
         return True
+
+
+# Multipliers of the first nine digits of an NHS number in its modulus 11 checksum
+NHS_NUMBER_WEIGHTS = (10, 9, 8, 7, 6, 5, 4, 3, 2)
+
+# Below this many candidates, checking each in Python is faster than building NumPy arrays
+MIN_VECTORISED_NHS_NUMBERS = 8
+
+
+def are_nhs_numbers(nhs_numbers: Sequence[str | int]) -> "np.ndarray":
+    """
+    Check whether each of a sequence of values is a valid NHS number, computing the checksums of all of them at once
+    with NumPy. Equivalent to [is_nhs_number(nhs_number) for nhs_number in nhs_numbers], but much faster for many values,
+    e.g. all the candidate matches in a text or in a DataFrame column.
+
+    Args:
+        nhs_numbers (Sequence[str | int]): The values to be checked. Spaces and hyphens are permitted, as for is_nhs_number.
+
+    Returns:
+        np.ndarray: A boolean array, True where the value is a valid NHS number.
+
+    Example:
+        >>> are_nhs_numbers(["943 476 5919", "943-476-5918", "12345"])
+        array([ True, False, False])
+    """
+    import numpy as np
+
+    valid = np.zeros(len(nhs_numbers), dtype=bool)
+
+    # Ten ASCII digits are checked together; other digit characters fall back to is_nhs_number
+    candidates, candidate_numbers = [], []
+    for i, nhs_number in enumerate(nhs_numbers):
+        nhs_number = (
+            str(nhs_number)
+            if isinstance(nhs_number, int)
+            else nhs_number.replace(" ", "").replace("-", "")
+        )
+        if len(nhs_number) == 10 and nhs_number.isdigit():
+            if nhs_number.isascii():
+                candidates.append(i)
+                candidate_numbers.append(nhs_number)
+            else:
+                valid[i] = is_nhs_number(nhs_number)
+
+    if len(candidates) < MIN_VECTORISED_NHS_NUMBERS:
+        for i, nhs_number in zip(candidates, candidate_numbers):
+            valid[i] = is_nhs_number(nhs_number)
+
+    else:
+        digits = np.frombuffer(
+            "".join(candidate_numbers).encode("ascii"), dtype=np.uint8
+        ).reshape(-1, 10).astype(np.int64) - ord("0")
+        checksums = 11 - (digits[:, :9] @ np.array(NHS_NUMBER_WEIGHTS)) % 11
+        checksums[checksums == 11] = 0
+        valid[candidates] = (checksums == digits[:, 9]) & (checksums != 10)
+
+    return valid
@@ -1,15 +1,18 @@
 import re
 from collections.abc import Callable, Sequence
 from pathlib import Path
-
-from presidio_analyzer import AnalyzerEngine
+from typing import TYPE_CHECKING
 
 from pteredactyl.exceptions import MissingRegexRecogniserError
-from pteredactyl.recognisers.pteredactyl_recogniser import (
-    PTEREDACTYL_RECOGNISER_NAME,
-    PteredactylRecogniser,
-)
-from pteredactyl.regex_check_functions import is_nhs_number
+from pteredactyl.recognisers.regex_engine import DIGITS
+from pteredactyl.regex_check_functions import are_nhs_numbers, is_nhs_number
+
+# presidio is imported when recognisers are built rather than at import, so that REGEX_ENTITIES
+# (and pteredactyl.defaults) can be used without loading presidio, spaCy and torch
+if TYPE_CHECKING:
+    from presidio_analyzer import AnalyzerEngine
+
+    from pteredactyl.recognisers.pteredactyl_recogniser import PteredactylRecogniser
 
 REGEX_ENTITIES = {
     # entity_type: (regex, check_function)
@@ -18,12 +21,26 @@ REGEX_ENTITIES = {
     "EMAIL_ADDRESS": (r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+", None),
 }
 
+# entity_type: function checking a list of matches at once, used in place of the check function in REGEX_ENTITIES
+REGEX_BATCH_CHECK_FUNCTIONS = {
+    "NHS_NUMBER": are_nhs_numbers,
+}
+
+# entity_type: characters at least one of which appears in every match, so texts without them are not scanned
+REGEX_PREFILTERS = {
+    "NHS_NUMBER": DIGITS,
+    "POSTCODE": DIGITS,
+    "EMAIL_ADDRESS": "@",
+}
+
 
 def build_pteredactyl_recogniser(
     entity_type: str,
     regex: str | re.Pattern,
     check_function: Callable[..., bool] | None,
-) -> PteredactylRecogniser:
+    prefilter: str | None = None,
+    batch_check_function: Callable[[list[str]], Sequence[bool]] | None = None,
+) -> "PteredactylRecogniser":
     """
     Build a custom regex ptererecogniser for pteredactyl.
 
@@ -31,6 +48,8 @@ def build_pteredactyl_recogniser(
         entity_type (str): The name of the entity to be recognised.
         regex (str or re.Pattern): The regular expression to match the entity.
         check_function (Callable, optional): A function to check if the matched string is a valid entity. Should take a single argument (the matched string) and return a boolean.
+        prefilter (str, optional): Characters at least one of which appears in every match (e.g. "@" for email addresses). Texts without any of them are skipped.
+        batch_check_function (Callable, optional): A function to check a list of matched strings at once, returning a boolean for each. Used instead of check_function where given.
 
     Returns:
         PteredactylRecogniser: A custom presidio EntityRecognizer object.
@@ -46,13 +65,19 @@ def build_pteredactyl_recogniser(
     ...                                           check_function=check_soton_landline)
     """
 
+    from pteredactyl.recognisers.pteredactyl_recogniser import PteredactylRecogniser
+
     regex = re.compile(regex) if isinstance(regex, str) else regex
     return PteredactylRecogniser(
-        entity_type=entity_type, regex=regex, check_function=check_function
+        entity_type=entity_type,
+        regex=regex,
+        check_function=check_function,
+        prefilter=prefilter,
+        batch_check_function=batch_check_function,
     )
 
 
-def fetch_pteredactyl_recogniser(entity_type: str) -> PteredactylRecogniser:
+def fetch_pteredactyl_recogniser(entity_type: str) -> "PteredactylRecogniser":
     if entity_type not in REGEX_ENTITIES.keys():
         raise MissingRegexRecogniserError(
             f"""Entity '{entity_type}' not found. Consider adding to the 'REGEX_ENTITIES' dictionary, or feeding a custom recogniser to regex_entities with:
@@ -64,12 +89,14 @@ def fetch_pteredactyl_recogniser(entity_type: str) -> PteredactylRecogniser:
         entity_type=entity_type,
         regex=REGEX_ENTITIES[entity_type][0],
         check_function=REGEX_ENTITIES[entity_type][1],
+        prefilter=REGEX_PREFILTERS.get(entity_type),
+        batch_check_function=REGEX_BATCH_CHECK_FUNCTIONS.get(entity_type),
     )
 
 
 def build_regex_entity_recogniser_list(
-    regex_entities: str | PteredactylRecogniser | Sequence[str | PteredactylRecogniser],
-) -> list[PteredactylRecogniser]:
+    regex_entities: "str | PteredactylRecogniser | Sequence[str | PteredactylRecogniser]",
+) -> list["PteredactylRecogniser"]:
     """
     Build a list of custom regex PteredactylRecognisers.
 
@@ -88,6 +115,8 @@ def build_regex_entity_recogniser_list(
     ...                                                   ])
     """
 
+    from pteredactyl.recognisers.pteredactyl_recogniser import PteredactylRecogniser
+
     regex_entity_recognisers = []
     if type(regex_entities) in (str, PteredactylRecogniser):
         regex_entities = [regex_entities]
@@ -104,10 +133,11 @@ def build_regex_entity_recogniser_list(
 
 
 def rebuild_analyser_regex_recognisers(
-    analyser: AnalyzerEngine, regex_entities: Sequence[str | PteredactylRecogniser]
+    analyser: "AnalyzerEngine", regex_entities: "Sequence[str | PteredactylRecogniser]"
 ) -> None:
     """
-    Rebuilds the analyser's regex recognisers with the supplied list of regex entities.
+    Rebuilds the analyser's regex recognisers with the supplied list of regex entities, combined into a single
+    CombinedPteredactylRecogniser so that their matches are checked together across batches of texts.
 
     Args:
         analyser (AnalyzerEngine): The analyser to rebuild.
@@ -116,7 +146,26 @@ def rebuild_analyser_regex_recognisers(
     Returns:
     """
 
+    from pteredactyl.recognisers.pteredactyl_recogniser import (
+        PTEREDACTYL_RECOGNISER_NAME,
+        CombinedPteredactylRecogniser,
+    )
+
+    # Keep the regex backend of the analyser's existing recogniser
+    regex_backend = next(
+        (
+            recogniser.regex_backend
+            for recogniser in analyser.registry.recognizers
+            if isinstance(recogniser, CombinedPteredactylRecogniser)
+        ),
+        "re",
+    )
+
     analyser.registry.remove_recognizer(PTEREDACTYL_RECOGNISER_NAME)
     pteredactyl_recognisers = build_regex_entity_recogniser_list(regex_entities)
-    for recogniser in pteredactyl_recognisers:
-        analyser.registry.add_recognizer(recogniser)
+    if pteredactyl_recognisers:
+        analyser.registry.add_recognizer(
+            CombinedPteredactylRecogniser(
+                pteredactyl_recognisers, regex_backend=regex_backend
+            )
+        )
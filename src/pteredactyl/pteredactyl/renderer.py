@@ -0,0 +1,318 @@
+import hashlib
+import os
+from collections import defaultdict
+from collections.abc import Callable, Mapping, Sequence
+
+from presidio_analyzer.recognizer_result import RecognizerResult
+from presidio_anonymizer.entities import OperatorConfig
+
+from pteredactyl.surrogates import sample_surrogates
+
+# Operators that render can apply to an entity
+OPERATORS = ("replace", "mask", "hash", "surrogate", "pseudonym")
+
+# Labels shown in the placeholders of entity types whose own name would be misleading
+PLACEHOLDER_LABELS = {"PHONE_NUMBER": "NUMBER"}
+
+HASH_TYPES = ("sha256", "sha512")
+
+_HIGHLIGHT_START = "\033[1m\033[33m"
+_HIGHLIGHT_END = "\033[0m"
+
+# A resolved span: (start, end, entity_type)
+Span = tuple[int, int, str]
+
+
+def resolve_conflicts(
+    text: str, results: Sequence[RecognizerResult], merge_adjacent: bool = True
+) -> list[Span]:
+    """
+    Resolves overlapping results into the spans to replace, as presidio's AnonymizerEngine does by default
+    (ConflictResolutionStrategy.MERGE_SIMILAR_OR_CONTAINED), but in one sweep over the sorted results:
+
+    1. Overlapping results of the same entity type are merged.
+    2. Results contained in another result are dropped, and of results with the same start and end, the one with the
+       highest score is kept.
+    3. If merge_adjacent, results of the same entity type separated only by spaces are merged.
+
+    The results are not modified.
+
+    Args:
+        text (str): The text the results were found in.
+        results (Sequence[RecognizerResult]): The analysis results.
+        merge_adjacent (bool): If True, merges results of the same entity type separated only by spaces
+            (e.g. Jane Smith becomes <PERSON> rather than <PERSON> <PERSON>). Defaults to True.
+
+    Returns:
+        list[Span]: (start, end, entity_type) of each span to replace, sorted by start.
+    """
+    # Ties keep the order of the results, as the sort is stable
+    sorted_results = sorted(
+        (
+            (result.start, result.end, result.entity_type, result.score)
+            for result in results
+        ),
+        key=lambda result: (result[0], result[1]),
+    )
+
+    # Merge overlapping results of the same entity type. A merged result takes the place of its last part, which
+    # decides which of several results with the same start, end and score is kept below
+    merged: list[tuple[int, int, str, float] | None] = []
+    last_of_type: dict[str, int] = {}
+    for start, end, entity_type, score in sorted_results:
+        index = last_of_type.get(entity_type)
+        if index is not None:
+            merged_start, merged_end, _, merged_score = merged[index]
+            if min(merged_end, end) > start:
+                merged[index] = None
+                start, end = merged_start, max(merged_end, end)
+                score = max(merged_score, score)
+        last_of_type[entity_type] = len(merged)
+        merged.append((start, end, entity_type, score))
+    merged = [result for result in merged if result is not None]
+
+    # Drop contained results, and lower scored results with the same start and end. Sorting longer results first
+    # means a result is contained in another if any result before its group of equal results ends at or after it
+    merged.sort(key=lambda result: (result[0], -result[1]))
+    spans: list[Span] = []
+    max_end = -1
+    i = 0
+    while i < len(merged):
+        start, end, _, _ = best = merged[i]
+        j = i + 1
+        while j < len(merged) and merged[j][0] == start and merged[j][1] == end:
+            if merged[j][3] >= best[3]:
+                best = merged[j]
+            j += 1
+
+        if max_end < end:
+            spans.append((start, end, best[2]))
+        max_end = max(max_end, end)
+        i = j
+
+    if not merge_adjacent:
+        return spans
+
+    # Merge results of the same entity type separated only by spaces
+    merged_spans: list[Span] = []
+    for start, end, entity_type in spans:
+        if merged_spans:
+            previous_start, previous_end, previous_entity_type = merged_spans[-1]
+            gap = text[previous_end:start]
+            if entity_type == previous_entity_type and gap and not gap.strip(" "):
+                merged_spans[-1] = (previous_start, end, entity_type)
+                continue
+        merged_spans.append((start, end, entity_type))
+
+    return merged_spans
+
+
+def has_random_operators(operators: Mapping[str, OperatorConfig] | None) -> bool:
+    """
+    Whether any of the operators can render the same text differently each time: surrogate, and hash without a salt.
+
+    Args:
+        operators (Mapping[str, OperatorConfig], optional): The operator for each entity type.
+
+    Returns:
+        bool: True if rendering is random.
+    """
+    return any(
+        operator_config.operator_name == "surrogate"
+        or (
+            operator_config.operator_name == "hash"
+            and not operator_config.params.get("salt")
+        )
+        for operator_config in (operators or {}).values()
+    )
+
+
+def _placeholder(entity_type: str) -> str:
+    return f"<{PLACEHOLDER_LABELS.get(entity_type, entity_type)}>"
+
+
+def _operator_config(
+    entity_type: str, operators: Mapping[str, OperatorConfig]
+) -> OperatorConfig:
+    return (
+        operators.get(entity_type)
+        or operators.get("DEFAULT")
+        or OperatorConfig("replace")
+    )
+
+
+def _build_operator(
+    entity_type: str, operator_config: OperatorConfig, entity_texts: Sequence[str]
+) -> Callable[[str], str]:
+    """Returns a function that renders the replacements of the spans of an entity type, whose texts are entity_texts,
+    in order."""
+    operator_name = operator_config.operator_name
+    params = operator_config.params
+
+    if operator_name == "replace":
+        new_value = params.get("new_value") or _placeholder(entity_type)
+        return lambda _: new_value
+
+    if operator_name == "mask":
+        masking_char = params.get("masking_char", "*")
+        chars_to_mask = params.get("chars_to_mask")
+        from_end = params.get("from_end", False)
+        if len(masking_char) != 1:
+            raise ValueError("masking_char must be a single character")
+
+        def mask(entity_text: str) -> str:
+            n_chars = len(entity_text) if chars_to_mask is None else chars_to_mask
+            n_chars = min(len(entity_text), max(n_chars, 0))
+            if from_end:
+                return (
+                    entity_text[: len(entity_text) - n_chars] + masking_char * n_chars
+                )
+            return masking_char * n_chars + entity_text[n_chars:]
+
+        return mask
+
+    if operator_name == "hash":
+        hash_type = params.get("hash_type", "sha256")
+        if hash_type not in HASH_TYPES:
+            raise ValueError(
+                f"Unsupported hash_type '{hash_type}'. Choose from {HASH_TYPES}"
+            )
+        salt = params.get("salt")
+        if isinstance(salt, str):
+            salt = salt.encode()
+        if salt is not None and len(salt) < 16:
+            raise ValueError("salt must be at least 16 bytes")
+
+        # Without a salt, each entity is hashed with a random salt, as in presidio's hash operator
+        return lambda entity_text: hashlib.new(
+            hash_type, entity_text.encode() + (salt or os.urandom(32))
+        ).hexdigest()
+
+    if operator_name == "surrogate":
+        values = params.get("values")
+        if values is None or (isinstance(values, Sequence) and len(values) == 0):
+            raise ValueError(f"The surrogate operator for {entity_type} needs values")
+        # An independent surrogate for each span, drawn together
+        surrogates = iter(
+            sample_surrogates(values, len(entity_texts), rng=params.get("rng"))
+        )
+        return lambda _: next(surrogates)
+
+    if operator_name == "pseudonym":
+        store = params.get("store")
+        if store is None:
+            raise ValueError(f"The pseudonym operator for {entity_type} needs a store")
+        pseudonyms = iter(store.lookup(entity_type, entity_texts))
+        return lambda _: next(pseudonyms)
+
+    raise ValueError(
+        f"Unsupported operator '{operator_name}' for {entity_type}. Choose from {OPERATORS}"
+    )
+
+
+def render(
+    text: str,
+    spans: Sequence[Span],
+    operators: Mapping[str, OperatorConfig] | None = None,
+    highlight: bool = False,
+) -> str:
+    """
+    Builds the anonymised text in one pass, replacing each span with the output of its entity type's operator.
+    Entity types without an operator (and without a "DEFAULT" operator) are replaced with a placeholder, e.g. <PERSON>,
+    labelled as in PLACEHOLDER_LABELS (so PHONE_NUMBER becomes <NUMBER>).
+
+    The operators are:
+        - replace: the placeholder, or params["new_value"].
+        - mask: params["masking_char"] (default "*") over params["chars_to_mask"] characters (default all),
+          from the end if params["from_end"].
+        - hash: the params["hash_type"] ("sha256" or "sha512") hex digest of the text with params["salt"], or with a
+          random salt for each entity if no salt is given.
+        - surrogate: a value drawn at random for each span from params["values"], a list of values, a SurrogatePool or
+          the path of a surrogate pool file (see pteredactyl.surrogates), optionally with params["rng"], a NumPy
+          random Generator.
+        - pseudonym: the same surrogate for every occurrence of an entity, from params["store"], a PseudonymStore (see
+          pteredactyl.pseudonyms).
+
+    Args:
+        text (str): The text to anonymise.
+        spans (Sequence[Span]): (start, end, entity_type) of each span, from resolve_conflicts.
+        operators (Mapping[str, OperatorConfig], optional): The operator for each entity type, and optionally a
+            "DEFAULT" operator for the rest.
+        highlight (bool): If True, highlights the replacements. Defaults to False.
+
+    Returns:
+        str: The anonymised text.
+
+    Example:
+        >>> spans = [(11, 19, "PERSON"), (31, 42, "PHONE_NUMBER")]
+        >>> render("My name is John Doe and I'm on 07700900123", spans)
+        "My name is <PERSON> and I'm on <NUMBER>"
+        >>> render("My name is John Doe", [(11, 19, "PERSON")], {"PERSON": OperatorConfig("mask", {"chars_to_mask": 4})})
+        'My name is **** Doe'
+    """
+    operators = operators or {}
+    entity_operators: dict[str, Callable[[str], str]] = {}
+    entity_texts: dict[str, list[str]] = defaultdict(list)
+    for start, end, entity_type in spans:
+        entity_texts[entity_type].append(text[start:end])
+
+    pieces = []
+    position = 0
+    for start, end, entity_type in spans:
+        entity_operator = entity_operators.get(entity_type)
+        if entity_operator is None:
+            entity_operator = entity_operators[entity_type] = _build_operator(
+                entity_type,
+                _operator_config(entity_type, operators),
+                entity_texts[entity_type],
+            )
+
+        replacement = entity_operator(text[start:end])
+        # Text between overlapping spans belongs to the later span
+        pieces.append(text[position:start])
+        pieces.append(
+            f"{_HIGHLIGHT_START}{replacement}{_HIGHLIGHT_END}"
+            if highlight
+            else replacement
+        )
+        position = max(position, end)
+
+    pieces.append(text[position:])
+
+    return "".join(pieces)
+
+
+def lookup_pseudonyms(
+    texts: Sequence[str],
+    batch_spans: Sequence[Sequence[Span]],
+    operators: Mapping[str, OperatorConfig] | None,
+) -> None:
+    """
+    Looks up the pseudonyms of every span of a batch of texts with one bulk lookup per PseudonymStore, so that
+    rendering each text then finds its pseudonyms in the store's in-memory cache.
+
+    Args:
+        texts (Sequence[str]): The texts.
+        batch_spans (Sequence[Sequence[Span]]): The spans of each text, from resolve_conflicts.
+        operators (Mapping[str, OperatorConfig], optional): The operator for each entity type.
+    """
+    if not operators or not any(
+        operator_config.operator_name == "pseudonym"
+        for operator_config in operators.values()
+    ):
+        return
+
+    # Stores are grouped by identity, as two stores can share a database
+    store_entities: dict[int, tuple[object, list[tuple[str, str]]]] = {}
+    for text, spans in zip(texts, batch_spans):
+        for start, end, entity_type in spans:
+            operator_config = _operator_config(entity_type, operators)
+            if operator_config.operator_name == "pseudonym":
+                store = operator_config.params.get("store")
+                if store is not None:
+                    store_entities.setdefault(id(store), (store, []))[1].append(
+                        (entity_type, text[start:end])
+                    )
+
+    for store, entities in store_entities.values():
+        store.lookup_many(entities)
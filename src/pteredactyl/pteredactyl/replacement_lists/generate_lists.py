@@ -1,29 +1,39 @@
+import functools
 import random
 from pathlib import Path
 
 import pandas as pd
 
-REPLACEMENT_RAW_DIR = "replacement_lists/raw/"
+from pteredactyl.surrogates import SURROGATE_POOL_SUFFIX, write_surrogate_pool
+
+REPLACEMENT_RAW_DIR = Path(__file__).parent / "raw"
+
+NAMES_FILE = "Forename_Autumn2014.csv"
 
 
 def generate_locations():
     location_list = []
-    with open(Path(REPLACEMENT_RAW_DIR / "uk-towns-and-cities-a.txt", "r")) as f:
+    with open(REPLACEMENT_RAW_DIR / "uk-towns-and-cities-a.txt") as f:
         for line in f:
             name = line.strip()
-            location_list.append(name)
+            if name:
+                location_list.append(name)
 
     return location_list
 
 
+@functools.lru_cache(maxsize=1)
+def _read_names() -> pd.DataFrame:
+    # Forenames and surnames are both read from the one file, once
+    return pd.read_csv(REPLACEMENT_RAW_DIR / NAMES_FILE)
+
+
 def generate_forenames():
-    forenames_df = pd.read_csv(Path(REPLACEMENT_RAW_DIR / "Forename_Autumn2014.csv"))
-    return forenames_df["Forename"].to_list()
+    return _read_names()["Forename"].dropna().to_list()
 
 
 def generate_surnames():
-    surnames_df = pd.read_csv(Path(REPLACEMENT_RAW_DIR / "Forename_Autumn2014.csv"))
-    return surnames_df["Surname"].to_list()
+    return _read_names()["Surname"].dropna().to_list()
 
 
 def generate_names(num=1000):
@@ -35,3 +45,33 @@ def generate_names(num=1000):
         names.append(f"{random.choice(forenames)} {random.choice(surnames)}")
 
     return names
+
+
+def compile_surrogate_pools(output_dir: str | Path, num_names: int = 100_000) -> dict:
+    """
+    Compiles the raw replacement lists into surrogate pool files, which can be passed as replacement_lists values.
+    Lists whose raw files are not present are skipped.
+
+    Args:
+        output_dir (str | Path): Directory to write the pool files to.
+        num_names (int): Number of full names to generate for the PERSON pool. Defaults to 100,000.
+
+    Returns:
+        dict: The pool file for each entity type.
+
+    Example:
+        >>> replacement_lists = compile_surrogate_pools("surrogates")
+        >>> anonymise(text, replacement_lists=replacement_lists)
+    """
+    output_dir = Path(output_dir)
+    pools = {
+        "LOCATION": write_surrogate_pool(
+            generate_locations(), output_dir / f"locations{SURROGATE_POOL_SUFFIX}"
+        )
+    }
+    if (REPLACEMENT_RAW_DIR / NAMES_FILE).exists():
+        pools["PERSON"] = write_surrogate_pool(
+            generate_names(num_names), output_dir / f"names{SURROGATE_POOL_SUFFIX}"
+        )
+
+    return pools
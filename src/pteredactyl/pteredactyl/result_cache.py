@@ -0,0 +1,296 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from concurrent.futures import Future
+from typing import Any
+
+from presidio_analyzer import AnalyzerEngine, EntityRecognizer
+from presidio_analyzer.recognizer_result import RecognizerResult
+
+from pteredactyl.recognisers.pteredactyl_recogniser import (
+    CombinedPteredactylRecogniser,
+    PteredactylRecogniser,
+)
+from pteredactyl.recognisers.transformers_recogniser import TransformersRecogniser
+
+# A cached result: (entity_type, start, end, score, analysis_explanation, recognition_metadata) for each entity
+_CachedResults = tuple[tuple[str, int, int, float, Any, dict | None], ...]
+
+
+def _callable_name(function: Callable | None) -> str | None:
+    """Names a check function. Lambdas and nested functions also carry their id, as their names are not unique."""
+    if function is None:
+        return None
+    name = f"{getattr(function, '__module__', '')}.{getattr(function, '__qualname__', repr(function))}"
+    return f"{name}@{id(function)}" if "<" in name else name
+
+
+def _pteredactyl_recogniser_fingerprint(recogniser: PteredactylRecogniser) -> tuple:
+    return (
+        recogniser.entity_type,
+        recogniser.regex.pattern,
+        recogniser.regex.flags,
+        _callable_name(recogniser.check_function),
+        _callable_name(getattr(recogniser, "batch_check_function", None)),
+        getattr(recogniser, "prefilter", None),
+        recogniser.expected_confidence_level,
+        tuple(recogniser.supported_entities),
+    )
+
+
+def _recogniser_fingerprint(recogniser: EntityRecognizer) -> tuple:
+    if isinstance(recogniser, TransformersRecogniser):
+        # Everything that changes the entities found, or their scores and explanations. Batching and threading
+        # settings (BATCH_SIZE, CHUNK_WORKERS) do not, so are left out
+        return (
+            "transformers",
+            recogniser.model_path,
+            recogniser.backend,
+            recogniser.quantize,
+            tuple(recogniser.optimizations),
+            tuple(recogniser.supported_entities),
+            tuple(sorted(recogniser.entity_mapping.items())),
+            tuple(sorted(recogniser.model_to_presidio_mapping.items())),
+            tuple(recogniser.ignore_labels),
+            recogniser.aggregation_mechanism,
+            recogniser.chunk_length,
+            recogniser.text_overlap_length,
+            recogniser.chunk_stride,
+            recogniser.id_entity_name,
+            recogniser.id_score_reduction,
+            recogniser.default_explanation,
+        )
+    if isinstance(recogniser, CombinedPteredactylRecogniser):
+        return (
+            "regex",
+            *(
+                _pteredactyl_recogniser_fingerprint(pteredactyl_recogniser)
+                for pteredactyl_recogniser in recogniser.recognisers
+            ),
+        )
+    if isinstance(recogniser, PteredactylRecogniser):
+        return ("regex", _pteredactyl_recogniser_fingerprint(recogniser))
+    return (
+        type(recogniser).__qualname__,
+        recogniser.name,
+        tuple(recogniser.supported_entities),
+        id(recogniser),
+    )
+
+
+def analyser_fingerprint(analyser: AnalyzerEngine) -> str:
+    """
+    Fingerprints what determines an analyser's results: its NER models (and their backends, label mappings and
+    chunking settings), its regex recognisers
+    (patterns, check functions and scores), any other recognisers, and its NLP engine.
+
+    Args:
+        analyser (AnalyzerEngine): The analyser to fingerprint.
+
+    Returns:
+        str: The fingerprint, which changes whenever the analyser's recognisers do.
+    """
+    return repr(
+        (
+            type(analyser.nlp_engine).__qualname__,
+            getattr(analyser.nlp_engine, "models", None),
+            tuple(
+                _recogniser_fingerprint(recogniser)
+                for recogniser in analyser.registry.recognizers
+            ),
+        )
+    )
+
+
+class ResultCache:
+    """
+    A bounded, thread-safe cache of analysis results, keyed by a hash of the text and of everything else the results
+    depend on (the analyser's models and regex recognisers, the entities and the analysis options). Repeated texts,
+    such as templated phrases and copied-forward notes, are analysed once. Only the hash of each text and the spans
+    found in it are kept, not the text itself.
+
+    The least recently used results are evicted once more than max_entries texts are cached. Concurrent requests for
+    the same uncached text are collapsed into one computation, which the other requests wait for.
+
+    Args:
+        max_entries (int): Maximum number of texts whose results are kept. Defaults to 100,000.
+
+    Example:
+        >>> result_cache = ResultCache(max_entries=50_000)
+        >>> df = anonymise_df(df, column="text", analyser=analyser, batch_size=32, result_cache=result_cache)
+        >>> result_cache.stats
+        {'hits': 3521, 'misses': 6479, 'coalesced': 0, 'evictions': 0, 'size': 6479, 'hit_rate': 0.3521}
+    """
+
+    def __init__(self, max_entries: int = 100_000):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.max_entries = max_entries
+
+        self._entries: OrderedDict[bytes, _CachedResults] = OrderedDict()
+        self._in_flight: dict[bytes, Future] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def stats(self) -> dict[str, int | float]:
+        """
+        Hit-rate statistics: hits (results served from the cache, including repeats within a batch), misses (texts
+        analysed), coalesced (requests that waited for the same text to be analysed by another thread), evictions,
+        the number of cached texts, and the hit rate of all requests.
+        """
+        with self._lock:
+            requests = self._hits + self._misses + self._coalesced
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "evictions": self._evictions,
+                "size": len(self._entries),
+                "hit_rate": (
+                    (self._hits + self._coalesced) / requests if requests else 0.0
+                ),
+            }
+
+    def clear(self) -> None:
+        """Removes all cached results and resets the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._coalesced = self._evictions = 0
+
+    def keys(self, texts: Sequence[str], **context: Any) -> list[bytes]:
+        """
+        Hashes each text together with the context its results depend on.
+
+        Args:
+            texts (Sequence[str]): The texts.
+            **context: Everything else the results depend on, e.g. the analyser fingerprint, language and entities.
+
+        Returns:
+            list[bytes]: A key for each text.
+        """
+        context_hash = hashlib.blake2b(
+            repr(sorted(context.items())).encode(), digest_size=16
+        )
+        keys = []
+        for text in texts:
+            text_hash = context_hash.copy()
+            text_hash.update(text.encode("utf-8", "surrogatepass"))
+            keys.append(text_hash.digest())
+        return keys
+
+    def get_or_compute(
+        self,
+        keys: Sequence[bytes],
+        compute: Callable[[list[int]], list[list[RecognizerResult]]],
+    ) -> list[list[RecognizerResult]]:
+        """
+        Returns the results for each key, computing those that are not cached.
+
+        Args:
+            keys (Sequence[bytes]): The keys of the texts, from ResultCache.keys.
+            compute (Callable): Called once with the positions of the texts to analyse (one per distinct uncached
+                key), returning their results in the same order.
+
+        Returns:
+            list[list[RecognizerResult]]: The results for each key, as new RecognizerResults.
+        """
+        cached: list[_CachedResults | None] = [None] * len(keys)
+        owned: dict[bytes, list[int]] = {}
+        waiting: dict[bytes, tuple[Future, list[int]]] = {}
+
+        with self._lock:
+            for position, key in enumerate(keys):
+                if key in owned:
+                    owned[key].append(position)
+                    self._hits += 1
+                elif key in waiting:
+                    waiting[key][1].append(position)
+                    self._coalesced += 1
+                elif key in self._entries:
+                    self._entries.move_to_end(key)
+                    cached[position] = self._entries[key]
+                    self._hits += 1
+                elif key in self._in_flight:
+                    waiting[key] = (self._in_flight[key], [position])
+                    self._coalesced += 1
+                else:
+                    self._in_flight[key] = Future()
+                    owned[key] = [position]
+                    self._misses += 1
+
+        if owned:
+            owned_keys = list(owned)
+            try:
+                computed = compute([owned[key][0] for key in owned_keys])
+            except BaseException as e:
+                with self._lock:
+                    futures = [self._in_flight.pop(key) for key in owned_keys]
+                for future in futures:
+                    future.set_exception(e)
+                raise
+
+            with self._lock:
+                futures = []
+                for key, results in zip(owned_keys, computed):
+                    packed = self._pack(results)
+                    self._entries[key] = packed
+                    for position in owned[key]:
+                        cached[position] = packed
+                    futures.append((self._in_flight.pop(key), packed))
+                self._evict()
+
+            for future, packed in futures:
+                future.set_result(packed)
+
+        # Wait for texts being analysed by other threads
+        for future, positions in waiting.values():
+            packed = future.result()
+            for position in positions:
+                cached[position] = packed
+
+        return [self._unpack(packed) for packed in cached]
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    @staticmethod
+    def _pack(results: list[RecognizerResult]) -> _CachedResults:
+        return tuple(
+            (
+                result.entity_type,
+                result.start,
+                result.end,
+                result.score,
+                result.analysis_explanation,
+                result.recognition_metadata,
+            )
+            for result in results
+        )
+
+    @staticmethod
+    def _unpack(packed: _CachedResults) -> list[RecognizerResult]:
+        return [
+            RecognizerResult(
+                entity_type=entity_type,
+                start=start,
+                end=end,
+                score=score,
+                analysis_explanation=analysis_explanation,
+                recognition_metadata=(
+                    dict(recognition_metadata) if recognition_metadata else None
+                ),
+            )
+            for entity_type, start, end, score, analysis_explanation, recognition_metadata in packed
+        ]
@@ -0,0 +1,519 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Any
+
+from presidio_anonymizer.entities import OperatorConfig
+
+from pteredactyl.asynchronous import MicroBatcher
+from pteredactyl.defaults import (
+    DEFAULT_ENTITIES,
+    DEFAULT_NER_MODEL,
+    DEFAULT_REGEX_ENTITIES,
+    DEFAULT_SPACY_MODEL,
+)
+from pteredactyl.exceptions import MissingRegexRecogniserError
+from pteredactyl.redactor import AnalyserCache
+from pteredactyl.regex_entities import REGEX_ENTITIES
+from pteredactyl.renderer import OPERATORS
+
+log = logging.getLogger(__name__)
+
+# Operators that can be requested in JSON. The pseudonym operator needs a PseudonymStore object
+SERVER_OPERATORS = tuple(operator for operator in OPERATORS if operator != "pseudonym")
+
+_ENDPOINTS = {
+    "/analyse": ("analyse", False),
+    "/anonymise": ("anonymise", False),
+    "/analyse_batch": ("analyse", True),
+    "/anonymise_batch": ("anonymise", True),
+}
+
+
+class RequestError(Exception):
+    """A request that is answered with an HTTP error status and a JSON error message."""
+
+    def __init__(
+        self, status: int, message: str, headers: Sequence[tuple[str, str]] = ()
+    ):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers
+
+
+class RedactionService:
+    """
+    A JSON HTTP redaction service, as an ASGI application, so it can be run by uvicorn, or by gunicorn with uvicorn
+    workers, with several worker processes.
+
+    Endpoints:
+        - POST /analyse and /anonymise: {"text": ...}, returning {"results": [...]} or {"text": ...}.
+        - POST /analyse_batch and /anonymise_batch: {"texts": [...]}, returning {"results": [[...], ...]} or
+          {"texts": [...]}.
+        - GET /health: 200 while the process is serving (liveness).
+        - GET /ready: 200 once the models are loaded, 503 while they load or while shutting down (readiness).
+
+    Requests can also give "model" (one of models, defaulting to the first), "entities", "regex_entities" (names),
+    "mask_individual_words" and, to anonymise, "operators": {entity type: {"type": operator, ...params}}.
+
+    The models are loaded in the background when the service starts. Every text is analysed by its model's
+    MicroBatcher, so texts from concurrent requests are analysed together. The service accepts at most max_queue
+    texts at a time, and answers 429 (Too Many Requests) beyond that, rather than letting latency grow without bound.
+    On shutdown, new requests are refused with 503, and texts already accepted are finished before the inference
+    threads stop.
+
+    Args:
+        models (Sequence[str]): The NER models to load and serve. The first is the default.
+        spacy_model (str, optional): The spaCy model used to build each analyser.
+        regex_entities (list, optional): Regex entities used to build each analyser.
+        max_batch_size (int): Maximum number of texts analysed together. Defaults to 32.
+        max_wait_ms (float): Maximum time, in milliseconds, a text waits for others to join its batch. Defaults to 5.
+        max_queue (int): Maximum number of texts accepted but not yet answered. Defaults to 1024.
+        max_texts_per_request (int): Maximum number of texts in one batch request. Defaults to 256.
+        max_body_bytes (int): Maximum size of a request body. Defaults to 10 MB.
+        shutdown_timeout (float): Maximum time, in seconds, to wait for accepted texts on shutdown. Defaults to 30.
+        analyser_cache (AnalyserCache, optional): The cache to load analysers from, instead of one built with
+            spacy_model and regex_entities. Every model stays loaded while the service runs.
+
+    Example:
+        >>> app = RedactionService(models=["StanfordAIMI/stanford-deidentifier-base"], max_queue=512)
+        >>> # uvicorn.run(app, port=8000)
+    """
+
+    def __init__(
+        self,
+        models: Sequence[str] = (DEFAULT_NER_MODEL,),
+        spacy_model: str | None = DEFAULT_SPACY_MODEL,
+        regex_entities: Sequence[str] = DEFAULT_REGEX_ENTITIES,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_queue: int = 1024,
+        max_texts_per_request: int = 256,
+        max_body_bytes: int = 10_000_000,
+        shutdown_timeout: float = 30.0,
+        analyser_cache: AnalyserCache | None = None,
+    ):
+        if not models:
+            raise ValueError("At least one model is needed")
+
+        self.models = list(models)
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_queue = max_queue
+        self.max_texts_per_request = max_texts_per_request
+        self.max_body_bytes = max_body_bytes
+        self.shutdown_timeout = shutdown_timeout
+        self.analyser_cache = analyser_cache or AnalyserCache(
+            spacy_model=spacy_model, regex_entities=regex_entities
+        )
+
+        self.batchers: dict[str, MicroBatcher] = {}
+        self.pending = 0
+        self.draining = False
+        self._loading: asyncio.Task | None = None
+        self._load_error: BaseException | None = None
+        self._idle: asyncio.Event | None = None
+
+    @property
+    def ready(self) -> bool:
+        """True once every model is loaded, until the service starts shutting down."""
+        return not self.draining and len(self.batchers) == len(self.models)
+
+    async def __call__(
+        self,
+        scope: dict,
+        receive: Callable[[], Awaitable[dict]],
+        send: Callable[[dict], Awaitable[None]],
+    ) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            self.start()
+            await self._http(scope, receive, send)
+
+    def start(self) -> None:
+        """Starts loading the models in the background, if not already started. Called by the lifespan startup."""
+        if self._loading is None:
+            self._idle = asyncio.Event()
+            self._idle.set()
+            self._loading = asyncio.get_running_loop().create_task(self._load())
+
+    async def _load(self) -> None:
+        for model in self.models:
+            try:
+                log.info(f"Loading model: {model}")
+                analyser = await asyncio.to_thread(self.analyser_cache.get, model)
+            except Exception as error:
+                log.exception(f"Failed to load model: {model}")
+                self._load_error = error
+                return
+            self.batchers[model] = MicroBatcher(
+                analyser,
+                max_batch_size=self.max_batch_size,
+                max_wait_ms=self.max_wait_ms,
+            )
+        log.info("Models loaded, ready to serve")
+
+    async def shutdown(self) -> None:
+        """Refuses new requests, waits for accepted texts (up to shutdown_timeout), then stops the inference threads."""
+        self.draining = True
+        if self._idle is not None:
+            try:
+                await asyncio.wait_for(self._idle.wait(), self.shutdown_timeout)
+            except asyncio.TimeoutError:
+                log.warning(
+                    f"Shutting down with {self.pending} texts still being redacted"
+                )
+        if self._loading is not None:
+            self._loading.cancel()
+        for batcher in self.batchers.values():
+            await asyncio.to_thread(batcher.close)
+
+    async def _lifespan(
+        self,
+        receive: Callable[[], Awaitable[dict]],
+        send: Callable[[dict], Awaitable[None]],
+    ) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(
+        self,
+        scope: dict,
+        receive: Callable[[], Awaitable[dict]],
+        send: Callable[[dict], Awaitable[None]],
+    ) -> None:
+        path, method = scope["path"].rstrip("/") or "/", scope["method"]
+        try:
+            if path == "/health":
+                _check_method(method, "GET")
+                status, body = 200, {"status": "ok"}
+            elif path == "/ready":
+                _check_method(method, "GET")
+                status, body = self._readiness()
+            elif path in _ENDPOINTS:
+                _check_method(method, "POST")
+                status = 200
+                body = await self._redact(
+                    *_ENDPOINTS[path], await self._read_json(receive)
+                )
+            else:
+                raise RequestError(404, f"Not found: {path}")
+            headers: Sequence[tuple[str, str]] = ()
+        except RequestError as error:
+            status, body, headers = error.status, {"error": str(error)}, error.headers
+        except Exception:
+            log.exception(f"Error handling {method} {path}")
+            status, body, headers = 500, {"error": "Internal server error"}, ()
+
+        await _send_json(send, status, body, headers)
+
+    def _readiness(self) -> tuple[int, dict]:
+        if self.ready:
+            return 200, {"status": "ready", "models": self.models}
+        if self.draining:
+            return 503, {"status": "shutting down"}
+        if self._load_error is not None:
+            return 503, {"status": "failed", "error": str(self._load_error)}
+        return 503, {"status": "loading"}
+
+    async def _read_json(self, receive: Callable[[], Awaitable[dict]]) -> Any:
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise RequestError(400, "Client disconnected")
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.max_body_bytes:
+                raise RequestError(
+                    413, f"Request body is larger than {self.max_body_bytes} bytes"
+                )
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+
+        try:
+            return json.loads(b"".join(chunks))
+        except ValueError as error:
+            raise RequestError(400, f"Invalid JSON: {error}") from None
+
+    async def _redact(self, action: str, batch: bool, request: Any) -> dict:
+        if not isinstance(request, dict):
+            raise RequestError(400, "The request body must be a JSON object")
+
+        if batch:
+            texts = request.get("texts")
+            if not isinstance(texts, list) or not all(
+                isinstance(text, str) for text in texts
+            ):
+                raise RequestError(400, '"texts" must be a list of strings')
+            if len(texts) > self.max_texts_per_request:
+                raise RequestError(
+                    413, f"At most {self.max_texts_per_request} texts per request"
+                )
+        else:
+            text = request.get("text")
+            if not isinstance(text, str):
+                raise RequestError(400, '"text" must be a string')
+            texts = [text]
+
+        model = request.get("model", self.models[0])
+        if model not in self.models:
+            raise RequestError(
+                400, f"Unknown model '{model}'. Choose from {self.models}"
+            )
+        options = _parse_options(request, anonymise=action == "anonymise")
+
+        if self.draining:
+            raise RequestError(503, "The service is shutting down")
+        batcher = self.batchers.get(model)
+        if batcher is None:
+            raise RequestError(
+                503, "The models are still loading", [("retry-after", "5")]
+            )
+        if self.pending + len(texts) > self.max_queue:
+            raise RequestError(
+                429, "Too many texts are being redacted", [("retry-after", "1")]
+            )
+
+        self.pending += len(texts)
+        self._idle.clear()
+        try:
+            redact = batcher.anonymise if action == "anonymise" else batcher.analyse
+            # Wait for every text, even after one fails, so that pending only counts texts that are still queued
+            outputs = await asyncio.gather(
+                *(redact(text, **options) for text in texts), return_exceptions=True
+            )
+        finally:
+            self.pending -= len(texts)
+            if not self.pending:
+                self._idle.set()
+
+        error = next(
+            (output for output in outputs if isinstance(output, BaseException)), None
+        )
+        if isinstance(error, (ValueError, TypeError, MissingRegexRecogniserError)):
+            # Invalid options, e.g. operator parameters, are found when the texts are redacted
+            message = error.args[0] if error.args else type(error).__name__
+            raise RequestError(400, str(message)) from None
+        if error is not None:
+            raise error
+
+        if action == "analyse":
+            outputs = [
+                [
+                    {
+                        "entity_type": result.entity_type,
+                        "start": result.start,
+                        "end": result.end,
+                        "score": result.score,
+                    }
+                    for result in results
+                ]
+                for results in outputs
+            ]
+            return {"results": outputs} if batch else {"results": outputs[0]}
+        return {"texts": outputs} if batch else {"text": outputs[0]}
+
+
+def _check_method(method: str, allowed: str) -> None:
+    if method != allowed:
+        raise RequestError(405, f"Method {method} not allowed", [("allow", allowed)])
+
+
+def _parse_options(request: dict, anonymise: bool) -> dict:
+    """Validates the redaction options of a request, returning them as MicroBatcher keyword arguments."""
+    options: dict[str, Any] = {}
+
+    entities = request.get("entities", DEFAULT_ENTITIES)
+    if isinstance(entities, str):
+        entities = [entities]
+    if not isinstance(entities, list) or not all(
+        isinstance(entity, str) for entity in entities
+    ):
+        raise RequestError(400, '"entities" must be a list of strings')
+    options["entities"] = entities
+
+    regex_entities = request.get("regex_entities", DEFAULT_REGEX_ENTITIES)
+    if not isinstance(regex_entities, list) or not all(
+        isinstance(entity, str) for entity in regex_entities
+    ):
+        raise RequestError(400, '"regex_entities" must be a list of strings')
+    unknown = [entity for entity in regex_entities if entity not in REGEX_ENTITIES]
+    if unknown:
+        raise RequestError(
+            400,
+            f"Unknown regex entities {unknown}. Choose from {list(REGEX_ENTITIES)}",
+        )
+    options["regex_entities"] = regex_entities
+
+    mask_individual_words = request.get("mask_individual_words", False)
+    if not isinstance(mask_individual_words, bool):
+        raise RequestError(400, '"mask_individual_words" must be true or false')
+    options["mask_individual_words"] = mask_individual_words
+
+    if anonymise and request.get("operators") is not None:
+        operators = request["operators"]
+        if not isinstance(operators, dict) or not all(
+            isinstance(operator, dict) for operator in operators.values()
+        ):
+            raise RequestError(
+                400, '"operators" must map entity types to {"type": ..., ...params}'
+            )
+        for entity_type, operator in operators.items():
+            if operator.get("type") not in SERVER_OPERATORS:
+                raise RequestError(
+                    400,
+                    f"Unsupported operator for {entity_type}. Choose from {SERVER_OPERATORS}",
+                )
+            if operator["type"] == "surrogate":
+                # A string would be read as a pool file on the server
+                values = operator.get("values")
+                if (
+                    not isinstance(values, list)
+                    or not values
+                    or not all(isinstance(value, str) for value in values)
+                ):
+                    raise RequestError(
+                        400,
+                        f"The surrogate operator for {entity_type} needs a non-empty list of string values",
+                    )
+                if "rng" in operator:
+                    raise RequestError(
+                        400, "rng is not supported for the surrogate operator"
+                    )
+        options["operators"] = {
+            entity_type: OperatorConfig.from_json(dict(operator))
+            for entity_type, operator in operators.items()
+        }
+
+    return options
+
+
+async def _send_json(
+    send: Callable[[dict], Awaitable[None]],
+    status: int,
+    body: dict,
+    headers: Sequence[tuple[str, str]] = (),
+) -> None:
+    content = json.dumps(body).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(content)).encode()),
+                *((name.encode(), value.encode()) for name, value in headers),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": content})
+
+
+def create_app() -> RedactionService:
+    """
+    Creates the service configured by environment variables, so each worker process of a process manager builds its
+    own, e.g. uvicorn --factory pteredactyl.server:create_app --workers 4.
+
+    Environment variables:
+        PTEREDACTYL_MODELS: Comma separated NER models to serve. Defaults to the default model.
+        PTEREDACTYL_MAX_BATCH_SIZE, PTEREDACTYL_MAX_WAIT_MS, PTEREDACTYL_MAX_QUEUE, PTEREDACTYL_MAX_TEXTS_PER_REQUEST:
+            See RedactionService.
+        PTEREDACTYL_TORCH_THREADS: Threads used by torch in each worker process, e.g. cores / workers.
+
+    Returns:
+        RedactionService: The service.
+    """
+    torch_threads = os.environ.get("PTEREDACTYL_TORCH_THREADS")
+    if torch_threads:
+        import torch
+
+        torch.set_num_threads(int(torch_threads))
+
+    models = os.environ.get("PTEREDACTYL_MODELS", DEFAULT_NER_MODEL)
+
+    return RedactionService(
+        models=[model.strip() for model in models.split(",") if model.strip()],
+        max_batch_size=int(os.environ.get("PTEREDACTYL_MAX_BATCH_SIZE", 32)),
+        max_wait_ms=float(os.environ.get("PTEREDACTYL_MAX_WAIT_MS", 5.0)),
+        max_queue=int(os.environ.get("PTEREDACTYL_MAX_QUEUE", 1024)),
+        max_texts_per_request=int(
+            os.environ.get("PTEREDACTYL_MAX_TEXTS_PER_REQUEST", 256)
+        ),
+    )
+
+
+def _import_uvicorn():
+    try:
+        import uvicorn
+    except ImportError as e:
+        raise ImportError(
+            "Running the redaction service requires uvicorn. Install it with: pip install pteredactyl[server]"
+        ) from e
+    return uvicorn
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Runs the redaction service with uvicorn: python -m pteredactyl.server --workers 4."""
+    parser = argparse.ArgumentParser(
+        prog="pteredactyl-server",
+        description="Serve PII analysis and redaction over JSON HTTP.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes. Each loads its own copy of the models.",
+    )
+    parser.add_argument(
+        "--models", nargs="+", default=[DEFAULT_NER_MODEL], help="NER models to serve."
+    )
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--max-queue", type=int, default=1024)
+    parser.add_argument(
+        "--torch-threads", type=int, help="Threads used by torch in each worker."
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=30,
+        help="Seconds to finish in-flight requests on shutdown.",
+    )
+    args = parser.parse_args(argv)
+
+    # Worker processes build the service from the environment
+    os.environ["PTEREDACTYL_MODELS"] = ",".join(args.models)
+    os.environ["PTEREDACTYL_MAX_BATCH_SIZE"] = str(args.max_batch_size)
+    os.environ["PTEREDACTYL_MAX_WAIT_MS"] = str(args.max_wait_ms)
+    os.environ["PTEREDACTYL_MAX_QUEUE"] = str(args.max_queue)
+    if args.torch_threads:
+        os.environ["PTEREDACTYL_TORCH_THREADS"] = str(args.torch_threads)
+
+    _import_uvicorn().run(
+        "pteredactyl.server:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_graceful_shutdown=args.graceful_timeout,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+import mmap
+import os
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import Executor
+from pathlib import Path
+
+import pandas as pd
+from presidio_analyzer import AnalyzerEngine
+
+from pteredactyl.defaults import (
+    DEFAULT_NER_MODEL,
+    DEFAULT_REGEX_ENTITIES,
+    DEFAULT_SPACY_MODEL,
+)
+from pteredactyl.recognisers.pteredactyl_recogniser import PteredactylRecogniser
+from pteredactyl.redactor import _check_analyser, anonymise_df
+
+FILE_FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".txt": "text",
+}
+
+# Column name used for each line of a plain-text corpus
+TEXT_COLUMN = "text"
+
+
+def infer_file_format(path: str | os.PathLike) -> str:
+    """
+    Infers the file format from the file's extension.
+
+    Args:
+        path (str or PathLike): The path to the file.
+
+    Returns:
+        str: One of "csv", "parquet", "jsonl" or "text".
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix not in FILE_FORMATS:
+        raise ValueError(
+            f"Cannot infer the file format of '{path}'. Pass file_format as one of {sorted(set(FILE_FORMATS.values()))}"
+        )
+    return FILE_FORMATS[suffix]
+
+
+def iter_text_lines(
+    path: str | os.PathLike, chunksize: int = 10_000, encoding: str = "utf-8"
+) -> Iterator[tuple[list[str], list[str]]]:
+    """
+    Reads a newline-delimited text corpus through a memory map, yielding up to chunksize lines at a time.
+    The file is paged in by the operating system as it is read, so memory use does not grow with the size of the file.
+
+    Args:
+        path (str or PathLike): The path to the text file.
+        chunksize (int): Maximum number of lines per chunk.
+        encoding (str): The text encoding of the file. Defaults to "utf-8".
+
+    Yields:
+        tuple[list[str], list[str]]: The lines of the chunk without their line endings, and the line endings
+            ("\\n", "\\r\\n" or "" for a final line with no newline).
+    """
+    with open(path, "rb") as f:
+        # Empty files cannot be memory mapped
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            lines, endings = [], []
+            position, size = 0, len(mm)
+
+            while position < size:
+                newline = mm.find(b"\n", position)
+                end = size if newline == -1 else newline
+                next_position = end + 1
+
+                ending = "" if newline == -1 else "\n"
+                if end > position and mm[end - 1 : end] == b"\r":
+                    end -= 1
+                    ending = "\r" + ending
+
+                lines.append(mm[position:end].decode(encoding))
+                endings.append(ending)
+                position = next_position
+
+                if len(lines) >= chunksize:
+                    yield lines, endings
+                    lines, endings = [], []
+
+            if lines:
+                yield lines, endings
+
+
+def _iter_csv_chunks(src: str | os.PathLike, chunksize: int) -> Iterator[pd.DataFrame]:
+    # Read every value as a string, and keep empty cells as empty strings, so untouched columns are written back as read
+    yield from pd.read_csv(src, chunksize=chunksize, dtype=str, keep_default_na=False)
+
+
+def _iter_jsonl_chunks(
+    src: str | os.PathLike, chunksize: int
+) -> Iterator[pd.DataFrame]:
+    with pd.read_json(src, lines=True, chunksize=chunksize, dtype=False) as reader:
+        yield from reader
+
+
+def _iter_parquet_chunks(
+    src: str | os.PathLike, chunksize: int
+) -> Iterator[pd.DataFrame]:
+    pq = _import_parquet()
+    parquet_file = pq.ParquetFile(src)
+    for batch in parquet_file.iter_batches(batch_size=chunksize):
+        yield batch.to_pandas()
+
+
+def _import_parquet():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError(
+            "Reading and writing Parquet files requires pyarrow. Install it with: pip install pteredactyl[parquet]"
+        ) from e
+    return pq
+
+
+class _ChunkWriter:
+    """Appends anonymised chunks to the output file as they are produced."""
+
+    def __init__(
+        self,
+        dst: str | os.PathLike,
+        file_format: str,
+        encoding: str = "utf-8",
+        text_column: str = TEXT_COLUMN,
+        string_columns: Sequence[str] = (),
+        source_schema=None,
+    ):
+        self.dst = dst
+        self.file_format = file_format
+        self.encoding = encoding
+        self.text_column = text_column
+        # The Parquet schema is fixed by the first chunk, so these columns are written as strings even if that chunk
+        # has no values in them, and other columns take their type from the source Parquet file where it has them
+        self.string_columns = set(string_columns)
+        self.source_schema = source_schema
+        self._file = None
+        self._parquet_writer = None
+        self._schema = None
+
+    def __enter__(self) -> "_ChunkWriter":
+        if self.file_format != "parquet":
+            self._file = open(self.dst, "w", encoding=self.encoding, newline="")
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        if self._file is not None:
+            self._file.close()
+
+    def write(self, df: pd.DataFrame, line_endings: list[str] | None = None) -> None:
+        if self.file_format == "csv":
+            df.to_csv(self._file, index=False, header=self._file.tell() == 0)
+
+        elif self.file_format == "jsonl":
+            records = df.to_json(orient="records", lines=True, force_ascii=False)
+            # Older versions of pandas do not end the final record with a newline
+            if records and not records.endswith("\n"):
+                records += "\n"
+            self._file.write(records)
+
+        elif self.file_format == "text":
+            lines = df[self.text_column].where(df[self.text_column].notna(), "")
+            line_endings = line_endings or ["\n"] * len(lines)
+            self._file.writelines(
+                line + ending for line, ending in zip(lines, line_endings)
+            )
+
+        elif self.file_format == "parquet":
+            import pyarrow as pa
+
+            pq = _import_parquet()
+            if self._schema is None:
+                self._schema = self._parquet_schema(
+                    pa.Schema.from_pandas(df, preserve_index=False)
+                )
+                self._parquet_writer = pq.ParquetWriter(self.dst, self._schema)
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+            self._parquet_writer.write_table(table)
+
+    def _parquet_schema(self, inferred):
+        """The schema of the first chunk, with string columns and columns of the source file given their types."""
+        import pyarrow as pa
+
+        fields = []
+        for field in inferred:
+            if field.name in self.string_columns:
+                field = field.with_type(pa.string())
+            elif (
+                self.source_schema is not None
+                and field.name in self.source_schema.names
+            ):
+                field = self.source_schema.field(field.name)
+            elif pa.types.is_null(field.type):
+                # A column with no values in the first chunk
+                field = field.with_type(pa.string())
+            fields.append(field)
+        return pa.schema(fields, metadata=inferred.metadata)
+
+
+def anonymise_file(
+    src: str | os.PathLike,
+    dst: str | os.PathLike,
+    columns: str | list[str] | None = None,
+    file_format: str | None = None,
+    output_format: str | None = None,
+    chunksize: int = 10_000,
+    analyser: AnalyzerEngine | None = None,
+    model_path: str = DEFAULT_NER_MODEL,
+    spacy_model: str | None = DEFAULT_SPACY_MODEL,
+    language: str = "en",
+    regex_entities: Sequence[str | PteredactylRecogniser] = DEFAULT_REGEX_ENTITIES,
+    col_inplace: bool = True,
+    col_header_append: str = "_redacted",
+    rebuild_regex_recognisers: bool = True,
+    n_workers: int = 1,
+    executor: Executor | None = None,
+    share_model_weights: bool = False,
+    encoding: str = "utf-8",
+    on_chunk: Callable[[int], None] | None = None,
+    **kwargs,
+) -> int:
+    """
+    Anonymises a CSV, Parquet, JSONL or plain-text file, streaming it chunk by chunk from src to dst.
+    Each chunk of rows (or Parquet row group batch) is read, anonymised with anonymise_df and written straight to the output,
+    so peak memory stays flat however large the file is. Plain-text files are treated as one document per line and are
+    read through a memory map.
+
+    Args:
+        src (str or PathLike): The input file.
+        dst (str or PathLike): The output file, written in the same format as the input unless output_format is given.
+        columns (str or list): The column(s) to anonymise. Required for CSV, Parquet and JSONL; ignored for plain text.
+        file_format (str, optional): One of "csv", "parquet", "jsonl" or "text". Inferred from the extension of src if not provided.
+        output_format (str, optional): The format of dst, if different to the input. Writing plain text from a table
+            requires a single column, which is written one value per line.
+        chunksize (int): Number of rows (or lines) read, anonymised and written at a time. Defaults to 10,000.
+        analyser (AnalyzerEngine, optional): An instance of AnalyzerEngine. If not provided, one is created and reused for every chunk.
+        model_path (str): The path to the model used for analysis. Used only if analyser not provided.
+        spacy_model (str, optional): The spaCy model to use. Used only if analyser not provided.
+        language (str): The language of the text to be analysed. Defaults to "en".
+        regex_entities (list, optional): A list of regex entities or PteredactylRecognisers to analyse.
+        col_inplace (bool): If True, replaces the original columns with the anonymised columns. Defaults to True.
+        col_header_append (str): String appended to the header of anonymised columns, if col_inplace is False.
+        rebuild_regex_recognisers (bool): If True, and an existing analyser is provided, its regex recognisers are rebuilt once before the first chunk.
+        n_workers (int): Number of worker processes. If greater than 1, one process pool is created and reused for every chunk.
+        executor (Executor, optional): A pool created by pteredactyl.parallel.create_anonymiser_pool.
+        share_model_weights (bool): If True, the pool's workers share one copy of the model weights.
+        encoding (str): The text encoding of CSV, JSONL and plain-text files. Defaults to "utf-8".
+        on_chunk (Callable, optional): Called with the number of rows in each chunk once it has been written.
+        **kwargs: Additional keyword arguments for anonymise_df (e.g. entities, highlight, replacement_lists).
+
+    Returns:
+        int: The number of rows (or lines) anonymised.
+
+    Example:
+        >>> anonymise_file("notes.csv", "notes_redacted.csv", columns="note_text", chunksize=5_000)
+    """
+    file_format = file_format or infer_file_format(src)
+
+    if file_format == "text":
+        columns = [TEXT_COLUMN]
+        col_inplace = True
+    elif file_format in ("csv", "jsonl", "parquet"):
+        if columns is None:
+            raise ValueError(
+                f"columns must be provided to anonymise a {file_format} file"
+            )
+        columns = [columns] if isinstance(columns, str) else list(columns)
+    else:
+        raise ValueError(f"Unsupported file_format '{file_format}'")
+
+    output_format = output_format or file_format
+    if output_format not in ("csv", "jsonl", "parquet", "text"):
+        raise ValueError(f"Unsupported output_format '{output_format}'")
+    if output_format == "text" and len(columns) != 1:
+        raise ValueError("Only a single column can be written to a plain-text file")
+    output_columns = [
+        column if col_inplace else f"{column}{col_header_append}" for column in columns
+    ]
+    text_column = output_columns[0]
+
+    if Path(src).resolve() == Path(dst).resolve():
+        raise ValueError("src and dst must be different files")
+
+    own_executor = executor is None and n_workers > 1
+    if own_executor:
+        from pteredactyl.parallel import create_anonymiser_pool
+
+        executor = create_anonymiser_pool(
+            n_workers=n_workers,
+            model_path=model_path,
+            spacy_model=spacy_model,
+            language=language,
+            regex_entities=regex_entities,
+            share_model_weights=share_model_weights,
+        )
+    elif executor is None:
+        # Build (or check) the analyser once, rather than once per chunk
+        analyser = _check_analyser(
+            analyser=analyser,
+            model_path=model_path,
+            spacy_model=spacy_model,
+            language=language,
+            regex_entities=regex_entities,
+            rebuild_regex_recognisers=rebuild_regex_recognisers,
+        )
+
+    if file_format == "text":
+        chunks = (
+            (pd.DataFrame({TEXT_COLUMN: lines}), endings)
+            for lines, endings in iter_text_lines(
+                src, chunksize=chunksize, encoding=encoding
+            )
+        )
+    else:
+        chunk_readers = {
+            "csv": _iter_csv_chunks,
+            "jsonl": _iter_jsonl_chunks,
+            "parquet": _iter_parquet_chunks,
+        }
+        chunks = ((chunk, None) for chunk in chunk_readers[file_format](src, chunksize))
+
+    # Columns passed through unchanged keep the types they have in a Parquet source
+    source_schema = (
+        _import_parquet().ParquetFile(src).schema_arrow
+        if file_format == "parquet"
+        else None
+    )
+
+    n_rows = 0
+    try:
+        with _ChunkWriter(
+            dst,
+            output_format,
+            encoding=encoding,
+            text_column=text_column,
+            string_columns=output_columns,
+            source_schema=source_schema,
+        ) as writer:
+            for chunk, line_endings in chunks:
+                missing_columns = [col for col in columns if col not in chunk.columns]
+                if missing_columns:
+                    raise KeyError(f"Columns {missing_columns} not found in '{src}'")
+
+                chunk = anonymise_df(
+                    chunk,
+                    column=columns,
+                    analyser=analyser,
+                    model_path=model_path,
+                    spacy_model=spacy_model,
+                    language=language,
+                    regex_entities=regex_entities,
+                    inplace=True,
+                    col_inplace=col_inplace,
+                    col_header_append=col_header_append,
+                    rebuild_regex_recognisers=False,
+                    executor=executor,
+                    **kwargs,
+                )
+                writer.write(chunk, line_endings)
+
+                n_rows += len(chunk)
+                if on_chunk is not None:
+                    on_chunk(len(chunk))
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    return n_rows
@@ -1,16 +1,19 @@
+import os
 import re
 from collections.abc import Sequence
 from logging import Logger
 from typing import Any
 
 import spacy
-from presidio_analyzer import RecognizerRegistry
+from presidio_analyzer import AnalyzerEngine, RecognizerRegistry
 from presidio_analyzer.nlp_engine import NlpEngine, NlpEngineProvider
 from presidio_analyzer.recognizer_result import RecognizerResult
 
 from pteredactyl.defaults import SPACY_LABELS_TO_IGNORE
+from pteredactyl.nlp_engine import TokenizerNlpEngine
 from pteredactyl.recognisers.pteredactyl_recogniser import (
     PTEREDACTYL_RECOGNISER_NAME,
+    CombinedPteredactylRecogniser,
     PteredactylRecogniser,
 )
 from pteredactyl.recognisers.support import _get_config
@@ -20,11 +23,12 @@ from pteredactyl.regex_entities import fetch_pteredactyl_recogniser
 
 def find_substring_positions(s: str, sep: str = " ") -> list[tuple[int, int]]:
     """Finds the starting and ending indexes of substrings in the input string `s`.
-    The substrings are determined by splitting `s` at separator.
+    The substrings are determined by splitting `s` at separator, in a single pass over `s`.
+    Empty substrings (e.g. between repeated separators) are skipped.
 
     Args:
         s (str): The input string containing substrings separated by newlines.
-        sept (str): Separator for substrings.
+        sep (str): Separator for substrings.
 
     Returns:
         list[tuple[int, int]]: A list of tuples, each containing the start and end index of a substring.
@@ -35,12 +39,19 @@ def find_substring_positions(s: str, sep: str = " ") -> list[tuple[int, int]]:
     >>> print("Replacement Positions: ", positions)
     Replacement Positions: [(0, 3), (4, 7)]
     """
+    if not sep:
+        raise ValueError("empty separator")
+
     replacement_positions = []
 
-    for substring in s.split(sep):
-        for match in re.finditer(re.escape(substring), s):
-            start, end = match.span()
+    start = 0
+    while start <= len(s):
+        end = s.find(sep, start)
+        if end == -1:
+            end = len(s)
+        if end > start:
             replacement_positions.append((start, end))
+        start = end + len(sep)
 
     return replacement_positions
 
@@ -61,16 +72,20 @@ def split_results_into_individual_words(
     """
     masked_individual_words_results = []
     for result in results:
-        substrings = text[result.start : result.end]
-        for substring_position in find_substring_positions(
-            substrings, sep=text_separator
+        # Results that are already a single word are kept as they are
+        if text_separator not in text[result.start : result.end]:
+            masked_individual_words_results.append(result)
+            continue
+
+        offset = result.start
+        for start, end in find_substring_positions(
+            text[result.start : result.end], sep=text_separator
         ):
-            offset = result.start
             masked_individual_words_results.append(
                 RecognizerResult(
                     entity_type=result.entity_type,
-                    start=substring_position[0] + offset,
-                    end=substring_position[1] + offset,
+                    start=start + offset,
+                    end=end + offset,
                     score=result.score,
                     analysis_explanation=result.analysis_explanation,
                     recognition_metadata=result.recognition_metadata,
@@ -131,18 +146,37 @@ def load_spacy_model(spacy_model: str) -> None:
         spacy.cli.download(spacy_model)
 
 
-def load_transformers_recognizer(model_path: str) -> TransformersRecogniser:
+def load_transformers_recognizer(
+    model_path: str,
+    model: Any | None = None,
+    backend: str = "pytorch",
+    quantize: str | None = None,
+    optimize: bool | Sequence[str] | None = None,
+) -> TransformersRecogniser:
     """Loads transformers recognizer with the specified model path
 
     Args:
         model_path (str): Path to the transformer model
+        model (PreTrainedModel, optional): Preloaded model to use instead of loading it from model_path,
+            e.g. one whose weights are shared between processes
+        backend (str): Inference backend, "pytorch" or "onnx". Defaults to "pytorch"
+        quantize (str, optional): "int8" to dynamically quantise the model's linear layers, caching the quantised
+            weights on disk. Defaults to None (full precision)
+        optimize (bool or list, optional): CPU fast paths for the pytorch backend (inference_mode, sdpa, bf16, compile,
+            bucketing). True enables all but bf16. Defaults to None
 
     Returns:
         TransformersRecogniser: Loaded transformers recognizer
     """
     print(f"Loading transformers recognizer with model path: {model_path}")
     config = _get_config(model_path=model_path)
-    transformers_recognizer = TransformersRecogniser(model_path=model_path)
+    transformers_recognizer = TransformersRecogniser(
+        model_path=model_path,
+        model=model,
+        backend=backend,
+        quantize=quantize,
+        optimize=optimize,
+    )
     transformers_recognizer.load_transformer(**config)
     print(f"Model {model_path} loaded successfully")
     return transformers_recognizer
@@ -173,12 +207,15 @@ def load_nlp_configuration(language: str, spacy_model: str) -> dict[str, Any]:
 def load_registry(
     transformers_recogniser: TransformersRecogniser,
     regex_entities: Sequence[str | PteredactylRecogniser],
+    regex_backend: str = "re",
 ) -> RecognizerRegistry:
-    """Creates an AnalyzerEngine.registry by combining a TransformersRecogniser with a list of custom PteredactylRecognisers
+    """Creates an AnalyzerEngine.registry by combining a TransformersRecogniser with a list of custom PteredactylRecognisers.
+    The PteredactylRecognisers are added as one CombinedPteredactylRecogniser, which scans each text once for all of them
 
     Args:
         transformers_recogniser (TransformersRecogniser): Custom transformers recogniser
         regex_entities (list[str | PteredactylRecogniser]): Named regex entities to generate PtereractylRecognisers, or custom PtereractylRecognisers
+        regex_backend (str): Regex backend of the combined recogniser, "re" or "regex". Defaults to "re"
 
     Returns:
         RecognizerRegistry: registry of Recognisers for an AnalyzerEngine
@@ -189,12 +226,16 @@ def load_registry(
     registry.remove_recognizer("SpacyRecognizer")
 
     if regex_entities:
+        recognisers = []
         for entity in regex_entities:
             if isinstance(entity, str):
                 recogniser = fetch_pteredactyl_recogniser(entity_type=entity)
             elif isinstance(entity, PteredactylRecogniser):
                 recogniser = entity
-            registry.add_recognizer(recogniser)
+            recognisers.append(recogniser)
+        registry.add_recognizer(
+            CombinedPteredactylRecogniser(recognisers, regex_backend=regex_backend)
+        )
 
     return registry
 
@@ -218,3 +259,100 @@ def load_nlp_engine(
     presidio_logger.setLevel(log_level)
 
     return nlp_engine
+
+
+def load_tokenizer_nlp_engine(language: str) -> TokenizerNlpEngine:
+    """
+    Loads an NLP engine that only tokenizes text, with a blank spaCy pipeline. No spaCy model is downloaded or loaded.
+
+    Args:
+        language (str): Model language (e.g. en)
+
+    Returns:
+        TokenizerNlpEngine: The loaded engine.
+    """
+    nlp_engine = TokenizerNlpEngine(languages=[language])
+    nlp_engine.load()
+
+    return nlp_engine
+
+
+def get_transformers_recognisers(
+    analyser: AnalyzerEngine,
+) -> list[TransformersRecogniser]:
+    """
+    Returns the TransformersRecognisers in an analyser's registry.
+
+    Args:
+        analyser (AnalyzerEngine): The analyser to search.
+
+    Returns:
+        list[TransformersRecogniser]: The analyser's transformers recognisers.
+    """
+    return [
+        recogniser
+        for recogniser in analyser.registry.recognizers
+        if isinstance(recogniser, TransformersRecogniser)
+    ]
+
+
+def get_pteredactyl_recognisers(
+    analyser: AnalyzerEngine,
+) -> list[CombinedPteredactylRecogniser]:
+    """
+    Returns the CombinedPteredactylRecognisers in an analyser's registry.
+
+    Args:
+        analyser (AnalyzerEngine): The analyser to search.
+
+    Returns:
+        list[CombinedPteredactylRecogniser]: The analyser's combined regex recognisers.
+    """
+    return [
+        recogniser
+        for recogniser in analyser.registry.recognizers
+        if isinstance(recogniser, CombinedPteredactylRecogniser)
+    ]
+
+
+def _flatten_tensors(values: Sequence[Any], seen: set[int]) -> list[Any]:
+    """Flattens nested tuples and lists of tensors, skipping tensors already seen (e.g. tied weights)."""
+    tensors = []
+    for value in values:
+        if isinstance(value, (tuple, list)):
+            tensors.extend(_flatten_tensors(value, seen))
+        elif hasattr(value, "numel") and hasattr(value, "element_size"):
+            key = id(value) if value.is_meta or value.is_quantized else value.data_ptr()
+            if key not in seen:
+                seen.add(key)
+                tensors.append(value)
+    return tensors
+
+
+def estimate_analyser_memory_mb(analyser: AnalyzerEngine) -> float:
+    """
+    Estimates the memory held by an analyser's transformer models, by summing the size of their parameters and buffers.
+
+    Args:
+        analyser (AnalyzerEngine): The analyser to measure.
+
+    Returns:
+        float: The estimated memory in megabytes.
+    """
+    total_bytes = 0
+    for recogniser in get_transformers_recognisers(analyser):
+        if recogniser.pipeline:
+            model = recogniser.pipeline.model
+            # The state dict includes the packed weights of quantised layers, which are not parameters
+            tensors = list(model.buffers()) + list(model.state_dict().values())
+            for tensor in _flatten_tensors(tensors, seen=set()):
+                # Models on the meta device hold no memory (e.g. with the onnx backend)
+                if not tensor.is_meta:
+                    total_bytes += tensor.numel() * tensor.element_size()
+
+            onnx_path = getattr(recogniser.pipeline, "onnx_path", None)
+            if onnx_path is not None:
+                # An onnxruntime session holds roughly the size of the exported model
+                total_bytes += os.path.getsize(onnx_path)
+
+    return total_bytes / 1024**2
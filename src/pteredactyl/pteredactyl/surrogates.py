@@ -0,0 +1,207 @@
+import functools
+import os
+import struct
+import tempfile
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+
+import numpy as np
+
+# File format: a header, then the end offset of each value, then the UTF-8 encoded values back to back
+SURROGATE_POOL_MAGIC = b"PTSP"
+SURROGATE_POOL_VERSION = 1
+SURROGATE_POOL_SUFFIX = ".pool"
+
+# magic, version, number of values
+_HEADER = struct.Struct("<4sIQ")
+
+_rng = np.random.default_rng()
+
+
+def _reseed_after_fork() -> None:
+    # A forked child would otherwise inherit the parent's generator state, and every worker would draw the same
+    # surrogates
+    global _rng
+    _rng = np.random.default_rng()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reseed_after_fork)
+
+
+def _sample_indexes(
+    n_values: int, size: int, rng: np.random.Generator | None, replace: bool
+) -> np.ndarray:
+    rng = rng or _rng
+    if replace:
+        return rng.integers(0, n_values, size=size)
+    return rng.choice(n_values, size=size, replace=False)
+
+
+class SurrogatePool(Sequence):
+    """
+    A read-only list of surrogate values (e.g. names or towns) stored in a compiled pool file: a packed table of
+    UTF-8 strings and their offsets, which is memory-mapped rather than read. Opening a pool and drawing from it take
+    the same time however many values it holds, and only the pages of the values drawn are read from disk.
+
+    Build a pool file once with write_surrogate_pool, and open it with load_surrogate_pool so that each file is
+    mapped once per process.
+
+    Args:
+        path (str | Path): The pool file.
+
+    Example:
+        >>> write_surrogate_pool(["Andover", "Bath", "Bristol"], "towns.pool")
+        >>> pool = load_surrogate_pool("towns.pool")
+        >>> pool.sample(2)
+        ['Bristol', 'Andover']
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        buffer = np.memmap(self.path, dtype=np.uint8, mode="r")
+        if len(buffer) < _HEADER.size:
+            raise ValueError(f"'{self.path}' is not a surrogate pool")
+
+        magic, version, n_values = _HEADER.unpack(buffer[: _HEADER.size].tobytes())
+        if magic != SURROGATE_POOL_MAGIC or version != SURROGATE_POOL_VERSION:
+            raise ValueError(
+                f"'{self.path}' is not a version {SURROGATE_POOL_VERSION} surrogate pool"
+            )
+
+        data_start = _HEADER.size + 8 * (n_values + 1)
+        self._offsets = np.frombuffer(
+            buffer, dtype="<u8", count=n_values + 1, offset=_HEADER.size
+        )
+        self._data = buffer[data_start:]
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        if isinstance(index, slice):
+            return self.take(np.arange(len(self))[index])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("surrogate pool index out of range")
+        return self.take([index])[0]
+
+    def __reduce__(self):
+        # Worker processes map the file themselves, rather than receiving a copy of it
+        return load_surrogate_pool, (str(self.path),)
+
+    def take(self, indexes: Sequence[int] | np.ndarray) -> list[str]:
+        """
+        Returns the values at several indexes.
+
+        Args:
+            indexes (Sequence[int] | np.ndarray): The indexes of the values.
+
+        Returns:
+            list[str]: The values.
+        """
+        indexes = np.asarray(indexes, dtype=np.int64)
+        starts = self._offsets[indexes].tolist()
+        ends = self._offsets[indexes + 1].tolist()
+        return [
+            self._data[start:end].tobytes().decode("utf-8")
+            for start, end in zip(starts, ends)
+        ]
+
+    def sample(
+        self, size: int, rng: np.random.Generator | None = None, replace: bool = True
+    ) -> list[str]:
+        """
+        Draws values uniformly at random, independently with replacement (the default) or without replacement.
+
+        Args:
+            size (int): The number of values to draw.
+            rng (np.random.Generator, optional): The random number generator to use.
+            replace (bool): If False, no value is drawn twice, and size must not exceed the number of values.
+
+        Returns:
+            list[str]: The values drawn.
+        """
+        return self.take(_sample_indexes(len(self), size, rng, replace))
+
+
+def write_surrogate_pool(values: Iterable[str], path: str | Path) -> Path:
+    """
+    Compiles surrogate values into a pool file that SurrogatePool can memory-map. The file is written to a temporary
+    file first, so a pool that is being read is never seen half written.
+
+    Args:
+        values (Iterable[str]): The surrogate values. Empty values are skipped.
+        path (str | Path): The pool file to write.
+
+    Returns:
+        Path: The pool file.
+    """
+    path = Path(path)
+    encoded = [value.encode("utf-8") for value in values if value]
+    if not encoded:
+        raise ValueError("A surrogate pool needs at least one value")
+
+    offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as f:
+        f.write(
+            _HEADER.pack(SURROGATE_POOL_MAGIC, SURROGATE_POOL_VERSION, len(encoded))
+        )
+        f.write(offsets.tobytes())
+        f.write(b"".join(encoded))
+    os.replace(f.name, path)
+
+    # A pool that was open at this path is now stale
+    _load_surrogate_pool.cache_clear()
+
+    return path
+
+
+@functools.lru_cache(maxsize=None)
+def _load_surrogate_pool(path: str) -> SurrogatePool:
+    return SurrogatePool(path)
+
+
+def load_surrogate_pool(path: str | Path) -> SurrogatePool:
+    """
+    Opens a surrogate pool file, mapping each file only once per process.
+
+    Args:
+        path (str | Path): The pool file, from write_surrogate_pool.
+
+    Returns:
+        SurrogatePool: The pool.
+    """
+    return _load_surrogate_pool(str(Path(path).resolve()))
+
+
+def sample_surrogates(
+    values: Sequence[str] | str | Path,
+    size: int,
+    rng: np.random.Generator | None = None,
+    replace: bool = True,
+) -> list[str]:
+    """
+    Draws surrogates uniformly at random, independently with replacement (the default) or without replacement, with
+    one vectorised draw of indexes.
+
+    Args:
+        values (Sequence[str] | str | Path): A list of surrogate values, a SurrogatePool, or the path of a pool file.
+        size (int): The number of surrogates to draw.
+        rng (np.random.Generator, optional): The random number generator to use.
+        replace (bool): If False, no value is drawn twice, and size must not exceed the number of values.
+
+    Returns:
+        list[str]: The surrogates drawn.
+    """
+    if isinstance(values, (str, os.PathLike)):
+        values = load_surrogate_pool(values)
+    if isinstance(values, SurrogatePool):
+        return values.sample(size, rng=rng, replace=replace)
+
+    indexes = _sample_indexes(len(values), size, rng, replace)
+    return [values[index] for index in indexes.tolist()]
@@ -0,0 +1,21 @@
+import pytest
+
+from pteredactyl.benchmarks.tiny_model import create_tiny_model, register_tiny_model
+
+
+@pytest.fixture(scope="session")
+def tiny_model_path(tmp_path_factory) -> str:
+    """A tiny, randomly initialised BERT token classification model with a character-level fast tokenizer,
+    saved locally so that backend tests do not need to download a model."""
+    return create_tiny_model(tmp_path_factory.mktemp("tiny_model"))
+
+
+@pytest.fixture(scope="session")
+def tiny_model(tiny_model_path) -> str:
+    """The tiny model's path, registered in pteredactyl.mappings so that create_analyser accepts it.
+    Process pools are forked, so their workers inherit the registration."""
+    from pteredactyl.mappings import configuration
+
+    register_tiny_model(tiny_model_path)
+    yield tiny_model_path
+    configuration.pop(tiny_model_path, None)
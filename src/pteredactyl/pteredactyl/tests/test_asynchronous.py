@@ -0,0 +1,103 @@
+import asyncio
+import threading
+
+import pytest
+from presidio_anonymizer.entities import OperatorConfig
+
+import pteredactyl as pt
+from pteredactyl.asynchronous import (
+    MicroBatcher,
+    anonymise_async,
+    close_batchers,
+    get_batcher,
+)
+
+nhs_text = "NHS number 943 476 5919"
+postcode_text = "Seen at SO16 6YD"
+
+
+@pytest.fixture(scope="module")
+def analyser(tiny_model):
+    return pt.create_analyser(model_path=tiny_model)
+
+
+def test_concurrent_requests_are_coalesced(analyser):
+    texts = [nhs_text, postcode_text] * 10
+    batcher = MicroBatcher(analyser, max_batch_size=8, max_wait_ms=50)
+
+    async def main():
+        return await asyncio.gather(
+            *(batcher.anonymise(text, entities=[]) for text in texts),
+            batcher.analyse(nhs_text, entities=[]),
+            # Different options share a batch, but are analysed separately
+            batcher.anonymise(
+                postcode_text, entities=[], regex_entities=["NHS_NUMBER"]
+            ),
+            batcher.anonymise(
+                nhs_text,
+                entities=[],
+                operators={"DEFAULT": OperatorConfig("replace", {"new_value": "X"})},
+            ),
+        )
+
+    *anonymised, results, postcode_only, replaced = asyncio.run(main())
+    batcher.close()
+
+    expected = ["NHS number <NHS_NUMBER>", "Seen at <POSTCODE>"]
+    assert anonymised == expected * 10
+    assert [result.entity_type for result in results] == ["NHS_NUMBER"]
+    assert postcode_only == postcode_text
+    assert replaced == "NHS number X"
+    assert batcher.stats["requests"] == len(texts) + 3
+    assert batcher.stats["batches"] == 3
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(batcher.analyse(nhs_text))
+
+
+def test_errors_are_returned_to_their_callers(analyser):
+    batcher = MicroBatcher(analyser, max_wait_ms=20)
+
+    async def main():
+        return await asyncio.gather(
+            batcher.anonymise(
+                nhs_text, entities=[], operators={"DEFAULT": OperatorConfig("encrypt")}
+            ),
+            batcher.anonymise(nhs_text, entities=[]),
+            return_exceptions=True,
+        )
+
+    error, anonymised = asyncio.run(main())
+    batcher.close()
+
+    assert isinstance(error, ValueError)
+    assert anonymised == "NHS number <NHS_NUMBER>"
+
+
+def test_requests_from_several_event_loops(analyser):
+    outputs = []
+
+    def run_loop():
+        outputs.append(
+            asyncio.run(
+                anonymise_async(
+                    postcode_text, analyser=analyser, entities=[], max_wait_ms=20
+                )
+            )
+        )
+
+    threads = [threading.Thread(target=run_loop) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert outputs == ["Seen at <POSTCODE>"] * 4
+    assert get_batcher(analyser, max_wait_ms=20) is get_batcher(
+        analyser, max_wait_ms=20
+    )
+    close_batchers()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
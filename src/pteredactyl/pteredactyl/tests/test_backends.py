@@ -0,0 +1,191 @@
+import functools
+import os
+import re
+
+import pytest
+import torch
+import torch._dynamo
+from torch._dynamo.utils import counters
+
+from pteredactyl.recognisers.backends import (
+    _cache_key,
+    check_quantization_accuracy,
+    get_cache_dir,
+    load_pipeline,
+    load_quantized_model,
+    resolve_optimizations,
+)
+from pteredactyl.recognisers.transformers_recogniser import TransformersRecogniser
+
+
+def test_cache_key_is_a_directory_name():
+    assert re.fullmatch(
+        r"StanfordAIMI--stanford-deidentifier-base-[0-9a-f]{16}",
+        _cache_key("StanfordAIMI/stanford-deidentifier-base"),
+    )
+    assert re.fullmatch(
+        r"models--my--model-[0-9a-f]{16}", _cache_key("/models/my model/")
+    )
+    assert _cache_key("a/b") != _cache_key("a--b")
+
+
+def test_cache_key_changes_with_the_model_version(tmp_path):
+    model_dir = tmp_path / "model"
+    model_dir.mkdir()
+    (model_dir / "config.json").write_text('{"num_labels": 2}')
+    weights_path = model_dir / "model.safetensors"
+    weights_path.write_bytes(b"weights")
+
+    key = _cache_key(str(model_dir))
+    assert _cache_key(str(model_dir)) == key
+
+    (model_dir / "config.json").write_text('{"num_labels": 3}')
+    config_key = _cache_key(str(model_dir))
+    assert config_key != key
+
+    stat = weights_path.stat()
+    os.utime(weights_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert _cache_key(str(model_dir)) not in (key, config_key)
+
+
+def test_cache_dir_from_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv("PTEREDACTYL_CACHE_DIR", str(tmp_path))
+
+    assert get_cache_dir() == tmp_path
+
+
+def test_unsupported_backend():
+    with pytest.raises(ValueError):
+        TransformersRecogniser(
+            model_path="StanfordAIMI/stanford-deidentifier-base", backend="tensorflow"
+        )
+
+
+def test_quantized_model_is_cached(monkeypatch, tmp_path, tiny_model_path):
+    monkeypatch.setenv("PTEREDACTYL_CACHE_DIR", str(tmp_path))
+    input_ids = torch.tensor([[2, 10, 11, 12, 3]])
+
+    quantized_model = load_quantized_model(tiny_model_path)
+    assert (tmp_path / "int8" / _cache_key(tiny_model_path) / "model.pt").exists()
+
+    cached_model = load_quantized_model(tiny_model_path)
+    with torch.no_grad():
+        assert torch.equal(
+            quantized_model(input_ids).logits, cached_model(input_ids).logits
+        )
+
+
+@pytest.mark.parametrize("backend", ["pytorch", "onnx"])
+def test_quantization_accuracy_check(monkeypatch, tmp_path, tiny_model_path, backend):
+    if backend == "onnx":
+        pytest.importorskip("onnxruntime")
+    monkeypatch.setenv("PTEREDACTYL_CACHE_DIR", str(tmp_path))
+
+    report = check_quantization_accuracy(tiny_model_path, backend=backend)
+
+    assert report["passed"]
+    assert 0.95 <= report["f1"] <= 1.0
+    assert 0.0 < report["max_score_delta"] <= 0.05
+    assert report["full_precision_entities"] > 0
+
+    # The quantised predictions differ slightly, so the check fails once the thresholds are tighter than that
+    assert not check_quantization_accuracy(
+        tiny_model_path, backend=backend, max_delta=report["max_score_delta"] / 2
+    )["passed"]
+    if report["f1"] < 1.0:
+        assert not check_quantization_accuracy(
+            tiny_model_path, backend=backend, min_f1=1.0
+        )["passed"]
+
+
+def test_onnx_pipeline_matches_pytorch(monkeypatch, tmp_path, tiny_model_path):
+    pytest.importorskip("onnxruntime")
+    monkeypatch.setenv("PTEREDACTYL_CACHE_DIR", str(tmp_path))
+    texts = ["Jane Smith was seen at Southampton General Hospital on 12/03/2021.", "OK"]
+
+    pytorch_predictions = load_pipeline(tiny_model_path, aggregation_strategy="simple")(
+        texts
+    )
+    onnx_predictions = load_pipeline(
+        tiny_model_path, backend="onnx", aggregation_strategy="simple"
+    )(texts)
+
+    def spans(predictions):
+        return [
+            [(p["start"], p["end"], p["entity_group"]) for p in text_predictions]
+            for text_predictions in predictions
+        ]
+
+    assert spans(onnx_predictions) == spans(pytorch_predictions)
+
+
+def test_resolve_optimizations():
+    assert resolve_optimizations(None) == ()
+    assert "bf16" not in resolve_optimizations(True)
+    assert resolve_optimizations(["bucketing", "inference_mode"]) == (
+        "inference_mode",
+        "bucketing",
+    )
+
+    with pytest.raises(ValueError):
+        resolve_optimizations(["turbo"])
+
+
+def test_bucketed_pipeline_matches_default(tiny_model_path):
+    texts = [
+        "Jane Smith was seen at Southampton General Hospital on 12/03/2021.",
+        "OK",
+        "A longer letter about the patient. " * 5,
+    ]
+
+    default_predictions = load_pipeline(tiny_model_path, aggregation_strategy="simple")(
+        texts, batch_size=2
+    )
+    optimized_pipeline = load_pipeline(
+        tiny_model_path,
+        optimize=["inference_mode", "sdpa", "bucketing"],
+        warm_up_batch_sizes=(1, 2),
+        aggregation_strategy="simple",
+    )
+    optimized_predictions = optimized_pipeline(texts, batch_size=2)
+
+    assert optimized_pipeline.sequence_buckets == (32, 64, 128)
+    assert [
+        [(p["start"], p["end"], p["entity_group"]) for p in predictions]
+        for predictions in optimized_predictions
+    ] == [
+        [(p["start"], p["end"], p["entity_group"]) for p in predictions]
+        for predictions in default_predictions
+    ]
+
+
+def test_warm_up_stays_within_the_recompile_limit(monkeypatch, tiny_model_path):
+    # The eager backend traces graphs as inductor would, without the slow code generation
+    monkeypatch.setattr(
+        torch, "compile", functools.partial(torch.compile, backend="eager")
+    )
+    monkeypatch.setattr(torch._dynamo.config, "recompile_limit", 8)
+    torch._dynamo.reset()
+    counters.clear()
+
+    # 3 batch sizes x 3 sequence buckets is more shapes than the default limit of 8
+    pipeline = load_pipeline(
+        tiny_model_path,
+        optimize=["inference_mode", "compile", "bucketing"],
+        warm_up_batch_sizes=(1, 8, 32),
+        aggregation_strategy="simple",
+    )
+    assert torch._dynamo.config.recompile_limit >= 9
+    assert counters["stats"]["unique_graphs"] == 9
+    assert counters["frames"]["ok"] == counters["frames"]["total"]
+
+    # Batches smaller than a warmed up size are padded to it, so reuse its graph
+    pipeline(["Jane Smith was seen on 12/03/2021."] * 5, batch_size=5)
+    pipeline(["OK"] * 20, batch_size=20)
+    assert counters["stats"]["unique_graphs"] == 9
+    assert counters["frames"]["ok"] == counters["frames"]["total"]
+    torch._dynamo.reset()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
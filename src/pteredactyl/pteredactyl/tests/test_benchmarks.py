@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from pteredactyl.benchmarks.compare import compare_results, main
+from pteredactyl.benchmarks.suite import BASELINE_PATH, build_benchmarks, run_benchmarks
+
+
+def _results(calibration: float, **times: float) -> dict:
+    return {
+        "machine": {},
+        "calibration": calibration,
+        "benchmarks": {name: {"min": time} for name, time in times.items()},
+    }
+
+
+def test_compare_results():
+    baseline = _results(1.0, slower=1.0, faster=1.0, same=1.0, removed=1.0)
+    # Run on a machine twice as fast as the baseline's
+    results = _results(0.5, slower=1.0, faster=0.2, same=0.55, added=1.0)
+
+    statuses = {
+        comparison["name"]: comparison["status"]
+        for comparison in compare_results(results, baseline)
+    }
+    assert statuses == {
+        "slower": "regression",
+        "faster": "improvement",
+        "same": "unchanged",
+        "removed": "missing",
+        "added": "new",
+    }
+    raw = compare_results(results, baseline, normalise=False)
+    assert [comparison["ratio"] for comparison in raw[:3]] == [1.0, 0.2, 0.55]
+
+
+def test_suite_and_comparator(tmp_path, capsys):
+    results = run_benchmarks(["is_nhs_number", "render"], repeat=1)
+    assert set(results["benchmarks"]) == {"is_nhs_number[x1000]", "anonymise.render"}
+    assert all(timing["min"] > 0 for timing in results["benchmarks"].values())
+
+    results_path = tmp_path / "results.json"
+    results_path.write_text(json.dumps(results))
+    baseline_path = tmp_path / "baseline.json"
+    baseline_path.write_text(json.dumps(results))
+    assert main([str(results_path), "--baseline", str(baseline_path)]) == 0
+
+    results["benchmarks"]["anonymise.render"]["min"] *= 2
+    results_path.write_text(json.dumps(results))
+    assert main([str(results_path), "--baseline", str(baseline_path)]) == 1
+    assert "1 regression(s): anonymise.render" in capsys.readouterr().out
+
+
+def test_baseline_covers_every_benchmark(tmp_path):
+    baseline = json.loads(BASELINE_PATH.read_text())
+    assert set(baseline["benchmarks"]) == set(build_benchmarks(tmp_path))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,147 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import pteredactyl as pt
+from pteredactyl.cli import build_parser, collect_jobs, format_summary, main
+
+
+def test_collect_jobs_for_directory(tmp_path):
+    input_dir = tmp_path / "notes"
+    (input_dir / "2024").mkdir(parents=True)
+    (input_dir / "a.csv").write_text("note\n")
+    (input_dir / "2024" / "b.jsonl").write_text("")
+    (input_dir / "readme.md").write_text("")
+    output_dir = tmp_path / "redacted"
+
+    assert collect_jobs([input_dir], output_dir) == [
+        (input_dir / "a.csv", output_dir / "a.csv")
+    ]
+    assert collect_jobs(
+        [input_dir], output_dir, recursive=True, output_format="parquet"
+    ) == [
+        (input_dir / "2024" / "b.jsonl", output_dir / "2024" / "b.parquet"),
+        (input_dir / "a.csv", output_dir / "a.parquet"),
+    ]
+
+
+def test_collect_jobs_for_single_file(tmp_path):
+    input_file = tmp_path / "notes.csv"
+    input_file.write_text("note\n")
+
+    assert collect_jobs([input_file], tmp_path / "out.csv") == [
+        (input_file, tmp_path / "out.csv")
+    ]
+
+    with pytest.raises(FileNotFoundError):
+        collect_jobs([tmp_path / "missing.csv"], tmp_path / "out.csv")
+
+
+def test_collect_jobs_rejects_duplicate_outputs(tmp_path):
+    for name in ("ward_a", "ward_b"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "notes.csv").write_text("note\n")
+    (tmp_path / "ward_a" / "letters.txt").write_text("")
+    (tmp_path / "ward_a" / "letters.jsonl").write_text("")
+    output_dir = tmp_path / "redacted"
+
+    with pytest.raises(ValueError, match="notes.csv"):
+        collect_jobs([tmp_path / "ward_a", tmp_path / "ward_b"], output_dir)
+    with pytest.raises(ValueError, match="letters"):
+        collect_jobs([tmp_path / "ward_a"], output_dir, output_format="jsonl")
+    with pytest.raises(SystemExit):
+        main(
+            [
+                str(tmp_path / "ward_a"),
+                str(tmp_path / "ward_b"),
+                "-o",
+                str(output_dir),
+                "-c",
+                "note",
+            ]
+        )
+
+
+def test_main_redacts_csv_and_text_files(tmp_path, capsys, tiny_model):
+    notes = [
+        "Seen at SO16 6YD, NHS number 943 476 5919",
+        "No identifiers here",
+        "NHS number 943 476 5919, called Jane Smith",
+    ]
+    input_dir = tmp_path / "notes"
+    input_dir.mkdir()
+    pd.DataFrame({"id": range(3), "note": notes}).to_csv(
+        input_dir / "clinic.csv", index=False
+    )
+    (input_dir / "letters.txt").write_text("\n".join(notes) + "\n")
+    output_dir = tmp_path / "redacted"
+
+    exit_code = main(
+        [
+            str(input_dir),
+            "-o",
+            str(output_dir),
+            "-c",
+            "note",
+            "-m",
+            tiny_model,
+            "--output-format",
+            "jsonl",
+            "-b",
+            "2",
+            "--chunksize",
+            "2",
+            "-w",
+            "2",
+        ]
+    )
+
+    assert exit_code == 0
+    expected = pt.anonymise_batch(
+        notes, analyser=pt.create_analyser(model_path=tiny_model)
+    )
+    clinic = pd.read_json(output_dir / "clinic.jsonl", lines=True)
+    assert clinic["id"].tolist() == [0, 1, 2]
+    assert clinic["note"].tolist() == expected
+    letters = pd.read_json(output_dir / "letters.jsonl", lines=True)
+    assert letters["text"].tolist() == expected
+    assert "943 476 5919" not in expected[2]
+    summary = capsys.readouterr().out
+    assert "Files:              2" in summary
+    assert "Rows:               6" in summary
+
+
+def test_parser_performance_options():
+    args = build_parser().parse_args(
+        [
+            "notes.csv",
+            "-o",
+            "out.csv",
+            "-c",
+            "note_text",
+            "-b",
+            "64",
+            "-w",
+            "4",
+            "--regex-entities",
+        ]
+    )
+
+    assert args.inputs == [Path("notes.csv")]
+    assert args.batch_size == 64
+    assert args.workers == 4
+    assert args.regex_entities == []
+
+
+def test_format_summary():
+    summary = format_summary(
+        n_files=1, n_rows=100, elapsed=2.0, chunk_latencies=[0.5, 1.5]
+    )
+
+    assert "Throughput:         50.0 rows/s" in summary
+    assert "Chunk latency max:  1500.0 ms" in summary
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,95 @@
+import json
+import random
+import re
+
+import pandas as pd
+import pytest
+
+from pteredactyl.corpus import (
+    CorpusGenerator,
+    generate_nhs_number,
+    generate_postcode,
+    write_corpus,
+)
+from pteredactyl.regex_check_functions import is_nhs_number
+from pteredactyl.regex_entities import REGEX_ENTITIES
+
+postcode_pattern = re.compile(REGEX_ENTITIES["POSTCODE"][0])
+
+
+def test_nhs_numbers_and_postcodes():
+    rng = random.Random(0)
+    for _ in range(200):
+        assert is_nhs_number(generate_nhs_number(rng))
+        assert not is_nhs_number(generate_nhs_number(rng, valid=False))
+        assert postcode_pattern.fullmatch(generate_postcode(rng))
+        assert not postcode_pattern.search(generate_postcode(rng, valid=False))
+
+
+def test_gold_spans_and_options():
+    generator = CorpusGenerator(seed=1, duplicate_rate=0.3, pii_density=0.8)
+    notes = list(generator.generate(500))
+
+    assert [note["id"] for note in notes] == list(range(500))
+    assert notes == list(
+        CorpusGenerator(seed=1, duplicate_rate=0.3, pii_density=0.8).generate(500)
+    )
+    assert 0.2 < 1 - len({note["text"] for note in notes}) / len(notes) < 0.4
+
+    validities = set()
+    for note in notes:
+        for span in note["spans"]:
+            value = note["text"][span["start"] : span["end"]]
+            assert value == value.strip() and value
+            if span["entity_type"] == "NHS_NUMBER":
+                assert is_nhs_number(value) == span["valid"]
+                validities.add(("NHS_NUMBER", span["valid"]))
+            elif span["entity_type"] == "POSTCODE":
+                # Invalid postcodes are not matched, even with the text around them
+                matched = any(
+                    match.start() < span["end"] and span["start"] < match.end()
+                    for match in postcode_pattern.finditer(note["text"])
+                )
+                assert matched == span["valid"]
+                validities.add(("POSTCODE", span["valid"]))
+    assert validities == {
+        ("NHS_NUMBER", True),
+        ("NHS_NUMBER", False),
+        ("POSTCODE", True),
+        ("POSTCODE", False),
+    }
+
+    fixed = CorpusGenerator(
+        mean_sentences=3, length_distribution="fixed", pii_density=0
+    )
+    assert all(
+        note["spans"] == [] and note["text"].count(". ") == 2
+        for note in fixed.generate(20)
+    )
+
+    with pytest.raises(ValueError):
+        CorpusGenerator(pii_density=1.5)
+    with pytest.raises(ValueError):
+        CorpusGenerator(length_distribution="normal")
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".jsonl", ".parquet"])
+def test_write_corpus(tmp_path, suffix):
+    path = tmp_path / f"notes{suffix}"
+    assert write_corpus(path, 25, chunksize=10, seed=2) == 25
+
+    readers = {
+        ".csv": pd.read_csv,
+        ".jsonl": lambda p: pd.read_json(p, lines=True),
+        ".parquet": pd.read_parquet,
+    }
+    df = readers[suffix](path)
+    expected = list(CorpusGenerator(seed=2).generate(25))
+    assert df["text"].to_list() == [note["text"] for note in expected]
+    assert [json.loads(spans) for spans in df["spans"]] == [
+        note["spans"] for note in expected
+    ]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
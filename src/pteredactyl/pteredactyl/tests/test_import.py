@@ -0,0 +1,44 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+import pteredactyl
+
+HEAVY_MODULES = ["torch", "pandas", "presidio_analyzer", "spacy", "transformers"]
+
+
+def _run_in_fresh_interpreter(code: str) -> dict:
+    """Runs code in a new interpreter, so that modules imported by other tests do not count."""
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def test_import_does_not_load_heavy_modules():
+    result = _run_in_fresh_interpreter(
+        f"""
+import json, sys
+import pteredactyl
+pteredactyl.is_nhs_number("943 476 5919")
+pteredactyl.DEFAULT_REGEX_ENTITIES
+print(json.dumps({{"loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+    )
+
+    assert result["loaded"] == []
+
+
+def test_lazy_attributes():
+    assert pteredactyl.is_nhs_number("943 476 5919")
+    assert "anonymise" in dir(pteredactyl)
+    assert pteredactyl.anonymise.__module__ == "pteredactyl.redactor"
+
+    with pytest.raises(AttributeError):
+        pteredactyl.not_an_attribute
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,92 @@
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import pteredactyl as pt
+from pteredactyl.parallel import (
+    anonymise_parallel,
+    create_anonymiser_pool,
+    load_shared_model,
+)
+
+texts = [
+    f"Note {i}: patient seen at SO16 6YD, NHS number 943 476 5919, called Jane Smith"
+    for i in range(23)
+]
+
+
+@pytest.fixture(scope="module")
+def analyser(tiny_model):
+    return pt.create_analyser(model_path=tiny_model)
+
+
+@pytest.fixture(scope="module")
+def pool(tiny_model):
+    with create_anonymiser_pool(
+        n_workers=2,
+        model_path=tiny_model,
+        torch_threads=1,
+        mp_context=multiprocessing.get_context("fork"),
+    ) as pool:
+        yield pool
+
+
+def test_anonymise_parallel_matches_single_process(analyser, pool):
+    expected = pt.anonymise_batch(texts, analyser=analyser)
+
+    # Small shards spread the texts across both workers, and complete out of order
+    assert anonymise_parallel(texts, executor=pool, shard_size=2) == expected
+    assert anonymise_parallel(texts, executor=pool, shard_size=5) == expected
+    assert anonymise_parallel([], executor=pool) == []
+
+
+def test_anonymise_df_parallel_keeps_row_order_and_missing_values(analyser, pool):
+    df = pd.DataFrame(
+        {
+            "id": range(len(texts) + 3),
+            "text": texts[:10] + [np.nan, None, 42] + texts[10:],
+        },
+        index=range(100, 100 + len(texts) + 3),
+    )
+    expected = pt.anonymise_df(df.copy(), column="text", analyser=analyser)
+
+    result = pt.anonymise_df(df.copy(), column="text", executor=pool, shard_size=3)
+    pd.testing.assert_frame_equal(result, expected)
+    pd.testing.assert_series_equal(result["text"], df["text"])
+    assert result["text_redacted"].iloc[10] is np.nan
+    assert result["text_redacted"].iloc[11] is None
+    assert result["text_redacted"].iloc[12] == 42
+
+    # The pool's workers, and the analysers they built, are reused across calls
+    workers = set(pool._processes)
+    redacted_in_place = pt.anonymise_df(
+        df.copy(), column="text", executor=pool, shard_size=3, col_inplace=True
+    )
+    pd.testing.assert_series_equal(
+        redacted_in_place["text"], expected["text_redacted"], check_names=False
+    )
+    assert set(pool._processes) == workers
+
+
+def test_shared_model_weights_match_single_process(tiny_model):
+    model = load_shared_model(tiny_model)
+    assert all(parameter.is_shared() for parameter in model.parameters())
+
+    df = pd.DataFrame({"text": texts})
+    expected = pt.anonymise_df(df.copy(), column="text", model_path=tiny_model)
+
+    result = pt.anonymise_df(
+        df.copy(),
+        column="text",
+        model_path=tiny_model,
+        n_workers=2,
+        shard_size=4,
+        share_model_weights=True,
+    )
+    pd.testing.assert_frame_equal(result, expected)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,154 @@
+import multiprocessing
+import pickle
+import sqlite3
+
+import pytest
+from presidio_analyzer.recognizer_result import RecognizerResult
+from presidio_anonymizer.entities import OperatorConfig
+
+from pteredactyl.pseudonyms import MAX_KEYS_PER_QUERY, PseudonymStore
+from pteredactyl.redactor import _anonymise_results
+
+names = ["Alice Jones", "Bob Smith", "Carol White"]
+
+
+def _lookup_in_worker(store: PseudonymStore, originals: list[str]) -> list[str]:
+    return store.lookup("PERSON", originals)
+
+
+def test_pseudonyms_are_consistent(tmp_path):
+    path = tmp_path / "pseudonyms.db"
+    store = PseudonymStore(path, surrogates={"PERSON": names})
+
+    first = store.lookup("PERSON", ["Jane Smith", "jane   SMITH", "John Doe"])
+    assert first[0] == first[1]
+    assert set(first) <= set(names)
+    assert len(store) == 2
+
+    # Entity types without surrogates get numbered placeholders, labelled as in the renderer
+    assert store.lookup_many(
+        [("LOCATION", "Southampton"), ("PHONE_NUMBER", "07700 900123")]
+        + [("LOCATION", "Winchester"), ("LOCATION", "southampton")]
+    ) == ["<LOCATION_1>", "<NUMBER_1>", "<LOCATION_2>", "<LOCATION_1>"]
+    # The same original of a different entity type is a different entity
+    assert store.lookup("HOSPITAL", ["Southampton"]) == ["<HOSPITAL_1>"]
+
+    # Pseudonyms persist when the store is reopened, and originals are not stored
+    store.close()
+    reopened = PseudonymStore(path, surrogates={"PERSON": names})
+    assert reopened.lookup("PERSON", ["John Doe", "Jane Smith"]) == first[:0:-1]
+    assert reopened.lookup("LOCATION", ["Basingstoke"]) == ["<LOCATION_3>"]
+    with sqlite3.connect(path) as connection:
+        dump = "\n".join(connection.iterdump())
+    assert "Jane" not in dump and "Southampton" not in dump
+
+
+def test_distinct_originals_get_distinct_pseudonyms(tmp_path):
+    path = tmp_path / "pseudonyms.db"
+    surrogates = [f"Name {i}" for i in range(20)]
+    store = PseudonymStore(path, surrogates={"PERSON": surrogates})
+
+    # Drawn in several batches, so later draws must avoid the surrogates taken by earlier ones
+    pseudonyms = []
+    for start in range(0, 18, 6):
+        pseudonyms += store.lookup(
+            "PERSON", [f"Patient {i}" for i in range(start, start + 6)]
+        )
+    assert len(set(pseudonyms)) == 18
+    assert set(pseudonyms) <= set(surrogates)
+
+    # Once the surrogates run out, new originals are numbered, also after the store is reopened
+    store.close()
+    reopened = PseudonymStore(path, surrogates={"PERSON": surrogates})
+    pseudonyms += reopened.lookup("PERSON", [f"Patient {i}" for i in range(18, 25)])
+    assert len(set(pseudonyms)) == 25
+    assert set(surrogates) <= set(pseudonyms)
+    assert sorted(set(pseudonyms) - set(surrogates)) == [
+        f"<PERSON_{i}>" for i in range(1, 6)
+    ]
+
+    # The same surrogate can be used for different entity types
+    assert reopened.lookup("HOSPITAL", ["Patient 0"]) == ["<HOSPITAL_1>"]
+
+
+def test_bulk_lookup(tmp_path):
+    store = PseudonymStore(tmp_path / "pseudonyms.db", cache_size=10)
+    originals = [f"Patient {i}" for i in range(MAX_KEYS_PER_QUERY * 2 + 1)]
+
+    pseudonyms = store.lookup("PERSON", originals)
+    assert pseudonyms == [f"<PERSON_{i}>" for i in range(1, len(originals) + 1)]
+    assert store.misses == len(originals)
+
+    # Only the last 10 pseudonyms are cached, so the rest are read back from the database
+    assert store.lookup("PERSON", originals[::-1]) == pseudonyms[::-1]
+    assert store.hits == 10
+    assert store.lookup("PERSON", originals[:1]) == pseudonyms[:1]
+    assert store.hits == 11
+    assert len(store) == len(originals)
+
+
+def test_pseudonyms_are_shared_between_processes(tmp_path):
+    store = PseudonymStore(tmp_path / "pseudonyms.db")
+    expected = store.lookup("PERSON", ["Jane Smith"])
+
+    assert pickle.loads(pickle.dumps(store)).lookup("PERSON", ["Jane Smith"]) == (
+        expected
+    )
+
+    originals = [f"Patient {i}" for i in range(50)]
+    with multiprocessing.get_context("spawn").Pool(2) as pool:
+        results = pool.starmap(
+            _lookup_in_worker,
+            [(store, originals), (store, originals[::-1]), (store, ["Jane Smith"])],
+        )
+
+    assert results[0] == results[1][::-1]
+    assert results[2] == expected
+    assert len(set(results[0])) == len(originals)
+    assert store.lookup("PERSON", originals) == results[0]
+
+
+def test_render_pseudonyms(tmp_path):
+    store = PseudonymStore(tmp_path / "pseudonyms.db", surrogates={"PERSON": names})
+    texts = ["Jane Smith saw John Doe", "John Doe and JANE SMITH", "No one"]
+    batch_results = [
+        [
+            RecognizerResult("PERSON", 0, 10, 0.9),
+            RecognizerResult("PERSON", 15, 23, 0.9),
+        ],
+        [
+            RecognizerResult("PERSON", 0, 8, 0.9),
+            RecognizerResult("PERSON", 13, 23, 0.9),
+        ],
+        [],
+    ]
+
+    anonymised = _anonymise_results(
+        texts=texts,
+        batch_results=batch_results,
+        entities=["PERSON"],
+        highlight=False,
+        replacement_lists=None,
+        mask_individual_words=False,
+        operators={"PERSON": OperatorConfig("pseudonym", {"store": store})},
+    )
+
+    jane, john = store.lookup("PERSON", ["Jane Smith", "John Doe"])
+    assert anonymised == [f"{jane} saw {john}", f"{john} and {jane}", "No one"]
+    # The whole batch was looked up at once, and rendering found it in the cache
+    assert store.misses == 2
+
+    with pytest.raises(ValueError):
+        _anonymise_results(
+            texts=texts,
+            batch_results=batch_results,
+            entities=["PERSON"],
+            highlight=False,
+            replacement_lists=None,
+            mask_individual_words=False,
+            operators={"PERSON": OperatorConfig("pseudonym")},
+        )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -4,9 +4,9 @@ import pytest
 import pteredactyl as pt
 
 
-@pytest.fixture
-def load_analyser(scope="module"):
-    analyzer = pt.create_analyser()
+@pytest.fixture(scope="module")
+def load_analyser():
+    return pt.create_analyser()
 
 
 @pytest.fixture
@@ -81,6 +81,44 @@ def test_should_anonymise_df(load_analyser, dummy_text, expected_redact):
     assert redacted_df[f"{COL_TO_REDACT}_redacted"].iloc[0] == expected_redact
 
 
+def test_anonymise_df_analyses_each_distinct_text_once(tiny_model):
+    analyser = pt.create_analyser(model_path=tiny_model)
+    nhs_text = "NHS number 943 476 5919"
+    df = pd.DataFrame(
+        {
+            "note": [nhs_text, None, "Seen at SO16 6YD", nhs_text, ""],
+            "letter": ["Seen at SO16 6YD", nhs_text, "   ", float("nan"), nhs_text],
+            "count": [1, 2, 3, 4, 5],
+        }
+    )
+    result_cache = pt.ResultCache()
+
+    redacted_df = pt.anonymise_df(
+        df,
+        column=["note", "letter", "count"],
+        analyser=analyser,
+        entities=[],
+        result_cache=result_cache,
+    )
+
+    assert redacted_df["note_redacted"].tolist() == [
+        "NHS number <NHS_NUMBER>",
+        None,
+        "Seen at <POSTCODE>",
+        "NHS number <NHS_NUMBER>",
+        "",
+    ]
+    assert redacted_df["letter_redacted"].iloc[:3].tolist() == [
+        "Seen at <POSTCODE>",
+        "NHS number <NHS_NUMBER>",
+        "   ",
+    ]
+    assert pd.isna(redacted_df["letter_redacted"].iloc[3])
+    assert redacted_df["count_redacted"].dtype == df["count"].dtype
+    assert "note_redacted" not in df.columns
+    assert result_cache.stats["misses"] == 2
+
+
 def test_should_anonymise_with_hide_in_plain_sight(
     load_analyser, dummy_text, expected_replacement, replacement_lists
 ):
@@ -100,5 +138,36 @@ def test_should_anonymise_with_regex_matches(load_analyser):
     print(redacted)
 
 
+def test_should_anonymise_batch(load_analyser, dummy_text, expected_redact):
+    texts = [dummy_text, "", dummy_text]
+
+    redacted = pt.anonymise_batch(texts, analyser=load_analyser, batch_size=2)
+    assert redacted == [expected_redact, "", expected_redact]
+
+
+def test_analyse_batch_matches_analyse(load_analyser, dummy_text):
+    texts = [dummy_text, "No identifiers here", dummy_text * 20]
+
+    batch_results = pt.analyse_batch(texts, analyser=load_analyser)
+    single_results = [pt.analyse(text, analyser=load_analyser) for text in texts]
+
+    assert batch_results == single_results
+
+
+def test_analyser_cache_reuses_analyser(dummy_text, expected_redact):
+    cache = pt.AnalyserCache()
+    assert not cache.is_ready()
+
+    cache.warm()
+    assert cache.is_ready()
+
+    analyser = cache.get()
+    assert cache.get() is analyser
+    assert len(cache) == 1
+
+    redacted = pt.anonymise(dummy_text, analyser=analyser)
+    assert redacted == expected_redact
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,159 @@
+import re
+
+import pytest
+
+from pteredactyl.recognisers.pteredactyl_recogniser import (
+    PTEREDACTYL_RECOGNISER_NAME,
+    CombinedPteredactylRecogniser,
+)
+from pteredactyl.recognisers.regex_engine import RegexScanner
+from pteredactyl.regex_check_functions import is_nhs_number
+from pteredactyl.regex_entities import (
+    build_pteredactyl_recogniser,
+    build_regex_entity_recogniser_list,
+)
+
+text = "Seen at SO16 6YD by Dr Jones (j.jones@nhs.net), NHS number 943 476 5919, ref 1234567890."
+
+
+def test_combined_recogniser_matches_individual_recognisers():
+    recognisers = build_regex_entity_recogniser_list(
+        ["NHS_NUMBER", "POSTCODE", "EMAIL_ADDRESS"]
+    )
+    entities = ["NHS_NUMBER", "POSTCODE", "EMAIL_ADDRESS"]
+
+    expected = sorted(
+        (result.entity_type, result.start, result.end)
+        for recogniser in recognisers
+        for result in recogniser.analyze(text, entities, None)
+    )
+    combined = CombinedPteredactylRecogniser(recognisers)
+    results = combined.analyze(text, entities, None)
+
+    assert combined.name == PTEREDACTYL_RECOGNISER_NAME
+    assert sorted((r.entity_type, r.start, r.end) for r in results) == expected
+    assert [r.entity_type for r in sorted(results, key=lambda r: r.start)] == [
+        "POSTCODE",
+        "EMAIL_ADDRESS",
+        "NHS_NUMBER",
+    ]
+
+
+def test_combined_recogniser_only_scans_requested_entities():
+    combined = CombinedPteredactylRecogniser(
+        build_regex_entity_recogniser_list(["NHS_NUMBER", "EMAIL_ADDRESS"])
+    )
+
+    results = combined.analyze(text, ["EMAIL_ADDRESS"], None)
+
+    assert [r.entity_type for r in results] == ["EMAIL_ADDRESS"]
+
+
+@pytest.mark.parametrize("backend", ["re", "regex"])
+def test_patterns_are_scanned_independently(backend):
+    if backend == "regex":
+        pytest.importorskip("regex")
+
+    scanner = RegexScanner(
+        [re.compile(r"\d{10}"), re.compile(r"(?i)REF\s\d+"), re.compile(r"\d+")],
+        check_functions=[is_nhs_number, None, None],
+        backend=backend,
+    )
+
+    # 1234567890 fails the NHS checksum, but still matches the other patterns, as do digits inside other matches
+    assert sorted(scanner.scan("ref 9434765919 and 1234567890")) == [
+        (0, 4, 14),
+        (1, 0, 14),
+        (2, 4, 14),
+        (2, 19, 29),
+    ]
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        (
+            "contact LS12AB@example.com",
+            [("POSTCODE", 8, 14), ("EMAIL_ADDRESS", 8, 26)],
+        ),
+        # A rejected NHS number candidate does not hide the email it runs into
+        ("1234 5678 90 12abc@x.com", [("EMAIL_ADDRESS", 13, 24)]),
+    ],
+)
+def test_overlapping_entities_of_different_types(text, expected):
+    recognisers = build_regex_entity_recogniser_list(
+        ["NHS_NUMBER", "POSTCODE", "EMAIL_ADDRESS"]
+    )
+    entities = ["NHS_NUMBER", "POSTCODE", "EMAIL_ADDRESS"]
+    individual = sorted(
+        (result.entity_type, result.start, result.end)
+        for recogniser in recognisers
+        for result in recogniser.analyze(text, entities, None)
+    )
+
+    results = CombinedPteredactylRecogniser(recognisers).analyze(text, entities, None)
+
+    assert individual == sorted(expected)
+    assert sorted((r.entity_type, r.start, r.end) for r in results) == individual
+
+
+def test_prefilter_skips_texts_without_its_characters():
+    calls = []
+
+    def check(match):
+        calls.append(match)
+        return True
+
+    recogniser = build_pteredactyl_recogniser(
+        "WARD", r"[A-Z]+ ward", check_function=check, prefilter="W"
+    )
+    combined = CombinedPteredactylRecogniser([recogniser])
+
+    assert combined.analyze("admitted to the acute ward", ["WARD"], None) == []
+    assert calls == []
+    assert len(combined.analyze("admitted to WESSEX ward", ["WARD"], None)) == 1
+
+
+def test_batch_check_function_is_called_once_per_batch():
+    calls = []
+
+    def are_even(matches):
+        calls.append(matches)
+        return [int(match) % 2 == 0 for match in matches]
+
+    recogniser = build_pteredactyl_recogniser(
+        "EVEN", r"\d+", check_function=None, batch_check_function=are_even
+    )
+    combined = CombinedPteredactylRecogniser([recogniser])
+    texts = ["1 2 3 4", "10 11", "no numbers"]
+
+    results = combined.analyze_batch(texts, ["EVEN"])
+
+    assert calls == [["1", "2", "3", "4", "10", "11"]]
+    assert [[(r.start, r.end) for r in text_results] for text_results in results] == [
+        [(2, 3), (6, 7)],
+        [(0, 2)],
+        [],
+    ]
+
+    # analyze() calls are served from prefetched matches
+    with combined.prefetch(texts, ["EVEN"]):
+        assert len(combined.analyze("1 2 3 4", ["EVEN"], None)) == 2
+    assert len(calls) == 2
+
+
+def test_patterns_with_groups_and_backreferences():
+    scanner = RegexScanner(
+        [re.compile(r"(\w)\1"), re.compile(r"(?P<digits>\d+)"), re.compile(r"z+")]
+    )
+
+    assert sorted(scanner.scan("aa 12 zz")) == [
+        (0, 0, 2),
+        (0, 6, 8),
+        (1, 3, 5),
+        (2, 6, 8),
+    ]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,82 @@
+import hashlib
+
+import pytest
+from presidio_analyzer.recognizer_result import RecognizerResult
+from presidio_anonymizer.entities import OperatorConfig
+
+from pteredactyl.renderer import has_random_operators, render, resolve_conflicts
+
+text = "Jane Smith (07700 900123) was seen at Southampton General Hospital"
+results = [
+    RecognizerResult("PERSON", 0, 4, 0.9),
+    RecognizerResult("PERSON", 5, 10, 0.8),
+    RecognizerResult("PHONE_NUMBER", 12, 24, 1.0),
+    RecognizerResult("HOSPITAL", 38, 66, 0.9),
+    RecognizerResult("LOCATION", 38, 49, 0.9),
+]
+
+
+def test_resolve_conflicts():
+    # Adjacent names are merged, and the location inside the hospital is dropped
+    assert resolve_conflicts(text, results) == [
+        (0, 10, "PERSON"),
+        (12, 24, "PHONE_NUMBER"),
+        (38, 66, "HOSPITAL"),
+    ]
+    assert resolve_conflicts(text, results, merge_adjacent=False)[:2] == [
+        (0, 4, "PERSON"),
+        (5, 10, "PERSON"),
+    ]
+
+    # Overlapping results of the same type are merged, and the highest score wins for the same span
+    assert resolve_conflicts(
+        "abcdefgh",
+        [
+            RecognizerResult("PERSON", 0, 4, 0.5),
+            RecognizerResult("PERSON", 2, 6, 0.5),
+            RecognizerResult("LOCATION", 0, 6, 0.9),
+        ],
+    ) == [(0, 6, "LOCATION")]
+
+    assert [(result.start, result.end) for result in results[:2]] == [(0, 4), (5, 10)]
+
+
+def test_render_placeholders():
+    spans = resolve_conflicts(text, results)
+
+    assert render(text, spans) == "<PERSON> (<NUMBER>) was seen at <HOSPITAL>"
+    assert render(text, spans, highlight=True).startswith(
+        "\033[1m\033[33m<PERSON>\033[0m ("
+    )
+    # Only the placeholder is relabelled, not the rest of the text
+    assert render("PHONE_NUMBER: 07700 900123", [(14, 26, "PHONE_NUMBER")]) == (
+        "PHONE_NUMBER: <NUMBER>"
+    )
+
+
+def test_render_operators():
+    spans = resolve_conflicts(text, results)
+    salt = "0123456789abcdef"
+    operators = {
+        "PERSON": OperatorConfig("surrogate", {"values": ["Alice Jones"]}),
+        "PHONE_NUMBER": OperatorConfig("mask", {"chars_to_mask": 6, "from_end": True}),
+        "DEFAULT": OperatorConfig("hash", {"salt": salt}),
+    }
+
+    assert render(text, spans, operators) == (
+        "Alice Jones (07700 ******) was seen at "
+        + hashlib.sha256(("Southampton General Hospital" + salt).encode()).hexdigest()
+    )
+    assert render(
+        text, spans, {"DEFAULT": OperatorConfig("replace", {"new_value": "X"})}
+    ) == ("X (X) was seen at X")
+
+    assert has_random_operators(operators)
+    assert not has_random_operators({"DEFAULT": OperatorConfig("hash", {"salt": salt})})
+
+    with pytest.raises(ValueError):
+        render(text, spans, {"PERSON": OperatorConfig("encrypt")})
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
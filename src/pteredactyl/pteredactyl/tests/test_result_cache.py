@@ -0,0 +1,190 @@
+import threading
+import time
+
+import pytest
+from presidio_analyzer.recognizer_result import RecognizerResult
+
+from pteredactyl import redactor
+from pteredactyl.recognisers.transformers_recogniser import TransformersRecogniser
+from pteredactyl.result_cache import ResultCache, analyser_fingerprint
+
+
+def _compute(texts, calls):
+    def compute(positions):
+        calls.append([texts[i] for i in positions])
+        return [[RecognizerResult("PERSON", 0, len(texts[i]), 1.0)] for i in positions]
+
+    return compute
+
+
+def test_repeated_texts_are_computed_once():
+    result_cache = ResultCache()
+    texts = ["Jane", "John", "Jane", "Jane"]
+    calls = []
+
+    keys = result_cache.keys(texts, entities=["PERSON"])
+    results = result_cache.get_or_compute(keys, _compute(texts, calls))
+    assert calls == [["Jane", "John"]]
+    assert [result[0].end for result in results] == [4, 4, 4, 4]
+
+    # Cached results are returned as new RecognizerResults, which callers may change
+    results[0][0].start = 2
+    results = result_cache.get_or_compute(keys[:2], _compute(texts, calls))
+    assert len(calls) == 1
+    assert results[0][0].start == 0
+
+    assert result_cache.stats == {
+        "hits": 4,
+        "misses": 2,
+        "coalesced": 0,
+        "evictions": 0,
+        "size": 2,
+        "hit_rate": 4 / 6,
+    }
+
+
+def test_keys_depend_on_context():
+    result_cache = ResultCache()
+
+    assert result_cache.keys(["Jane"], entities=["PERSON"]) == result_cache.keys(
+        ["Jane"], entities=["PERSON"]
+    )
+    assert result_cache.keys(["Jane"], entities=["PERSON"]) != result_cache.keys(
+        ["Jane"], entities=["PERSON", "DATE_TIME"]
+    )
+    assert result_cache.keys(["Jane"], entities=["PERSON"]) != result_cache.keys(
+        ["John"], entities=["PERSON"]
+    )
+
+
+def test_least_recently_used_results_are_evicted():
+    result_cache = ResultCache(max_entries=2)
+    texts = ["a", "b", "c"]
+    calls = []
+    keys = result_cache.keys(texts)
+
+    result_cache.get_or_compute(keys[:2], _compute(texts, calls))
+    result_cache.get_or_compute(keys[:1], _compute(texts, calls))
+    result_cache.get_or_compute(keys[2:], _compute(["c"], calls))
+    assert len(result_cache) == 2
+    assert result_cache.stats["evictions"] == 1
+
+    # "b" was least recently used
+    calls.clear()
+    result_cache.get_or_compute(keys, _compute(texts, calls))
+    assert calls == [["b"]]
+
+    with pytest.raises(ValueError):
+        ResultCache(max_entries=0)
+
+
+def test_concurrent_requests_are_coalesced():
+    result_cache = ResultCache()
+    keys = result_cache.keys(["Jane"])
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_compute(positions):
+        started.set()
+        release.wait(timeout=10)
+        return _compute(["Jane"], calls)(positions)
+
+    results = []
+    owner = threading.Thread(
+        target=lambda: results.append(result_cache.get_or_compute(keys, slow_compute))
+    )
+    owner.start()
+    started.wait(timeout=10)
+    waiter = threading.Thread(
+        target=lambda: results.append(result_cache.get_or_compute(keys, slow_compute))
+    )
+    waiter.start()
+    # Release the owner only once the waiter is waiting on its computation
+    deadline = time.monotonic() + 10
+    while result_cache.stats["coalesced"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    owner.join()
+    waiter.join()
+
+    assert len(calls) == 1
+    assert [result[0][0].end for result in results] == [4, 4]
+    assert result_cache.stats["coalesced"] == 1
+
+
+def test_failed_computations_are_not_cached():
+    result_cache = ResultCache()
+    keys = result_cache.keys(["Jane"])
+
+    def failing_compute(positions):
+        raise RuntimeError("model failed")
+
+    with pytest.raises(RuntimeError):
+        result_cache.get_or_compute(keys, failing_compute)
+
+    calls = []
+    result_cache.get_or_compute(keys, _compute(["Jane"], calls))
+    assert calls == [["Jane"]]
+
+
+def test_analyse_batch_with_result_cache(tiny_model):
+    analyser = redactor.create_analyser(model_path=tiny_model)
+    texts = ["NHS number 943 476 5919", "Seen at SO16 6YD", "NHS number 943 476 5919"]
+    result_cache = ResultCache()
+
+    expected = redactor.analyse_batch(texts, analyser=analyser, entities=[])
+    results = redactor.analyse_batch(
+        texts, analyser=analyser, entities=[], result_cache=result_cache
+    )
+    assert results == expected
+    assert result_cache.stats["misses"] == 2
+
+    assert redactor.analyse(
+        texts[1], analyser=analyser, entities=[], result_cache=result_cache
+    ) == [results[1][0]]
+    assert result_cache.stats["hits"] == 2
+
+    # Different regex entities give a different analyser fingerprint, so are not served from the cache
+    fingerprint = analyser_fingerprint(analyser)
+    redactor.analyse(
+        texts[1],
+        analyser=analyser,
+        entities=[],
+        regex_entities=["NHS_NUMBER"],
+        result_cache=result_cache,
+    )
+    assert analyser_fingerprint(analyser) != fingerprint
+    assert result_cache.stats["misses"] == 3
+
+
+def test_fingerprint_covers_transformers_settings(tiny_model):
+    analyser = redactor.create_analyser(model_path=tiny_model)
+    (transformers_recogniser,) = [
+        recogniser
+        for recogniser in analyser.registry.recognizers
+        if isinstance(recogniser, TransformersRecogniser)
+    ]
+    fingerprint = analyser_fingerprint(analyser)
+
+    changes = {
+        "model_to_presidio_mapping": {"PER": "LOCATION"},
+        "ignore_labels": ["O", "PER"],
+        "chunk_length": 100,
+        "text_overlap_length": 10,
+        "id_score_reduction": 1.0,
+        "aggregation_mechanism": "first",
+    }
+    for attribute, value in changes.items():
+        original = getattr(transformers_recogniser, attribute)
+        setattr(transformers_recogniser, attribute, value)
+        assert analyser_fingerprint(analyser) != fingerprint, attribute
+        setattr(transformers_recogniser, attribute, original)
+
+    # Batching and threading do not change the results
+    transformers_recogniser.batch_size = 2
+    transformers_recogniser.chunk_workers = 4
+    assert analyser_fingerprint(analyser) == fingerprint
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
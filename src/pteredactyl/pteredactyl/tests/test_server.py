@@ -0,0 +1,213 @@
+import asyncio
+import json
+
+import pytest
+
+from pteredactyl.server import RedactionService
+
+nhs_text = "NHS number 943 476 5919"
+
+
+async def _request(
+    app: RedactionService, method: str, path: str, body=None
+) -> tuple[int, dict, dict]:
+    """Sends one HTTP request to the ASGI app, returning the status, JSON body and headers of its response."""
+    content = body if isinstance(body, bytes) else json.dumps(body).encode()
+    messages = [{"type": "http.request", "body": content, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    await app({"type": "http", "method": method, "path": path}, receive, send)
+    headers = {name.decode(): value.decode() for name, value in sent[0]["headers"]}
+    return sent[0]["status"], json.loads(sent[1]["body"]), headers
+
+
+class _Lifespan:
+    """Drives the ASGI lifespan protocol, as a server does on startup and shutdown."""
+
+    def __init__(self, app: RedactionService):
+        self.received: asyncio.Queue = asyncio.Queue()
+        self.sent: asyncio.Queue = asyncio.Queue()
+        self.task = asyncio.create_task(
+            app({"type": "lifespan"}, self.received.get, self.sent.put)
+        )
+
+    async def startup(self) -> None:
+        await self.received.put({"type": "lifespan.startup"})
+        assert (await self.sent.get())["type"] == "lifespan.startup.complete"
+
+    async def shutdown(self) -> None:
+        await self.received.put({"type": "lifespan.shutdown"})
+        assert (await self.sent.get())["type"] == "lifespan.shutdown.complete"
+        await self.task
+
+
+def test_service(tiny_model):
+    app = RedactionService(models=[tiny_model], max_queue=4, max_texts_per_request=3)
+
+    async def main():
+        lifespan = _Lifespan(app)
+        await lifespan.startup()
+
+        # Live straight away, and ready once the model has loaded
+        assert (await _request(app, "GET", "/health"))[0] == 200
+        while (await _request(app, "GET", "/ready"))[0] != 200:
+            await asyncio.sleep(0.05)
+
+        options = {"entities": []}
+        status, body, headers = await _request(
+            app, "POST", "/anonymise", {"text": nhs_text, **options}
+        )
+        assert (status, body) == (200, {"text": "NHS number <NHS_NUMBER>"})
+        assert headers["content-type"] == "application/json"
+        status, body, _ = await _request(
+            app, "POST", "/analyse_batch", {"texts": [nhs_text, "None"], **options}
+        )
+        assert status == 200
+        assert [[r["entity_type"] for r in results] for results in body["results"]] == [
+            ["NHS_NUMBER"],
+            [],
+        ]
+        assert (
+            await _request(
+                app,
+                "POST",
+                "/anonymise_batch",
+                {
+                    "texts": [nhs_text] * 3,
+                    "operators": {"NHS_NUMBER": {"type": "mask", "chars_to_mask": 3}},
+                    **options,
+                },
+            )
+        )[1] == {"texts": ["NHS number *** 476 5919"] * 3}
+
+        # Client errors
+        assert (await _request(app, "GET", "/missing"))[0] == 404
+        assert (await _request(app, "GET", "/anonymise"))[2]["allow"] == "POST"
+        assert (await _request(app, "POST", "/anonymise", b"{"))[0] == 400
+        assert (await _request(app, "POST", "/anonymise", {"texts": []}))[0] == 400
+        assert (
+            await _request(app, "POST", "/analyse", {"text": "", "model": "other"})
+        )[0] == 400
+        assert (
+            await _request(
+                app,
+                "POST",
+                "/anonymise",
+                {"text": nhs_text, "operators": {"DEFAULT": {"type": "pseudonym"}}},
+            )
+        )[0] == 400
+        assert (
+            await _request(
+                app,
+                "POST",
+                "/anonymise",
+                {
+                    "text": nhs_text,
+                    "operators": {"DEFAULT": {"type": "mask", "masking_char": "**"}},
+                },
+            )
+        )[0] == 400
+        for operator in (
+            {"type": "surrogate", "values": "/etc/hostname"},
+            {"type": "surrogate", "values": []},
+            {"type": "surrogate", "values": ["A"], "rng": 0},
+            {"type": "mask", "chars_to_mask": "3"},
+        ):
+            status, body, _ = await _request(
+                app,
+                "POST",
+                "/anonymise",
+                {"text": nhs_text, "operators": {"DEFAULT": operator}, **options},
+            )
+            assert status == 400, body
+        assert (
+            await _request(
+                app,
+                "POST",
+                "/anonymise",
+                {"text": nhs_text, "regex_entities": ["NOT_AN_ENTITY"]},
+            )
+        )[0] == 400
+        assert (
+            await _request(
+                app,
+                "POST",
+                "/anonymise",
+                {
+                    "text": nhs_text,
+                    "operators": {"DEFAULT": {"type": "surrogate", "values": ["X"]}},
+                    **options,
+                },
+            )
+        )[1] == {"text": "NHS number X"}
+        too_many_texts = {"texts": [""] * 4}
+        assert (await _request(app, "POST", "/analyse_batch", too_many_texts))[0] == 413
+
+        # Requests beyond the queue limit are refused until texts are answered
+        first = asyncio.create_task(
+            _request(app, "POST", "/analyse_batch", {"texts": [nhs_text] * 3})
+        )
+        await asyncio.sleep(0)
+        status, _, headers = await _request(
+            app, "POST", "/analyse_batch", {"texts": [nhs_text] * 2}
+        )
+        assert (status, headers["retry-after"]) == (429, "1")
+        assert (await first)[0] == 200
+        assert app.pending == 0
+
+        # A text that fails early keeps the others in a request counted until they finish
+        batcher = next(iter(app.batchers.values()))
+        anonymise = batcher.anonymise
+        finished = []
+
+        async def fail_first(text, **options):
+            if text == "fail":
+                raise ValueError("Invalid operator")
+            await asyncio.sleep(0.05)
+            assert app.pending == 3
+            finished.append(text)
+            return await anonymise(text, **options)
+
+        batcher.anonymise = fail_first
+        status, body, _ = await _request(
+            app, "POST", "/anonymise_batch", {"texts": ["fail", nhs_text, nhs_text]}
+        )
+        batcher.anonymise = anonymise
+        assert (status, body["error"]) == (400, "Invalid operator")
+        assert finished == [nhs_text, nhs_text]
+        assert app.pending == 0
+
+        # Accepted texts are finished on shutdown, and new requests are refused
+        last = asyncio.create_task(
+            _request(app, "POST", "/anonymise", {"text": nhs_text, **options})
+        )
+        await asyncio.sleep(0)
+        await lifespan.shutdown()
+        assert (await last)[:2] == (200, {"text": "NHS number <NHS_NUMBER>"})
+        assert (await _request(app, "GET", "/ready"))[0] == 503
+        assert (await _request(app, "POST", "/anonymise", {"text": nhs_text}))[0] == 503
+
+    asyncio.run(main())
+
+
+def test_service_reports_loading_errors():
+    app = RedactionService(models=["/not/a/model"])
+
+    async def main():
+        status, body, _ = await _request(app, "POST", "/anonymise", {"text": nhs_text})
+        assert (status, body["error"]) == (503, "The models are still loading")
+        await app._loading
+        assert (await _request(app, "GET", "/ready"))[1]["status"] == "failed"
+        await app.shutdown()
+
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
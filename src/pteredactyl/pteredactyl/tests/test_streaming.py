@@ -0,0 +1,132 @@
+import pandas as pd
+import pytest
+
+import pteredactyl as pt
+from pteredactyl.streaming import anonymise_file, infer_file_format, iter_text_lines
+
+notes = [
+    "NHS number 943 476 5919",
+    "Seen at SO16 6YD",
+    "Nothing to redact",
+    "Moved from SO16 6YD, NHS number 943 476 5919",
+]
+redacted_notes = [
+    "NHS number <NHS_NUMBER>",
+    "Seen at <POSTCODE>",
+    "Nothing to redact",
+    "Moved from <POSTCODE>, NHS number <NHS_NUMBER>",
+]
+
+
+@pytest.fixture(scope="module")
+def analyser(tiny_model):
+    return pt.create_analyser(model_path=tiny_model)
+
+
+def test_iter_text_lines_keeps_line_endings(tmp_path):
+    path = tmp_path / "corpus.txt"
+    path.write_bytes(b"first line\r\nsecond line\n\nlast line")
+
+    chunks = list(iter_text_lines(path, chunksize=3))
+
+    assert chunks == [
+        (["first line", "second line", ""], ["\r\n", "\n", "\n"]),
+        (["last line"], [""]),
+    ]
+
+
+def test_iter_text_lines_empty_file(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_bytes(b"")
+
+    assert list(iter_text_lines(path)) == []
+
+
+def test_infer_file_format():
+    assert infer_file_format("notes.CSV") == "csv"
+    assert infer_file_format("notes.parquet") == "parquet"
+    assert infer_file_format("notes.jsonl") == "jsonl"
+    assert infer_file_format("corpus.txt") == "text"
+
+    with pytest.raises(ValueError):
+        infer_file_format("notes.xlsx")
+
+
+@pytest.mark.parametrize("file_format", ["csv", "jsonl", "parquet", "text"])
+def test_anonymise_file(tmp_path, analyser, file_format):
+    suffix = "txt" if file_format == "text" else file_format
+    src = tmp_path / f"notes.{suffix}"
+    dst = tmp_path / f"redacted.{suffix}"
+    df = pd.DataFrame({"id": range(len(notes)), "text": notes})
+    if file_format == "csv":
+        df.to_csv(src, index=False)
+    elif file_format == "jsonl":
+        df.to_json(src, orient="records", lines=True)
+    elif file_format == "parquet":
+        df.to_parquet(src, index=False)
+    else:
+        src.write_text("\n".join(notes) + "\n")
+
+    chunks = []
+    n_rows = anonymise_file(
+        src,
+        dst,
+        columns=None if file_format == "text" else "text",
+        chunksize=3,
+        analyser=analyser,
+        entities=["NHS_NUMBER", "POSTCODE"],
+        on_chunk=chunks.append,
+    )
+
+    assert n_rows == len(notes)
+    assert chunks == [3, 1]
+    if file_format == "text":
+        assert dst.read_text() == "\n".join(redacted_notes) + "\n"
+        return
+    readers = {
+        "csv": pd.read_csv,
+        "jsonl": lambda path: pd.read_json(path, lines=True),
+        "parquet": pd.read_parquet,
+    }
+    result = readers[file_format](dst)
+    assert result["id"].to_list() == list(range(len(notes)))
+    assert result["text"].to_list() == redacted_notes
+
+
+def test_anonymise_file_parquet_with_empty_first_chunk(tmp_path, analyser):
+    """The Parquet schema is fixed by the first chunk written, which here has no text and no values in "ward"."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    src = tmp_path / "notes.parquet"
+    dst = tmp_path / "redacted.parquet"
+    table = pa.table(
+        {
+            "text": pa.array([None, None] + notes, pa.string()),
+            "ward": pa.array([None, None, "A", "B", None, "C"], pa.string()),
+            "score": pa.array([None, 1, 2, 3, 4, 5], pa.int64()),
+        }
+    )
+    pq.write_table(table, src)
+
+    anonymise_file(
+        src,
+        dst,
+        columns="text",
+        chunksize=2,
+        analyser=analyser,
+        entities=["NHS_NUMBER", "POSTCODE"],
+        col_inplace=False,
+    )
+
+    result = pq.read_table(dst)
+    assert result.schema.field("text_redacted").type == pa.string()
+    assert result.schema.field("ward").type == pa.string()
+    assert result.schema.field("score").type == pa.int64()
+    assert result.column("text_redacted").to_pylist() == [None, None] + redacted_notes
+    assert result.column("ward").to_pylist() == table.column("ward").to_pylist()
+    assert result.column("score").to_pylist() == table.column("score").to_pylist()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -1,9 +1,16 @@
 import re
 
 import pytest
+from presidio_analyzer.recognizer_result import RecognizerResult
 
-from pteredactyl.regex_check_functions import is_nhs_number
+from pteredactyl import redactor
+from pteredactyl.nlp_engine import TokenizerNlpEngine
+from pteredactyl.regex_check_functions import are_nhs_numbers, is_nhs_number
 from pteredactyl.regex_entities import REGEX_ENTITIES
+from pteredactyl.support import (
+    find_substring_positions,
+    split_results_into_individual_words,
+)
 
 nhs_numbers = {
     "2345678909": True,
@@ -63,11 +70,104 @@ def test_is_nhs_number():
         assert is_nhs_number(nhs_number) == expected_match
 
 
+def test_are_nhs_numbers():
+    values = list(nhs_numbers) + ["", "943 476 5919 ", "94347659190", "943a765919"]
+    expected = [is_nhs_number(value) for value in values]
+
+    assert are_nhs_numbers(values).tolist() == expected
+    # Enough values to take the vectorised path
+    assert are_nhs_numbers(values * 10).tolist() == expected * 10
+    assert are_nhs_numbers([]).tolist() == []
+
+
 def test_is_uk_postcode():
     postcode_pattern = REGEX_ENTITIES["POSTCODE"][0]
     for postcode, expected_match in uk_postcodes.items():
         assert bool(re.search(postcode_pattern, postcode)) == expected_match
 
 
+def test_find_substring_positions():
+    assert find_substring_positions("abc\ndef", sep="\n") == [(0, 3), (4, 7)]
+    # Repeated words are found once each, and empty substrings are skipped
+    assert find_substring_positions(" Flat 1  Flat 1 ") == [
+        (1, 5),
+        (6, 7),
+        (9, 13),
+        (14, 15),
+    ]
+    assert find_substring_positions("") == []
+
+    with pytest.raises(ValueError):
+        find_substring_positions("abc", sep="")
+
+
+def test_split_results_into_individual_words():
+    text = "Lives at 1 High Street, High Wycombe"
+    results = split_results_into_individual_words(
+        text, [RecognizerResult("LOCATION", 9, len(text), 0.9)]
+    )
+
+    assert [text[result.start : result.end] for result in results] == [
+        "1",
+        "High",
+        "Street,",
+        "High",
+        "Wycombe",
+    ]
+    assert {result.entity_type for result in results} == {"LOCATION"}
+
+
+def test_split_results_into_individual_words_of_repeated_words():
+    # Every word appears many times, so each must be found at its own position rather than an earlier repeat
+    words = ["Ward", "7", "Southampton", "General", "Hospital"] * 2_000
+    text = " ".join(words)
+    boundaries = [0, 1_000, 1_001, 6_000, len(words)]
+    word_starts = [match.start() for match in re.finditer(r"\S+", text)]
+    word_ends = [match.end() for match in re.finditer(r"\S+", text)]
+    results = [
+        RecognizerResult("LOCATION", word_starts[first], word_ends[last - 1], 1.0)
+        for first, last in zip(boundaries, boundaries[1:])
+    ]
+
+    split_results = split_results_into_individual_words(text, results)
+
+    spans = [(result.start, result.end) for result in split_results]
+    assert len(spans) == len(set(spans))
+    assert len(split_results) == len(words)
+    assert sorted(spans) == list(zip(word_starts, word_ends))
+
+
+def test_tokenizer_nlp_engine():
+    nlp_engine = TokenizerNlpEngine(languages=["en"])
+    nlp_engine.load()
+
+    nlp_artifacts = nlp_engine.process_text("Jane Smith was seen today.", "en")
+
+    assert [token.text for token in nlp_artifacts.tokens] == [
+        "Jane",
+        "Smith",
+        "was",
+        "seen",
+        "today",
+        ".",
+    ]
+    assert nlp_artifacts.entities == []
+    assert nlp_engine.nlp["en"].pipe_names == []
+
+
+def test_create_analyser_does_not_load_spacy_model(monkeypatch, tiny_model):
+    def load_spacy_model(spacy_model):
+        raise AssertionError(f"Tried to load spaCy model {spacy_model}")
+
+    monkeypatch.setattr(redactor, "load_spacy_model", load_spacy_model)
+
+    analyser = redactor.create_analyser(model_path=tiny_model)
+
+    assert isinstance(analyser.nlp_engine, TokenizerNlpEngine)
+    assert redactor.anonymise_batch(
+        ["NHS number 943 476 5919"], analyser=analyser, entities=[]
+    ) == ["NHS number <NHS_NUMBER>"]
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
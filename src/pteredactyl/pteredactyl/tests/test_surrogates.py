@@ -0,0 +1,90 @@
+import multiprocessing
+import pickle
+
+import numpy as np
+import pytest
+from presidio_anonymizer.entities import OperatorConfig
+
+from pteredactyl.renderer import render
+from pteredactyl.replacement_lists.generate_lists import (
+    compile_surrogate_pools,
+    generate_locations,
+)
+from pteredactyl.surrogates import (
+    SurrogatePool,
+    load_surrogate_pool,
+    sample_surrogates,
+    write_surrogate_pool,
+)
+
+values = ["Andover", "Bath", "Ystradgynlais", "Llanfair Pwllgwyngyll", "Sainte-Émilie"]
+
+
+def test_surrogate_pool_round_trip(tmp_path):
+    path = write_surrogate_pool(values + [""], tmp_path / "towns.pool")
+    pool = load_surrogate_pool(path)
+
+    assert isinstance(pool, SurrogatePool)
+    assert load_surrogate_pool(str(path)) is pool
+    assert len(pool) == len(values)
+    assert list(pool) == values
+    assert pool[-1] == "Sainte-Émilie"
+    assert pool.take([2, 0, 2]) == ["Ystradgynlais", "Andover", "Ystradgynlais"]
+    assert pickle.loads(pickle.dumps(pool)) is pool
+
+    with pytest.raises(IndexError):
+        pool[len(values)]
+
+    (tmp_path / "not_a_pool").write_bytes(b"Andover\nBath\nBristol\n")
+    with pytest.raises(ValueError):
+        SurrogatePool(tmp_path / "not_a_pool")
+
+
+def test_sample_surrogates(tmp_path):
+    path = write_surrogate_pool(values, tmp_path / "towns.pool")
+
+    for source in (values, load_surrogate_pool(path), path):
+        drawn = sample_surrogates(source, 500, rng=np.random.default_rng(0))
+        assert len(drawn) == 500
+        assert set(drawn) == set(values)
+
+        without_replacement = sample_surrogates(source, len(values), replace=False)
+        assert sorted(without_replacement) == sorted(values)
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="Needs fork"
+)
+def test_forked_workers_draw_different_surrogates():
+    towns = [f"Town {i}" for i in range(1000)]
+    sample_surrogates(towns, 1)
+    with multiprocessing.get_context("fork").Pool(3) as pool:
+        draws = pool.starmap(sample_surrogates, [(towns, 5)] * 3, chunksize=1)
+
+    assert len({tuple(drawn) for drawn in draws}) == 3
+
+
+def test_render_draws_a_surrogate_for_each_span(tmp_path):
+    text = "Bristol, Bath and Leeds"
+    spans = [(0, 7, "LOCATION"), (9, 13, "LOCATION"), (18, 23, "LOCATION")]
+    pool_path = write_surrogate_pool(
+        [f"Town {i}" for i in range(1000)], tmp_path / "towns.pool"
+    )
+
+    rendered = render(
+        text, spans, {"LOCATION": OperatorConfig("surrogate", {"values": pool_path})}
+    )
+    towns = rendered.replace(" and ", ", ").split(", ")
+    assert len(towns) == 3
+    assert all(town.startswith("Town ") for town in towns)
+    assert len(set(towns)) > 1
+
+
+def test_compile_surrogate_pools(tmp_path):
+    pools = compile_surrogate_pools(tmp_path)
+
+    assert list(load_surrogate_pool(pools["LOCATION"])) == generate_locations()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,162 @@
+from types import SimpleNamespace
+
+import pytest
+
+from pteredactyl.recognisers.transformers_recogniser import TransformersRecogniser
+from pteredactyl.support import load_transformers_recognizer
+
+
+def prediction(entity_group, start, end, score=0.9, word="word"):
+    return {
+        "entity_group": entity_group,
+        "score": score,
+        "word": word,
+        "start": start,
+        "end": end,
+    }
+
+
+def test_reconcile_chunk_predictions_aligns_offsets_and_drops_duplicates():
+    chunk_spans = [(0, 100), (60, 160)]
+    chunk_predictions = [
+        [prediction("PATIENT", 10, 20), prediction("DATE", 70, 80)],
+        [prediction("DATE", 10, 20), prediction("PATIENT", 50, 60)],
+    ]
+
+    predictions = TransformersRecogniser._reconcile_chunk_predictions(
+        chunk_spans, chunk_predictions, text_length=160
+    )
+
+    assert [(p["entity_group"], p["start"], p["end"]) for p in predictions] == [
+        ("PATIENT", 10, 20),
+        ("DATE", 70, 80),
+        ("PATIENT", 110, 120),
+    ]
+
+
+def test_reconcile_chunk_predictions_merges_entities_straddling_windows():
+    chunk_spans = [(0, 100), (60, 160)]
+    chunk_predictions = [
+        [prediction("PATIENT", 75, 85, score=0.8, word="John")],
+        [prediction("PATIENT", 20, 35, score=0.9, word="John Smith")],
+    ]
+
+    predictions = TransformersRecogniser._reconcile_chunk_predictions(
+        chunk_spans, chunk_predictions, text_length=160
+    )
+
+    assert predictions == [prediction("PATIENT", 75, 95, score=0.9, word="John Smith")]
+
+
+def test_reconcile_chunk_predictions_drops_predictions_cut_by_window_edge():
+    chunk_spans = [(0, 100), (60, 160)]
+    chunk_predictions = [
+        [prediction("PATIENT", 95, 100)],
+        [prediction("PATIENT", 35, 45)],
+    ]
+
+    predictions = TransformersRecogniser._reconcile_chunk_predictions(
+        chunk_spans, chunk_predictions, text_length=160
+    )
+
+    assert [(p["start"], p["end"]) for p in predictions] == [(95, 105)]
+
+
+def test_reconcile_chunk_predictions_keeps_entities_cut_from_their_owning_window():
+    # The entity starts in the first window's half of the overlap, but runs past the first window's end
+    chunk_spans = [(0, 100), (60, 160)]
+    chunk_predictions = [
+        [prediction("LOCATION", 70, 100)],
+        [prediction("LOCATION", 10, 45)],
+    ]
+
+    predictions = TransformersRecogniser._reconcile_chunk_predictions(
+        chunk_spans, chunk_predictions, text_length=160
+    )
+
+    assert [(p["entity_group"], p["start"], p["end"]) for p in predictions] == [
+        ("LOCATION", 70, 105)
+    ]
+
+
+@pytest.mark.parametrize("chunk_workers", [1, 3])
+def test_stacked_windows_match_window_by_window_predictions(tiny_model, chunk_workers):
+    recogniser = load_transformers_recognizer(tiny_model)
+    recogniser.chunk_workers = chunk_workers
+    note = "Jane Smith was seen at Southampton General Hospital on 12/03/2021. "
+    texts = [note * 8, "Seen by Dr Jones.", "  ", note * 3, note]
+
+    # Each window of each text run through the model on its own, then reconciled
+    expected = []
+    for text in texts:
+        if not text.strip():
+            expected.append([])
+            continue
+        (spans,) = recogniser._get_chunk_spans([text])
+        window_predictions = [
+            recogniser.pipeline(text[start:end]) for start, end in spans
+        ]
+        if len(spans) == 1:
+            expected.append(window_predictions[0])
+        else:
+            expected.append(
+                TransformersRecogniser._reconcile_chunk_predictions(
+                    spans, window_predictions, len(text)
+                )
+            )
+    assert len(recogniser._get_chunk_spans([texts[0]])[0]) > 3
+
+    # The windows of all the texts stacked into batches that straddle texts
+    predictions = recogniser._get_ner_results_for_texts(texts, batch_size=3)
+
+    assert len(predictions) == len(expected)
+    for text_predictions, text_expected in zip(predictions, expected):
+        assert [
+            (p["entity_group"], p["start"], p["end"]) for p in text_predictions
+        ] == [(p["entity_group"], p["start"], p["end"]) for p in text_expected]
+        assert [p["score"] for p in text_predictions] == pytest.approx(
+            [p["score"] for p in text_expected], abs=1e-4
+        )
+
+
+def test_chunk_spans_cover_words_longer_than_the_stride(tiny_model):
+    recogniser = load_transformers_recognizer(tiny_model)
+    texts = [("b" * 90 + " ") * 5, ("Ward " + "x" * 60 + " ") * 12]
+
+    for text, spans in zip(texts, recogniser._get_chunk_spans(texts)):
+        assert len(spans) > 1
+        assert spans[0][0] == 0 and spans[-1][1] == len(text)
+        # Each window starts inside (or at the end of) the one before, so no text is left unanalysed
+        for (_, previous_end), (start, end) in zip(spans, spans[1:]):
+            assert start <= previous_end < end
+
+
+def test_slow_tokenizer_chunks_by_token_count(tiny_model):
+    class WordTokenizer:
+        is_fast = False
+        model_max_length = 32
+
+        def tokenize(self, text):
+            return text.split()
+
+        def num_special_tokens_to_add(self):
+            return 2
+
+    recogniser = load_transformers_recognizer(tiny_model)
+    recogniser.pipeline = SimpleNamespace(
+        tokenizer=WordTokenizer(), model=recogniser.pipeline.model
+    )
+    recogniser.chunk_length = 40
+    recogniser.text_overlap_length = 10
+
+    # Far more characters than the token budget, but few enough tokens to fit in one window
+    long_words = " ".join(["Southampton"] * 30)
+    many_words = " ".join(["a"] * 31)
+    spans = recogniser._get_chunk_spans([long_words, many_words])
+
+    assert spans[0] == [(0, len(long_words))]
+    assert len(spans[1]) > 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
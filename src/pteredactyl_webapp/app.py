@@ -1,5 +1,6 @@
 import logging
 import logging.config
+import os
 import re
 from pathlib import Path
 
@@ -10,7 +11,6 @@ import seaborn as sns
 import yaml
 
 import pteredactyl as pt  # we might need to change this abbreviation in future
-from pteredactyl.defaults import change_model
 
 # Logging configuration. This is only done at root level
 logging_config = yaml.safe_load(Path("logging.yaml").read_text())
@@ -22,6 +22,15 @@ log = logging.getLogger(__name__)
 # Load the model
 log.info("Starting App")
 
+DEFAULT_MODEL_PATH = "StanfordAIMI/stanford-deidentifier-base"
+
+# Analysers are built once per model and reused across requests. Least recently used models are evicted
+# once the cache exceeds PTEREDACTYL_CACHE_MAX_MB (unset means no limit).
+cache_max_mb = os.environ.get("PTEREDACTYL_CACHE_MAX_MB")
+analyser_cache = pt.AnalyserCache(
+    max_memory_mb=float(cache_max_mb) if cache_max_mb else None
+)
+
 sample_text = """
 1. Dr. Huntington (Patient No: 1234567890) diagnosed Ms. Alzheimer with Alzheimer's disease during her last visit to the Huntington Medical Center on 12/12/2023. The prognosis was grim, but Dr. Huntington assured Ms. Alzheimer that the facility was well-equipped to handle her condition despite the lack of a cure for Alzheimer's.
 
@@ -78,17 +87,20 @@ def redact(text: str, model_name: str):
         "Nikhilrk De-Identify": "nikhilrk/de-identify",
     }
 
-    model_path = model_paths.get(model_name, "StanfordAIMI/stanford-deidentifier-base")
+    model_path = model_paths.get(model_name, DEFAULT_MODEL_PATH)
 
-    # Log the model being changed to
-    log.info(f"Changing to model: {model_path}")
+    # Log the model being used
+    log.info(f"Using model: {model_path}")
 
-    if model_path:
-        change_model(model_path)
-    else:
+    if not model_path:
         raise ValueError("No valid model path provided.")
 
-    anonymized_text = pt.anonymise(text, model_path=model_path)  # Pass model_path
+    # Regex recognisers were built with the cached analyser, so there is no need to rebuild them per call
+    anonymized_text = pt.anonymise(
+        text,
+        analyser=analyser_cache.get(model_path),
+        rebuild_regex_recognisers=False,
+    )
     anonymized_text = anonymized_text.replace("<", "[").replace(">", "]")
     return anonymized_text
 
@@ -408,4 +420,18 @@ iface = gr.Interface(
     article=hint,
 )
 
+
+def is_ready() -> bool:
+    """Readiness check: True once the default model has been loaded and warmed up."""
+    return analyser_cache.is_ready(DEFAULT_MODEL_PATH)
+
+
+# Load and warm up the default model before the server starts listening, so traffic only arrives once it is ready
+log.info(f"Preloading model: {DEFAULT_MODEL_PATH}")
+analyser_cache.warm([DEFAULT_MODEL_PATH])
+
+if not is_ready():
+    raise RuntimeError(f"Failed to load default model: {DEFAULT_MODEL_PATH}")
+
+log.info("Model loaded, launching app")
 iface.launch(server_name="0.0.0.0", server_port=7860)